@@ -0,0 +1,206 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+
+from bench.corpus import CorpusShape, generate_corpus
+from bench.timer import best_of
+from cache import remove_cache
+from file import copy_dir, list_tree, walk_tree
+from htmlnode import HTMLNode
+from markdown import markdown_to_html_node
+from markdown_blocks import parse_blocks
+import main as ssg_main
+from textnode import text_to_textnodes
+
+
+RESULTS_VERSION = 1
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+LATEST_PATH = os.path.join(RESULTS_DIR, "latest.json")
+
+
+def run_suite(root: str, repeat: int) -> dict[str, float]:
+    content_dir = os.path.join(root, "content")
+    static_dir = os.path.join(root, "static")
+
+    pages = list[str]()
+    for file in list_tree(content_dir, content_dir)[0]:
+        if not file.endswith(".md"):
+            continue
+        with open(os.path.join(content_dir, file)) as f:
+            pages.append(f.read())
+
+    inline_texts = [
+        " ".join(block.items)
+        for page in pages
+        for block in parse_blocks(page.split("\n"))
+        if block.type != "Code"
+    ]
+    nodes = [markdown_to_html_node(page) for page in pages]
+
+    def inline():
+        for text in inline_texts:
+            _ = text_to_textnodes(text)
+
+    def parse():
+        for page in pages:
+            _ = markdown_to_html_node(page)
+
+    def serialize(nodes: list[HTMLNode] = nodes):
+        for node in nodes:
+            _ = node.to_html()
+
+    def copy():
+        dest = os.path.join(root, "copy")
+        if os.path.exists(dest):
+            shutil.rmtree(dest)
+        copy_dir(static_dir, dest)
+
+    results = {
+        "text_to_textnodes": best_of(inline, repeat),
+        "markdown_to_html_node": best_of(parse, repeat),
+        "to_html": best_of(serialize, repeat),
+        "list_tree": best_of(lambda: list_tree(content_dir, content_dir), repeat),
+        "walk_tree": best_of(lambda: list(walk_tree(content_dir)), repeat),
+        "copy_dir": best_of(copy, repeat),
+    }
+
+    results["build_full"] = best_of(lambda: _build(root, clean=True), repeat)
+    results["build_noop"] = best_of(lambda: _build(root, clean=False), repeat)
+
+    return results
+
+
+def _build(root: str, clean: bool):
+    cwd = os.getcwd()
+    argv = sys.argv
+    try:
+        os.chdir(root)
+        if clean:
+            for path in (ssg_main.DEST_PATH, ssg_main.MANIFEST_PATH):
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+            # Or rendered bodies would still come from the cache
+            remove_cache(ssg_main.CACHE_PATH)
+
+        sys.argv = ["main.py"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            ssg_main.main()
+    finally:
+        sys.argv = argv
+        os.chdir(cwd)
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], tolerance: float
+) -> list[str]:
+    regressions = list[str]()
+
+    print(f"{'benchmark':<24} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<24} {'-':>12} {seconds * 1000:9.2f} ms")
+            continue
+
+        change = seconds / before - 1
+        flag = ""
+        if change > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+
+        print(
+            f"{name:<24} {before * 1000:9.2f} ms {seconds * 1000:9.2f} ms "
+            f"{change * 100:+7.1f}%{flag}"
+        )
+
+    return regressions
+
+
+def main():
+    defaults = CorpusShape()
+
+    parser = argparse.ArgumentParser(
+        prog="python3 -m bench",
+        description="Time the build pipeline on a synthetic site and compare "
+        "against a saved baseline",
+    )
+    _ = parser.add_argument("--pages", type=int, default=defaults.pages)
+    _ = parser.add_argument("--blocks", type=int, default=defaults.blocks_per_page)
+    _ = parser.add_argument("--density", type=float, default=defaults.markup_density)
+    _ = parser.add_argument("--images", type=float, default=defaults.image_ratio)
+    _ = parser.add_argument("--links", type=float, default=defaults.link_ratio)
+    _ = parser.add_argument("--depth", type=int, default=defaults.depth)
+    _ = parser.add_argument("--seed", type=int, default=0)
+    _ = parser.add_argument("--repeat", type=int, default=3)
+    _ = parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="how much slower than the baseline counts as a regression",
+    )
+    _ = parser.add_argument("--baseline", default=BASELINE_PATH)
+    _ = parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store these results as the new baseline",
+    )
+    args = parser.parse_args()
+
+    shape = CorpusShape(
+        pages=args.pages,
+        blocks_per_page=args.blocks,
+        markup_density=args.density,
+        image_ratio=args.images,
+        link_ratio=args.links,
+        depth=args.depth,
+    )
+
+    with tempfile.TemporaryDirectory() as root:
+        start = time.perf_counter()
+        generate_corpus(root, shape, args.seed)
+        print(f"Generated {shape} in {time.perf_counter() - start:.2f} s")
+
+        results = run_suite(root, args.repeat)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    document = {
+        "version": RESULTS_VERSION,
+        "shape": {**asdict(shape), "seed": args.seed},
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+    with open(LATEST_PATH, "w") as f:
+        json.dump(document, f, indent=1)
+
+    baseline = dict[str, float]()
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            saved = json.load(f)
+        if saved.get("shape") != document["shape"]:
+            print("Baseline was taken on a different corpus, not comparing")
+        else:
+            baseline = saved["results"]
+
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        shutil.copyfile(LATEST_PATH, args.baseline)
+        print(f"Saved baseline to '{args.baseline}'")
+    elif len(regressions) != 0:
+        slower = ", ".join(regressions)
+        print(f"Slower than baseline by more than {args.tolerance:.0%}: {slower}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
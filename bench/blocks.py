@@ -0,0 +1,103 @@
+import random
+
+from bench.timer import best_of, report
+from markdown_blocks import BlockType, classify_block
+
+
+# block_to_block_type as it was before the single-pass classifier, kept
+# verbatim as the reference point
+def legacy_block_to_block_type(block: str) -> BlockType:
+    lines = block.split("\n")
+
+    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+        return "Heading"
+
+    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+        return "Code"
+
+    is_quote = True
+    for line in lines:
+        words = line.split(" ")
+        if len(words) == 0 or words[0] != ">":
+            is_quote = False
+            break
+
+    if is_quote:
+        return "Quote"
+
+    is_unordered_list = all(map(lambda line: line.startswith("- "), lines))
+    if is_unordered_list:
+        return "UnorderedList"
+
+    is_ordered_list = True
+    for i, line in enumerate(lines):
+        number = i + 1
+        if not line.startswith(f"{number}. "):
+            is_ordered_list = False
+            break
+
+    if is_ordered_list:
+        return "OrderedList"
+
+    return "Paragraph"
+
+
+def legacy_items(block: str, block_type: BlockType) -> list[str]:
+    # The re-splitting markdown_to_html_node used to do for quotes and lists
+    match block_type:
+        case "Quote" | "UnorderedList":
+            return [line[2:] for line in block.split("\n")]
+        case "OrderedList":
+            return ["".join(line.split(". ")[1:]) for line in block.split("\n")]
+        case _:
+            return []
+
+
+def corpus(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    words = "lorem ipsum dolor sit amet consectetur adipiscing elit".split()
+
+    def line() -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(4, 12)))
+
+    blocks = list[str]()
+    for _ in range(count):
+        n = rng.randint(1, 8)
+        match rng.choice(["p", "p", "p", "h", "code", "quote", "ul", "ol"]):
+            case "p":
+                blocks.append("\n".join(line() for _ in range(n)))
+            case "h":
+                blocks.append(f"{'#' * rng.randint(1, 6)} {line()}")
+            case "code":
+                blocks.append("```\n" + "\n".join(line() for _ in range(n)) + "\n```")
+            case "quote":
+                blocks.append("\n".join(f"> {line()}" for _ in range(n)))
+            case "ul":
+                blocks.append("\n".join(f"- {line()}" for _ in range(n)))
+            case _:
+                blocks.append("\n".join(f"{i + 1}. {line()}" for i in range(n)))
+
+    return blocks
+
+
+def main():
+    blocks = corpus(20_000)
+    split_blocks = [block.split("\n") for block in blocks]
+
+    for block, lines in zip(blocks, split_blocks):
+        assert classify_block(lines)[0] == legacy_block_to_block_type(block)
+
+    def legacy():
+        for block in blocks:
+            _ = legacy_items(block, legacy_block_to_block_type(block))
+
+    def single_pass():
+        for lines in split_blocks:
+            _ = classify_block(lines)
+
+    print(f"{'classify + items':<40} {'legacy':>13} {'single-pass':>13} {'speedup':>9}")
+    report(f"{len(blocks)} mixed blocks", best_of(legacy), best_of(single_pass))
+
+
+if __name__ == "__main__":
+    main()
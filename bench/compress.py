@@ -0,0 +1,59 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from bench.corpus import CorpusShape, generate_corpus
+from build import build
+from compress import compress_outputs, compressed_suffixes
+from file import walk_tree
+
+
+def compress(dest: str, outputs: list[str], workers: int | None) -> float:
+    # From scratch: every sibling is removed first
+    for file in outputs:
+        for suffix in compressed_suffixes():
+            if os.path.exists(os.path.join(dest, file + suffix)):
+                os.remove(os.path.join(dest, file + suffix))
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _ = compress_outputs(dest, outputs, workers=workers)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"suffixes: {', '.join(compressed_suffixes())}, {os.cpu_count()} CPUs")
+    print(f"{'pages':<40} {'1 thread':>13} {'pool':>13} {'speedup':>9}")
+    for pages in (200, 1_000):
+        with tempfile.TemporaryDirectory() as root:
+            generate_corpus(root, CorpusShape(pages=pages))
+            dest = os.path.join(root, "docs")
+            with contextlib.redirect_stdout(io.StringIO()):
+                build(
+                    os.path.join(root, "static"),
+                    os.path.join(root, "content"),
+                    os.path.join(root, "template.html"),
+                    dest,
+                    os.path.join(root, "manifest.json"),
+                    "/",
+                )
+            outputs = [file for file, _ in walk_tree(dest)]
+
+            serial = min(compress(dest, outputs, 1) for _ in range(3))
+            pooled = min(compress(dest, outputs, None) for _ in range(3))
+            print(
+                f"{pages:<40} {serial * 1000:10.2f} ms {pooled * 1000:10.2f} ms "
+                + f"{serial / pooled:8.1f}x"
+            )
+
+            # Nothing was rewritten, so nothing is read
+            start = time.perf_counter()
+            _ = compress_outputs(dest, outputs)
+            elapsed = time.perf_counter() - start
+            print(f"{'  unchanged rebuild':<40} {elapsed * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
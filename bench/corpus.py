@@ -0,0 +1,122 @@
+import os
+import random
+import shutil
+from dataclasses import dataclass
+
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while elves sing of "
+    "rivendell and the grey havens beyond misty mountains"
+).split()
+
+
+@dataclass(slots=True)
+class CorpusShape:
+    pages: int = 200
+    blocks_per_page: int = 40
+    # Chance that any word carries bold, italic or code markup
+    markup_density: float = 0.1
+    # Chance that any word is an image or a link instead
+    image_ratio: float = 0.01
+    link_ratio: float = 0.05
+    # How many directories deep pages are nested under content/
+    depth: int = 3
+    images: int = 8
+    image_size: int = 64 * 1024
+
+
+def generate_corpus(root: str, shape: CorpusShape, seed: int = 0):
+    # Lays out content/, static/ and template.html under root the same way
+    # the real site is laid out, so main() can build it unchanged
+    rng = random.Random(seed)
+
+    if os.path.exists(root):
+        shutil.rmtree(root)
+
+    static_dir = os.path.join(root, "static")
+    os.makedirs(os.path.join(static_dir, "images"))
+    with open(os.path.join(static_dir, "index.css"), "w") as f:
+        _ = f.write("body { margin: 0 auto; max-width: 40em; }\n")
+
+    images = list[str]()
+    for i in range(shape.images):
+        image = f"images/image{i}.png"
+        with open(os.path.join(static_dir, image), "wb") as f:
+            _ = f.write(rng.randbytes(shape.image_size))
+        images.append(image)
+
+    with open(os.path.join(root, "template.html"), "w") as f:
+        _ = f.write(TEMPLATE)
+
+    page_paths = [_page_path(rng, i, shape.depth) for i in range(shape.pages)]
+    for i, page_path in enumerate(page_paths):
+        path = os.path.join(root, "content", page_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            _ = f.write(_page(rng, i, shape, images, page_paths))
+
+
+def _page_path(rng: random.Random, i: int, depth: int) -> str:
+    if i == 0:
+        return "index.md"
+
+    dirs = [f"section{rng.randrange(4)}" for _ in range(rng.randint(0, depth - 1))]
+    return os.path.join(*dirs, f"page{i}", "index.md")
+
+
+def _page(
+    rng: random.Random,
+    i: int,
+    shape: CorpusShape,
+    images: list[str],
+    page_paths: list[str],
+) -> str:
+    def line(words: int) -> str:
+        out = list[str]()
+        for _ in range(words):
+            word = rng.choice(WORDS)
+            roll = rng.random()
+            if roll < shape.image_ratio:
+                word = f"![{word}](/{rng.choice(images)})"
+            elif roll < shape.image_ratio + shape.link_ratio:
+                target = os.path.dirname(rng.choice(page_paths))
+                word = f"[{word}](/{target})"
+            elif roll < shape.image_ratio + shape.link_ratio + shape.markup_density:
+                word = rng.choice(("**{}**", "_{}_", "`{}`")).format(word)
+            out.append(word)
+
+        return " ".join(out)
+
+    blocks = [f"# Page {i} {line(4)}"]
+    for _ in range(shape.blocks_per_page - 1):
+        n = rng.randint(1, 6)
+        match rng.choice(("p", "p", "p", "p", "h", "ul", "ol", "quote", "code")):
+            case "p":
+                blocks.append("\n".join(line(rng.randint(8, 20)) for _ in range(n)))
+            case "h":
+                blocks.append(f"{'#' * rng.randint(2, 4)} {line(5)}")
+            case "ul":
+                blocks.append("\n".join(f"- {line(8)}" for _ in range(n)))
+            case "ol":
+                blocks.append("\n".join(f"{j + 1}. {line(8)}" for j in range(n)))
+            case "quote":
+                blocks.append("\n".join(f"> {line(10)}" for _ in range(n)))
+            case _:
+                code = "\n".join(f"    call({line(3)!r})" for _ in range(n))
+                blocks.append(f"```\n{code}\n```")
+
+    return "\n\n".join(blocks) + "\n"
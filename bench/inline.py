@@ -0,0 +1,93 @@
+import random
+from collections.abc import Sequence
+from typing import Literal
+
+from bench.timer import best_of, report
+from textnode import TextNode, split_nodes_image, split_nodes_link, text_to_textnodes
+
+
+# The chained pipeline text_to_textnodes used before the single-pass
+# tokenizer, kept verbatim as the reference point
+def legacy_split_nodes_delimiter(
+    old_nodes: Sequence[TextNode], text_type: Literal["Bold", "Italic", "Code"]
+) -> list[TextNode]:
+    delimiter = {"Bold": "**", "Italic": "_", "Code": "`"}[text_type]
+
+    new_nodes = list[TextNode]()
+    for node in old_nodes:
+        if node.text_type != "Plain":
+            new_nodes.append(node)
+            continue
+
+        last = ""
+        text_so_far = ""
+        start_delimiter = False
+        for char in node.text:
+            is_delimiter = (last + char).endswith(delimiter)
+            if is_delimiter:
+                if len(delimiter) == 2:
+                    text_so_far = text_so_far[:-1]
+
+                if not start_delimiter:
+                    start_delimiter = True
+                    if len(text_so_far) != 0:
+                        new_nodes.append(TextNode(text_so_far, "Plain"))
+                        text_so_far = ""
+                else:
+                    start_delimiter = False
+                    new_nodes.append(TextNode(text_so_far, text_type))
+                    text_so_far = ""
+            else:
+                text_so_far += char
+
+            last = char
+
+        if len(text_so_far) != 0:
+            new_nodes.append(TextNode(text_so_far, "Plain"))
+
+    return new_nodes
+
+
+def legacy_text_to_textnodes(text: str) -> list[TextNode]:
+    nodes = [TextNode(text, "Plain")]
+    for text_type in ("Bold", "Italic", "Code"):
+        nodes = legacy_split_nodes_delimiter(nodes, text_type)
+
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+
+    return nodes
+
+
+WORDS = [
+    "lorem",
+    "ipsum",
+    "**dolor**",
+    "_sit_",
+    "`amet()`",
+    "[consectetur](https://example.com/a)",
+    "![adipiscing](/images/b.png)",
+    "elit,",
+    "sed",
+    "do",
+]
+
+
+def paragraph(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def main():
+    print(f"{'text_to_textnodes':<40} {'chained':>13} {'single-pass':>13} {'speedup':>9}")
+    for words in (100, 1_000, 10_000, 50_000):
+        text = paragraph(words)
+        assert text_to_textnodes(text) == legacy_text_to_textnodes(text)
+
+        before = best_of(lambda: legacy_text_to_textnodes(text), 3)
+        after = best_of(lambda: text_to_textnodes(text), 3)
+        report(f"{words} words ({len(text)} chars)", before, after)
+
+
+if __name__ == "__main__":
+    main()
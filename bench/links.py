@@ -0,0 +1,147 @@
+import random
+import re
+from collections.abc import Sequence
+
+from bench.timer import best_of, report
+from textnode import (
+    TextNode,
+    _tokenize_images_and_links,  # pyright: ignore[reportPrivateUsage]
+    split_nodes_image,
+    split_nodes_link,
+)
+
+
+# The scanners used before the combined one, kept verbatim as the reference
+# point: images over the whole text, then links over the gaps, with
+# backtracking quantifiers
+legacy_image_re = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+legacy_link_re = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+
+def legacy_tokenize_images(text: str, start: int, end: int, nodes: list[TextNode]):
+    for match in legacy_image_re.finditer(text, start, end):
+        legacy_tokenize_links(text, start, match.start(), nodes)
+        nodes.append(TextNode(match.group(1), "Image", match.group(2)))
+        start = match.end()
+
+    legacy_tokenize_links(text, start, end, nodes)
+
+
+def legacy_tokenize_links(text: str, start: int, end: int, nodes: list[TextNode]):
+    for match in legacy_link_re.finditer(text, start, end):
+        if match.start() > start:
+            nodes.append(TextNode(text[start : match.start()], "Plain"))
+        nodes.append(TextNode(match.group(1), "Link", match.group(2)))
+        start = match.end()
+
+    if end > start:
+        nodes.append(TextNode(text[start:end], "Plain"))
+
+
+def legacy_split_nodes(old_nodes: Sequence[TextNode]) -> list[TextNode]:
+    # split_nodes_image and split_nodes_link as they were: findall, then
+    # str.split on the rebuilt markdown to find each match again
+    new_nodes = list[TextNode]()
+    for node in old_nodes:
+        text_to_split = node.text
+        for alt, url in legacy_image_re.findall(node.text):
+            left_text, text_to_split = text_to_split.split(f"![{alt}]({url})", 1)
+            if left_text != "":
+                new_nodes.append(TextNode(left_text, "Plain"))
+            new_nodes.append(TextNode(alt, "Image", url))
+        if text_to_split != "":
+            new_nodes.append(TextNode(text_to_split, "Plain"))
+
+    nodes = new_nodes
+    new_nodes = list[TextNode]()
+    for node in nodes:
+        if node.text_type != "Plain":
+            new_nodes.append(node)
+            continue
+
+        text_to_split = node.text
+        for alt, url in legacy_link_re.findall(node.text):
+            left_text, text_to_split = text_to_split.split(f"[{alt}]({url})", 1)
+            if left_text != "":
+                new_nodes.append(TextNode(left_text, "Plain"))
+            new_nodes.append(TextNode(alt, "Link", url))
+        if text_to_split != "":
+            new_nodes.append(TextNode(text_to_split, "Plain"))
+
+    return new_nodes
+
+
+def changelog(entries: int, seed: int = 0) -> str:
+    # One line per change, each with a link to its PR and its author
+    rng = random.Random(seed)
+    lines = list[str]()
+    for i in range(entries):
+        user = rng.choice(("alice", "bob", "carol", "dave"))
+        lines.append(
+            f"[#{i}](https://github.com/org/repo/pull/{i}) Fix [parser]"
+            + f"(/docs/parser.html) edge case, by [@{user}](https://github.com/{user})"
+        )
+    return " ".join(lines)
+
+
+def index(entries: int, seed: int = 0) -> str:
+    # Links with a thumbnail every few entries, and some [bracketed] text
+    # that is not a link
+    rng = random.Random(seed)
+    items = list[str]()
+    for i in range(entries):
+        if rng.random() < 0.2:
+            items.append(f"![thumb {i}](/images/{i}.png)")
+        items.append(f"[Post {i}](/blog/post-{i}/) [draft] {rng.choice('ab')}")
+    return " ".join(items)
+
+
+def prose(entries: int, seed: int = 0) -> str:
+    # The control: mostly text, with [bracketed] asides and a link now and
+    # then
+    rng = random.Random(seed)
+    sentences = list[str]()
+    for i in range(entries):
+        sentences.append("Lorem ipsum dolor sit amet [sic], consectetur adipiscing.")
+        if rng.random() < 0.1:
+            sentences.append(f"See [note {i}](/notes/{i}/).")
+    return " ".join(sentences)
+
+
+def main():
+    print(f"{'image/link scan':<40} {'two-pass':>13} {'combined':>13} {'speedup':>9}")
+    for name, make in (("changelog", changelog), ("index", index), ("prose", prose)):
+        for entries in (100, 1_000, 10_000):
+            text = make(entries)
+
+            def before():
+                nodes = list[TextNode]()
+                legacy_tokenize_images(text, 0, len(text), nodes)
+                return nodes
+
+            def after():
+                nodes = list[TextNode]()
+                _tokenize_images_and_links(text, 0, len(text), nodes)
+                return nodes
+
+            assert before() == after()
+            report(
+                f"{name}, {entries} entries",
+                best_of(before, 5),
+                best_of(after, 5),
+            )
+
+    print()
+    print(f"{'split_nodes_image/link':<40} {'str.split':>13} {'offsets':>13} {'speedup':>9}")
+    for entries in (100, 1_000, 10_000):
+        nodes = [TextNode(changelog(entries), "Plain")]
+        assert legacy_split_nodes(nodes) == split_nodes_link(split_nodes_image(nodes))
+        report(
+            f"changelog, {entries} entries",
+            best_of(lambda: legacy_split_nodes(nodes), 5),
+            best_of(lambda: split_nodes_link(split_nodes_image(nodes)), 5),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import random
+
+from bench.timer import best_of, report
+from markdown import InlineMemo, markdown_to_html_chunks, text_to_children
+
+
+NAV = [f"[{name}](/docs/{name.lower()}/)" for name in (
+    "Install", "Quickstart", "Config", "Templates", "Deploy", "API", "FAQ", "Changelog"
+)]
+PARAMS = ["`path`", "`base_path`", "`jobs`", "`template`", "`dest`", "`check`"]
+TYPES = ["_str_", "_int_", "_bool_", "_Template_"]
+DESCRIPTIONS = [
+    "where the output is written",
+    "prefix for every absolute link, see [Deploy](/docs/deploy/)",
+    "how many worker processes to use",
+    "**required**, no default",
+    "defaults to the value in [Config](/docs/config/)",
+]
+NOTE = "> **Note:** this page is generated, edit the [source](/docs/source/) instead"
+
+
+def page(rng: random.Random, i: int) -> str:
+    # Reference documentation: a nav list, a boilerplate note and parameter
+    # lists built from a small vocabulary
+    blocks = [f"# Reference {i}", "\n".join(f"- {link}" for link in NAV), NOTE]
+    for section in range(8):
+        blocks.append(f"## Function {i}.{section}")
+        blocks.append(
+            "\n".join(
+                f"- {rng.choice(PARAMS)} {rng.choice(TYPES)}: {rng.choice(DESCRIPTIONS)}"
+                for _ in range(rng.randint(3, 8))
+            )
+        )
+        blocks.append(
+            "\n".join(
+                f"{j + 1}. Call it with {rng.choice(PARAMS)}" for j in range(3)
+            )
+        )
+    blocks.append(NOTE)
+
+    return "\n\n".join(blocks)
+
+
+def render(pages: list[str], memo: InlineMemo | None) -> list[str]:
+    inline = memo if memo is not None else text_to_children
+    return ["".join(markdown_to_html_chunks(page.split("\n"), "/", inline)) for page in pages]
+
+
+def main():
+    print(f"{'list-heavy pages':<40} {'plain':>13} {'memoized':>13} {'speedup':>9}")
+    for count in (10, 100, 1_000):
+        rng = random.Random(0)
+        pages = [page(rng, i) for i in range(count)]
+
+        memo = InlineMemo()
+        assert render(pages, memo) == render(pages, None)
+        hits, misses = memo.stats()
+
+        before = best_of(lambda: render(pages, None), 3)
+        # A fresh memo per run, like a fresh build
+        after = best_of(lambda: render(pages, InlineMemo()), 3)
+        report(
+            f"{count} pages ({hits / (hits + misses) * 100:.0f}% hits)", before, after
+        )
+
+
+if __name__ == "__main__":
+    main()
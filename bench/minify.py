@@ -0,0 +1,55 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from bench.corpus import CorpusShape, generate_corpus
+from build import build
+from file import walk_tree
+
+
+def build_site(root: str, minify: bool) -> tuple[float, int]:
+    # A full build, returns how long it took and the bytes of HTML written
+    dest = os.path.join(root, "docs")
+    shutil.rmtree(dest, ignore_errors=True)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        build(
+            os.path.join(root, "static"),
+            os.path.join(root, "content"),
+            os.path.join(root, "template.html"),
+            dest,
+            os.path.join(root, "manifest.json"),
+            "/",
+            minify=minify,
+        )
+    elapsed = time.perf_counter() - start
+
+    size = sum(
+        entry.stat().st_size
+        for file, entry in walk_tree(dest)
+        if file.endswith(".html")
+    )
+    return elapsed, size
+
+
+def main():
+    print(f"{'pages':<12} {'plain':>22} {'minified':>22} {'saved':>7} {'cost':>7}")
+    for pages in (200, 1_000):
+        with tempfile.TemporaryDirectory() as root:
+            generate_corpus(root, CorpusShape(pages=pages))
+            plain_time, plain_size = min(build_site(root, False) for _ in range(3))
+            min_time, min_size = min(build_site(root, True) for _ in range(3))
+            print(
+                f"{pages:<12} {plain_size:>10} B {plain_time * 1000:>7.0f} ms "
+                + f"{min_size:>10} B {min_time * 1000:>7.0f} ms "
+                + f"{(1 - min_size / plain_size) * 100:>6.1f}% "
+                + f"{(min_time / plain_time - 1) * 100:>+6.1f}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
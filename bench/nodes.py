@@ -0,0 +1,77 @@
+import gc
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from htmlnode import LeafNode, ParentNode
+
+
+# The node classes as they were before __slots__, reduced to their
+# constructors, kept as the reference point
+class LegacyHTMLNode:
+    def __init__(self, tag, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class LegacyLeafNode(LegacyHTMLNode):
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag, value, None, props)
+
+
+class LegacyParentNode(LegacyHTMLNode):
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag, None, children, props)
+
+
+def build_page(leaf: Callable[..., object], parent: Callable[..., object], blocks: int):
+    # A paragraph-heavy page: every block is a <p> with text, bold and a link
+    level = 2
+    top = list[object]()
+    for i in range(blocks):
+        top.append(
+            parent(
+                f"h{level}" if i % 10 == 0 else "p",
+                [
+                    leaf(None, "Some text "),
+                    leaf("b", "bold"),
+                    leaf("a", "link", {"href": "/page"}),
+                ],
+            )
+        )
+    return parent("div", top)
+
+
+def measure(leaf: Callable[..., object], parent: Callable[..., object], blocks: int):
+    nodes = blocks * 4 + 1
+
+    gc.collect()
+    tracemalloc.start()
+    page = build_page(leaf, parent, blocks)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del page
+
+    start = time.perf_counter()
+    _ = build_page(leaf, parent, blocks)
+    elapsed = time.perf_counter() - start
+
+    return size / nodes, nodes / elapsed
+
+
+def main():
+    blocks = 100_000
+
+    print(f"{'HTMLNode':<12} {'bytes/node':>12} {'nodes/s':>14}")
+    for name, leaf, parent in (
+        ("legacy", LegacyLeafNode, LegacyParentNode),
+        ("slotted", LeafNode, ParentNode),
+    ):
+        bytes_per_node, nodes_per_second = measure(leaf, parent, blocks)
+        print(f"{name:<12} {bytes_per_node:12.1f} {nodes_per_second:14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.corpus import CorpusShape, generate_corpus
+from file import walk_tree
+
+
+MAIN_PATH = os.path.join(os.path.dirname(__file__), "..", "src", "main.py")
+
+
+def urls(root: str) -> list[str]:
+    out = ["/index.css"]
+    for file, _ in walk_tree(os.path.join(root, "static", "images")):
+        out.append(f"/images/{file}")
+    for file, _ in walk_tree(os.path.join(root, "content"), include=["*.md"]):
+        out.append("/" + os.path.dirname(file).replace(os.sep, "/") + "/")
+
+    return [url.replace("//", "/") for url in out]
+
+
+async def fetch(port: int, url: str) -> bool:
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            f"GET {url} HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n".encode()
+        )
+        response = await reader.read()
+        writer.close()
+    except ConnectionError:
+        return False
+
+    return response.startswith(b"HTTP/1.1 200 ") or response.startswith(b"HTTP/1.0 200 ")
+
+
+async def load(
+    port: int, urls: list[str], requests: int, concurrency: int
+) -> tuple[list[float], int]:
+    # Keeps `concurrency` requests in flight until `requests` are done,
+    # returns the latency of each and how many failed
+    latencies = list[float]()
+    failed = 0
+    next_request = iter(range(requests))
+
+    async def client():
+        nonlocal failed
+        for i in next_request:
+            start = time.perf_counter()
+            if not await fetch(port, urls[i % len(urls)]):
+                failed += 1
+            latencies.append(time.perf_counter() - start)
+
+    _ = await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, failed
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port: int, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            with socket.create_connection(("127.0.0.1", port)):
+                return
+        except ConnectionRefusedError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def run(
+    name: str,
+    cmd: list[str],
+    cwd: str,
+    port: int,
+    urls: list[str],
+    requests: int,
+    concurrency: int,
+):
+    server = subprocess.Popen(
+        cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for(port)
+        for pass_name in ("cold", "warm"):
+            start = time.perf_counter()
+            latencies, failed = asyncio.run(load(port, urls, requests, concurrency))
+            elapsed = time.perf_counter() - start
+
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[int(len(latencies) * 0.99)] * 1000
+            print(
+                f"{name + ' ' + pass_name:<24} {requests / elapsed:10.0f} req/s "
+                + f"{p50:8.2f} ms p50 {p99:8.2f} ms p99 {failed:6} failed"
+            )
+    finally:
+        server.terminate()
+        _ = server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test the dev server against http.server over docs/"
+    )
+    _ = parser.add_argument("--pages", type=int, default=200)
+    _ = parser.add_argument("--requests", type=int, default=2000)
+    _ = parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, CorpusShape(pages=args.pages))
+        site_urls = urls(root)
+        print(
+            f"{len(site_urls)} urls, {args.requests} requests, "
+            + f"{args.concurrency} in flight"
+        )
+
+        _ = subprocess.run(
+            [sys.executable, MAIN_PATH], cwd=root, stdout=subprocess.DEVNULL, check=True
+        )
+        port = free_port()
+        run(
+            "http.server",
+            [
+                sys.executable,
+                *("-m", "http.server", "-b", "127.0.0.1", "-d", "docs", str(port)),
+            ],
+            root,
+            port,
+            site_urls,
+            args.requests,
+            args.concurrency,
+        )
+
+        port = free_port()
+        run(
+            "serve",
+            [sys.executable, MAIN_PATH, "serve", "--port", str(port)],
+            root,
+            port,
+            site_urls,
+            args.requests,
+            args.concurrency,
+        )
+
+
+if __name__ == "__main__":
+    main()
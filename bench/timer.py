@@ -0,0 +1,16 @@
+import time
+from collections.abc import Callable
+
+
+def best_of(fn: Callable[[], object], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _ = fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def report(name: str, before: float, after: float):
+    print(f"{name:<40} {before * 1000:10.2f} ms {after * 1000:10.2f} ms {before / after:8.1f}x")
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import override
+
+from manifest import FileState
+
+
+# Hex digits of the content hash kept in fingerprinted names
+FINGERPRINT_LENGTH = 8
+# Written to the output directory, original path -> fingerprinted path, for
+# deploy tooling that needs to know which files can be cached forever
+ASSET_MANIFEST_PATH = "assets.json"
+
+# Every href="..." and src="..." value
+url_attribute_re = re.compile(r'(?<=\s)(href|src)="([^"]*)"')
+
+
+@dataclass(slots=True, eq=False)
+class AssetMap:
+    # What the links and images of a page point to once the static files are
+    # known, keyed by URL after rebasing. Applied to the props of the nodes
+    # as they are built, so text that only looks like an attribute, such as
+    # an example in a code span, is never touched.
+    # Asset URL -> its fingerprinted URL
+    urls: dict[str, str] = field(default_factory=dict)
+    # Image URL -> the props its img nodes get, see image.image_props
+    images: dict[str, dict[str, str]] = field(default_factory=dict)
+    # Digest of the maps. Rendered HTML depends on them, so anything caching
+    # it keys on this too.
+    key: str = field(init=False)
+
+    def __post_init__(self):
+        images = sorted(
+            (url, sorted(props.items())) for url, props in self.images.items()
+        )
+        digest = repr((sorted(self.urls.items()), images))
+        self.key = hashlib.sha256(digest.encode()).hexdigest()
+
+    def url(self, url: str) -> str:
+        return self.urls.get(url, url)
+
+    @override
+    def __eq__(self, value: object, /) -> bool:
+        return isinstance(value, AssetMap) and self.key == value.key
+
+    @override
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+
+def fingerprint_path(file: str, hash: str) -> str:
+    # images/tom.png -> images/tom.3fa9c1d2.png
+    dir, name = os.path.split(file)
+    stem, ext = os.path.splitext(name)
+    return os.path.join(dir, f"{stem}.{hash[:FINGERPRINT_LENGTH]}{ext}")
+
+
+def fingerprint_assets(static: dict[str, FileState]) -> dict[str, str]:
+    # The hashes come from the manifest, so an asset whose size and mtime
+    # did not change is never read again
+    return {file: fingerprint_path(file, state.hash) for file, state in static.items()}
+
+
+def asset_urls(assets: dict[str, str], base_path: str) -> dict[str, str]:
+    # The URLs pages link to, after rebasing, and what they become
+    return {
+        base_path + file.replace(os.sep, "/"): base_path + asset.replace(os.sep, "/")
+        for file, asset in assets.items()
+    }
+
+
+def rewrite_urls(html: str, urls: dict[str, str]) -> str:
+    # For the template, whose HTML is written by hand. Pages get their URLs
+    # from an AssetMap instead.
+    if len(urls) == 0:
+        return html
+
+    def replace(match: re.Match[str]) -> str:
+        url = urls.get(match.group(2))
+        if url is None:
+            return match.group(0)
+
+        return f'{match.group(1)}="{url}"'
+
+    return url_attribute_re.sub(replace, html)
+
+
+def asset_manifest_text(assets: dict[str, str]) -> str:
+    return json.dumps(
+        {
+            file.replace(os.sep, "/"): asset.replace(os.sep, "/")
+            for file, asset in assets.items()
+        },
+        indent=1,
+        sort_keys=True,
+    )
@@ -0,0 +1,196 @@
+import os
+from contextlib import nullcontext
+
+from asset import (
+    ASSET_MANIFEST_PATH,
+    AssetMap,
+    asset_manifest_text,
+    asset_urls,
+    fingerprint_assets,
+)
+from cache import DEFAULT_CACHE_SIZE, BodyCache
+from collection import CollectionConfig, generate_collections
+from compress import compress_outputs
+from file import LinkMode, copy_file, prune_tree, write_text
+from image import generate_variants, image_props, index_images
+from manifest import (
+    CheckMode,
+    Manifest,
+    hash_file,
+    hash_tree,
+    load_manifest,
+    save_manifest,
+)
+from page import generate_pages, page_dest_path
+from profiler import Profiler
+
+
+def build(
+    static_path: str,
+    content_path: str,
+    template_path: str,
+    dest_path: str,
+    manifest_path: str,
+    base_path: str,
+    jobs: int = 1,
+    profiler: Profiler | None = None,
+    link: LinkMode = "copy",
+    check: CheckMode = "mtime",
+    cache_path: str | None = None,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    collections: list[CollectionConfig] | None = None,
+    fingerprint: bool = False,
+    compress: bool = False,
+    minify: bool = False,
+    variants_path: str | None = None,
+):
+    def stage(name: str):
+        return profiler.stage(name) if profiler is not None else nullcontext()
+
+    old = load_manifest(manifest_path)
+    if not os.path.isdir(dest_path):
+        # Nothing on disk to be incremental against
+        old = Manifest()
+
+    with stage("hash"):
+        new = Manifest(
+            template=hash_file(template_path),
+            base_path=base_path,
+            static=hash_tree(static_path, "", old.static, check),
+            content=hash_tree(content_path, ".md", old.content, check),
+            minify=minify,
+        )
+
+    # Static assets only depend on their own contents
+    with stage("copy"):
+        for file, state in new.static.items():
+            dest_file_path = os.path.join(dest_path, file)
+            old_state = old.static.get(file)
+            if (
+                old_state is not None
+                and old_state.hash == state.hash
+                and os.path.exists(dest_file_path)
+            ):
+                continue
+
+            print(f"Copying '{file}' to '{dest_file_path}'")
+            copy_file(os.path.join(static_path, file), dest_file_path, link)
+
+    # Each asset also gets a copy named after its hash, which can be cached
+    # forever. Such a copy never changes once written.
+    if fingerprint:
+        with stage("fingerprint"):
+            if ASSET_MANIFEST_PATH in new.static:
+                msg = f"Static file '{ASSET_MANIFEST_PATH}' would be overwritten"
+                raise Exception(msg)
+
+            new.assets = fingerprint_assets(new.static)
+            for file, asset in new.assets.items():
+                dest_file_path = os.path.join(dest_path, asset)
+                if os.path.exists(dest_file_path):
+                    continue
+
+                print(f"Copying '{file}' to '{dest_file_path}'")
+                copy_file(os.path.join(static_path, file), dest_file_path, link)
+
+            asset_manifest_path = os.path.join(dest_path, ASSET_MANIFEST_PATH)
+            if new.assets != old.assets or not os.path.exists(asset_manifest_path):
+                print(f"Writing asset manifest to '{asset_manifest_path}'")
+                write_text(asset_manifest_path, asset_manifest_text(new.assets))
+
+    # The size of every image, read from its header, and its downscaled
+    # copies if variants_path is given
+    variants = list[str]()
+    with stage("images"):
+        new.images = index_images(static_path, new.static, old.images)
+        if variants_path is not None:
+            variants = generate_variants(
+                static_path, dest_path, variants_path, new.images, jobs, link
+            )
+
+    # Pages depend on their markdown, the template, the base path, the names
+    # of the assets they link to, whether they are minified and the images
+    # they show
+    rebuild_all = (
+        old.template != new.template
+        or old.base_path != new.base_path
+        or old.assets != new.assets
+        or old.minify != new.minify
+        or image_props(old.images, base_path) != image_props(new.images, base_path)
+    )
+    urls = asset_urls(new.assets, base_path)
+    assets = AssetMap(urls, image_props(new.images, base_path, urls))
+
+    pages = list[tuple[str, str]]()
+    for file, state in new.content.items():
+        dest_file_path = os.path.join(dest_path, page_dest_path(file))
+        old_state = old.content.get(file)
+        if (
+            not rebuild_all
+            and old_state is not None
+            and old_state.hash == state.hash
+            and os.path.exists(dest_file_path)
+        ):
+            continue
+
+        pages.append((os.path.join(content_path, file), dest_file_path))
+
+    # Opened up front so the schema is in place before any worker needs it
+    cache = BodyCache(cache_path) if cache_path is not None else None
+    try:
+        generate_pages(
+            pages,
+            template_path,
+            base_path,
+            jobs,
+            profiler,
+            cache_path,
+            assets,
+            minify,
+        )
+
+        if cache is not None:
+            with stage("evict"):
+                _ = cache.evict(cache_size)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    page_outputs = {page_dest_path(file) for file in new.content}
+
+    # Listing pages depend on the front matter and titles of their posts, so
+    # the collections are indexed on every build, from page headers only
+    with stage("collections"):
+        new.listings = generate_collections(
+            collections or [],
+            content_path,
+            template_path,
+            dest_path,
+            base_path,
+            old.listings,
+            rebuild_all,
+            page_outputs,
+            assets,
+            minify,
+        )
+
+    outputs = set(new.static)
+    outputs.update(page_outputs)
+    outputs.update(new.listings)
+    outputs.update(new.assets.values())
+    outputs.update(variants)
+    if fingerprint:
+        outputs.add(ASSET_MANIFEST_PATH)
+
+    # Last, so every output is in its final state
+    if compress:
+        with stage("compress"):
+            outputs.update(compress_outputs(dest_path, outputs))
+
+    # Anything else in the output is stale: outputs of deleted sources, or
+    # files that were never ours
+    with stage("prune"):
+        for file in prune_tree(dest_path, outputs):
+            print(f"Removing stale '{file}'")
+
+    save_manifest(new, manifest_path)
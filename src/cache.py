@@ -0,0 +1,179 @@
+import contextlib
+import hashlib
+import os
+import sqlite3
+import time
+
+from asset import AssetMap
+from markdown import PARSER_VERSION
+
+
+# Bump when the schema changes, older caches are dropped and refilled
+CACHE_VERSION = 1
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+# Writes held back before they go to disk in one transaction
+CACHE_BATCH_SIZE = 128
+
+
+class BodyCache:
+    # Rendered page bodies and their titles on disk, keyed by the markdown
+    # they were rendered from. A page whose markdown did not change is never
+    # parsed again, only poured into the template. Safe to open from several
+    # processes at once. Writes are batched, and only seen by other
+    # connections once flushed.
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.hits: int = 0
+        self.misses: int = 0
+        # Key -> (title, body, size, used) of the bodies put since the last
+        # flush
+        self.pending: dict[str, tuple[str, str, int, int]] = {}
+        # Key -> when a body already on disk was last used
+        self.used: dict[str, int] = {}
+
+        try:
+            self.db: sqlite3.Connection = _connect(path)
+        except sqlite3.OperationalError:
+            # Locked by another build, or unreadable: not broken, so not
+            # ours to delete
+            raise
+        except sqlite3.DatabaseError:
+            # A corrupt cache only costs us a full rebuild
+            remove_cache(path)
+            self.db = _connect(path)
+
+    def get(self, key: str) -> tuple[str, str] | None:
+        pending = self.pending.get(key)
+        if pending is not None:
+            title, body, size, _ = pending
+            self.pending[key] = (title, body, size, time.time_ns())
+            self.hits += 1
+            return title, body
+
+        row = self.db.execute(
+            "SELECT title, body FROM bodies WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.used[key] = time.time_ns()
+        self.hits += 1
+        self._maybe_flush()
+        return row
+
+    def put(self, key: str, title: str, body: str):
+        size = len(title.encode()) + len(body.encode())
+        self.pending[key] = (title, body, size, time.time_ns())
+        _ = self.used.pop(key, None)
+        self._maybe_flush()
+
+    def flush(self):
+        # Writes what was put and used since the last flush
+        if len(self.pending) == 0 and len(self.used) == 0:
+            return
+
+        # Takes the write lock up front, so waiting for another process is
+        # left to the busy timeout
+        _ = self.db.execute("BEGIN IMMEDIATE")
+        try:
+            _ = self.db.executemany(
+                "INSERT OR REPLACE INTO bodies VALUES (?, ?, ?, ?, ?)",
+                ((key, *row) for key, row in self.pending.items()),
+            )
+            _ = self.db.executemany(
+                "UPDATE bodies SET used = ? WHERE key = ?",
+                ((used, key) for key, used in self.used.items()),
+            )
+            _ = self.db.execute("COMMIT")
+        except BaseException:
+            _ = self.db.execute("ROLLBACK")
+            raise
+
+        self.pending.clear()
+        self.used.clear()
+
+    def _maybe_flush(self):
+        if len(self.pending) + len(self.used) >= CACHE_BATCH_SIZE:
+            self.flush()
+
+    def evict(self, max_size: int) -> int:
+        # Drops the least recently used bodies until the rest fit in
+        # max_size bytes, returns how many were dropped
+        self.flush()
+        cursor = self.db.execute(
+            """
+            DELETE FROM bodies WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (ORDER BY used DESC, key) AS total
+                    FROM bodies
+                )
+                WHERE total > ?
+            )
+            """,
+            (max_size,),
+        )
+        return cursor.rowcount
+
+    def size(self) -> int:
+        self.flush()
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM bodies").fetchone()[0]
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.db.close()
+
+
+def remove_cache(path: str):
+    # The database, and the journal files SQLite keeps next to it
+    for suffix in ("", "-wal", "-shm"):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path + suffix)
+
+
+def body_key(
+    markdown: str, base_path: str, minify: bool = False, assets: AssetMap | None = None
+) -> str:
+    # Links in the body are rebased and point at fingerprinted assets, so the
+    # base path and the asset map are part of the key, and so is how the
+    # body was serialized
+    digest = hashlib.sha256(markdown.encode()).hexdigest()
+    style = "min" if minify else "full"
+    assets_key = assets.key if assets is not None else ""
+    return f"{PARSER_VERSION}:{style}:{base_path}:{assets_key}:{digest}"
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    # Autocommit, so every statement stands on its own unless flush begins a
+    # transaction
+    db = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        # The pragma returns a row: fetch it, or the statement stays open
+        # and holds a lock that DROP TABLE fails on
+        _ = db.execute("PRAGMA journal_mode = WAL").fetchall()
+        # With WAL, only checkpoints wait for the disk. A crash can lose the
+        # last writes, which costs a re-render, but never corrupts the cache.
+        _ = db.execute("PRAGMA synchronous = NORMAL")
+        if db.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            _ = db.execute("DROP TABLE IF EXISTS bodies")
+            _ = db.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+
+        _ = db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bodies (
+                key TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                used INTEGER NOT NULL
+            )
+            """
+        )
+        _ = db.execute("CREATE INDEX IF NOT EXISTS bodies_used ON bodies (used)")
+    except BaseException:
+        db.close()
+        raise
+
+    return db
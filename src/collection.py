@@ -0,0 +1,313 @@
+import hashlib
+import os
+import re
+from dataclasses import dataclass, field
+
+from asset import AssetMap
+from file import walk_tree, write_text
+from frontmatter import is_true, split_front_matter
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from manifest import FileState
+from markdown import extract_title_from_lines
+from page import page_dest_path
+from template import Template, load_template
+from text import rebase_url
+
+
+POSTS_PER_PAGE = 10
+
+slug_re = re.compile(r"[^a-z0-9]+")
+
+
+@dataclass(slots=True)
+class CollectionConfig:
+    # Directory under content/ whose pages are listed
+    path: str
+    title: str
+    per_page: int = POSTS_PER_PAGE
+
+
+@dataclass(slots=True)
+class Post:
+    # Relative to content/
+    path: str
+    # Site-absolute, before the base path is applied
+    url: str
+    title: str
+    date: str = ""
+    tags: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Listing:
+    # Relative to the output directory
+    dest: str
+    title: str
+    posts: list[Post]
+    newer_url: str | None
+    older_url: str | None
+
+    def key(self) -> str:
+        # Changes only when what the page shows changes. Plain tuples, the
+        # repr of a dataclass is several times slower and a collection can
+        # have thousands of listing pages.
+        posts = [
+            (post.path, post.url, post.title, post.date, post.tags)
+            for post in self.posts
+        ]
+        return hashlib.sha256(
+            repr((self.title, posts, self.newer_url, self.older_url)).encode()
+        ).hexdigest()
+
+
+# Relative content path -> the hash it was read at, and its post or None
+# for a draft
+type PostCache = dict[str, tuple[str, Post | None]]
+
+
+def index_collection(
+    content_path: str,
+    config: CollectionConfig,
+    content: dict[str, FileState] | None = None,
+    cache: PostCache | None = None,
+) -> list[Post]:
+    # Every page under the collection, newest first. Only the front matter
+    # and the lines down to the title are read from each one. Given the
+    # state of every page, the pages are taken from it instead of walking
+    # content_path, and the ones whose hash is in cache are not read again.
+    posts = list[Post]()
+    own_index = os.path.join(config.path, "index.md")
+    # (relative path, hash if known)
+    files = list[tuple[str, str | None]]()
+    if content is None:
+        root = os.path.join(content_path, config.path)
+        if not os.path.isdir(root):
+            return posts
+        for file, _ in walk_tree(root, include=["*.md"]):
+            files.append((os.path.join(config.path, file), None))
+    else:
+        prefix = config.path + os.sep
+        for path, state in content.items():
+            if path.startswith(prefix):
+                files.append((path, state.hash))
+    if cache is None:
+        cache = {}
+
+    for path, hash in files:
+        if path == own_index:
+            continue
+
+        cached = cache.get(path)
+        if hash is not None and cached is not None and cached[0] == hash:
+            post = cached[1]
+        else:
+            post = read_post(os.path.join(content_path, path), path)
+            if hash is not None:
+                cache[path] = (hash, post)
+        if post is not None:
+            posts.append(post)
+
+    posts.sort(key=lambda post: post.title)
+    posts.sort(key=lambda post: post.date, reverse=True)
+    return posts
+
+
+def read_post(path: str, rel_path: str) -> Post | None:
+    # None for drafts
+    with open(path, "r") as f:
+        metadata, lines = split_front_matter(f)
+        if is_true(metadata.get("draft")):
+            return None
+
+        title = metadata.get("title")
+        if not isinstance(title, str):
+            title = extract_title_from_lines(lines)
+
+    date = metadata.get("date", "")
+    tags = metadata.get("tags", [])
+    return Post(
+        rel_path,
+        page_url(rel_path),
+        title,
+        date if isinstance(date, str) else "",
+        [tags] if isinstance(tags, str) else tags,
+    )
+
+
+def listings(config: CollectionConfig, posts: list[Post]) -> list[Listing]:
+    # The collection index with its archive pages, then the same for every
+    # tag, in tag order
+    pages = _paginate(config.path, config.title, posts, config.per_page)
+
+    # Tags that only differ in case or punctuation share a page, titled
+    # after the first spelling seen
+    tagged = dict[str, tuple[str, list[Post]]]()
+    for post in posts:
+        for tag in post.tags:
+            tagged.setdefault(slugify(tag), (tag, []))[1].append(post)
+
+    for slug in sorted(tagged):
+        tag, tag_posts = tagged[slug]
+        dir = os.path.join(config.path, "tags", slug)
+        pages.extend(
+            _paginate(dir, f"{config.title}: {tag}", tag_posts, config.per_page)
+        )
+
+    return pages
+
+
+def listing_html(
+    listing: Listing, config: CollectionConfig, base_path: str, minify: bool = False
+) -> str:
+    items = list[HTMLNode]()
+    for post in listing.posts:
+        children: list[HTMLNode] = [
+            LeafNode("a", post.title, {"href": rebase_url(post.url, base_path)})
+        ]
+        if post.date != "":
+            children.append(LeafNode(None, " "))
+            children.append(LeafNode("time", post.date, {"datetime": post.date}))
+        for tag in post.tags:
+            children.append(LeafNode(None, " "))
+            href = rebase_url(tag_url(config, tag), base_path)
+            children.append(LeafNode("a", f"#{tag}", {"href": href}))
+        items.append(ParentNode("li", children))
+
+    body: list[HTMLNode] = [LeafNode("h1", listing.title), ParentNode("ul", items)]
+
+    links = list[HTMLNode]()
+    if listing.newer_url is not None:
+        href = rebase_url(listing.newer_url, base_path)
+        links.append(LeafNode("a", "Newer posts", {"href": href, "rel": "prev"}))
+    if listing.older_url is not None:
+        href = rebase_url(listing.older_url, base_path)
+        links.append(LeafNode("a", "Older posts", {"href": href, "rel": "next"}))
+    if len(links) != 0:
+        body.append(ParentNode("nav", links))
+
+    return ParentNode("div", body).to_html(minify)
+
+
+def collect_listings(
+    configs: list[CollectionConfig],
+    content_path: str,
+    content: dict[str, FileState] | None = None,
+    cache: PostCache | None = None,
+) -> list[tuple[CollectionConfig, Listing]]:
+    # Every listing page of every collection, indexed once
+    pages = list[tuple[CollectionConfig, Listing]]()
+    dests = set[str]()
+    for config in configs:
+        posts = index_collection(content_path, config, content, cache)
+        for listing in listings(config, posts):
+            if listing.dest in dests:
+                msg = f"Collection '{config.path}' would overwrite '{listing.dest}'"
+                raise Exception(msg)
+
+            dests.add(listing.dest)
+            pages.append((config, listing))
+
+    return pages
+
+
+def render_listing(
+    listing: Listing, config: CollectionConfig, template: Template, base_path: str
+) -> str:
+    content = listing_html(listing, config, base_path, template.minify)
+    return template.render({"Title": listing.title, "Content": content})
+
+
+def generate_collections(
+    configs: list[CollectionConfig],
+    content_path: str,
+    template_path: str,
+    dest_path: str,
+    base_path: str,
+    previous: dict[str, str],
+    rebuild_all: bool,
+    page_outputs: set[str],
+    assets: AssetMap | None = None,
+    minify: bool = False,
+    content: dict[str, FileState] | None = None,
+    cache: PostCache | None = None,
+) -> dict[str, str]:
+    # Writes the listing pages whose posts, or neighbours, changed since the
+    # keys in previous. Returns the key of every listing page. content and
+    # cache are passed on to index_collection.
+    template: Template | None = None
+    keys = dict[str, str]()
+    for config, listing in collect_listings(configs, content_path, content, cache):
+        if listing.dest in page_outputs:
+            msg = f"Collection '{config.path}' would overwrite '{listing.dest}'"
+            raise Exception(msg)
+
+        key = listing.key()
+        keys[listing.dest] = key
+
+        dest_file_path = os.path.join(dest_path, listing.dest)
+        if (
+            not rebuild_all
+            and previous.get(listing.dest) == key
+            and os.path.exists(dest_file_path)
+        ):
+            continue
+
+        if template is None:
+            template = load_template(
+                template_path, base_path, assets, minify
+            )
+
+        print(f"Generating listing '{listing.dest}'")
+        write_text(dest_file_path, render_listing(listing, config, template, base_path))
+
+    return keys
+
+
+def page_url(rel_path: str) -> str:
+    # content/blog/post/index.md is served as /blog/post/
+    url = "/" + page_dest_path(rel_path).replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        url = url[: -len("index.html")]
+
+    return url
+
+
+def tag_url(config: CollectionConfig, tag: str) -> str:
+    return f"/{config.path}/tags/{slugify(tag)}/".replace(os.sep, "/")
+
+
+def slugify(text: str) -> str:
+    slug = slug_re.sub("-", text.lower()).strip("-")
+    if slug == "":
+        # No ASCII letters or digits to go on, as in "日本語". An empty slug
+        # would put the tag's page on top of the tag index, so use a short
+        # hash of the text: stable, and distinct per tag.
+        slug = hashlib.sha256(text.encode()).hexdigest()[:8]
+    return slug
+
+
+def _paginate(dir: str, title: str, posts: list[Post], per_page: int) -> list[Listing]:
+    # dir/index.html, then dir/page/2/index.html, ...
+    chunks = [posts[i : i + per_page] for i in range(0, len(posts), per_page)]
+    if len(chunks) == 0:
+        chunks.append([])
+
+    def page_dir(number: int) -> str:
+        return dir if number == 1 else os.path.join(dir, "page", str(number))
+
+    def url(number: int) -> str:
+        return "/" + page_dir(number).replace(os.sep, "/") + "/"
+
+    pages = list[Listing]()
+    for number, chunk in enumerate(chunks, 1):
+        pages.append(
+            Listing(
+                os.path.join(page_dir(number), "index.html"),
+                title if number == 1 else f"{title} (page {number})",
+                chunk,
+                url(number - 1) if number > 1 else None,
+                url(number + 1) if number < len(chunks) else None,
+            )
+        )
+
+    return pages
@@ -0,0 +1,92 @@
+import gzip
+import os
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    # Optional, without it only .gz siblings are written
+    brotli = None
+
+
+# Text formats only, images and fonts are compressed already
+COMPRESSIBLE_SUFFIXES = (".html", ".css", ".js", ".json", ".svg", ".txt", ".xml")
+# Below this the saved bytes do not pay for the extra request handling
+MIN_COMPRESS_SIZE = 1024
+
+
+def compressed_suffixes() -> list[str]:
+    return [".gz"] if brotli is None else [".gz", ".br"]
+
+
+def compress_outputs(
+    dest_path: str,
+    outputs: Iterable[str],
+    min_size: int = MIN_COMPRESS_SIZE,
+    workers: int | None = None,
+) -> set[str]:
+    # Writes a compressed sibling of every output worth compressing, next to
+    # it, and returns the siblings that belong in the output directory. A
+    # sibling carries the mtime of its output, so outputs that were not
+    # rewritten since the last build are skipped without being read.
+    suffixes = compressed_suffixes()
+    siblings = set[str]()
+    stale = list[tuple[str, list[str]]]()
+    for file in sorted(outputs):
+        if not file.endswith(COMPRESSIBLE_SUFFIXES):
+            continue
+
+        path = os.path.join(dest_path, file)
+        stat = os.stat(path)
+        if stat.st_size < min_size:
+            continue
+
+        siblings.update(file + suffix for suffix in suffixes)
+        missing = [s for s in suffixes if not _is_fresh(path + s, stat.st_mtime_ns)]
+        if len(missing) != 0:
+            stale.append((file, missing))
+
+    for file, _ in stale:
+        print(f"Compressing '{os.path.join(dest_path, file)}'")
+
+    # zlib and brotli let go of the GIL while they work, so threads are
+    # enough to keep every core busy
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(
+            lambda job: compress_file(os.path.join(dest_path, job[0]), job[1]), stale
+        ):
+            pass
+
+    return siblings
+
+
+def compress_file(path: str, suffixes: list[str]):
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        data = f.read()
+
+    for suffix in suffixes:
+        tmp_path = f"{path}{suffix}.tmp"
+        with open(tmp_path, "wb") as f:
+            _ = f.write(_compress(data, suffix))
+
+        os.replace(tmp_path, path + suffix)
+        os.utime(path + suffix, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def _compress(data: bytes, suffix: str) -> bytes:
+    match suffix:
+        case ".br" if brotli is not None:
+            return brotli.compress(data, quality=11)
+        case _:
+            # No timestamp in the header, so the same output always
+            # compresses to the same bytes
+            return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _is_fresh(path: str, mtime_ns: int) -> bool:
+    try:
+        return os.stat(path).st_mtime_ns == mtime_ns
+    except FileNotFoundError:
+        return False
@@ -1,5 +1,28 @@
+import fnmatch
 import os
+import re
 import shutil
+import time
+from collections.abc import Iterator, Sequence
+from typing import BinaryIO, Literal
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where reflinks fall back to copying
+    fcntl = None
+
+
+type LinkMode = Literal["copy", "hardlink", "reflink"]
+
+# ioctl(dest_fd, FICLONE, src_fd) shares the source's blocks on copy-on-write
+# filesystems such as btrfs and XFS
+FICLONE = 0x40049409
+
+# How long after a change a directory's mtime is trusted to have caught it.
+# Coarse filesystems only tick once a second, so two changes within a tick
+# leave the same mtime behind.
+MTIME_SETTLE_NS = 1_000_000_000
 
 
 def copy_dir(src: str, dest: str):
@@ -7,34 +30,237 @@ def copy_dir(src: str, dest: str):
         msg = f"Path does not exist: {src}"
         raise Exception(msg)
 
-    files, directories = list_tree(src, src)
-
-    # Copy all files and subdirs, nested files/subdirs
+    # Copy all files and subdirs, nested files/subdirs. Directories come
+    # before their contents.
     os.mkdir(dest)
-    for directory in directories:
-        new_directory = os.path.join(dest, directory)
-        os.mkdir(new_directory)
-
-    for file in files:
-        old_file = os.path.join(src, file)
-        new_file = os.path.join(dest, file)
-        _ = shutil.copy(old_file, new_file)
+    for rel_path, entry in walk_tree(src, dirs=True):
+        new_path = os.path.join(dest, rel_path)
+        if entry.is_dir():
+            os.mkdir(new_path)
+        else:
+            _ = shutil.copy(entry.path, new_path)
 
 
 def list_tree(src: str, prefix: str) -> tuple[list[str], list[str]]:
     files: list[str] = []
     directories: list[str] = []
 
-    for content in sorted(os.listdir(src)):
-        full_path = os.path.join(src, content)
-        rel_path = os.path.relpath(full_path, prefix)
+    for rel_path, entry in walk_tree(src, dirs=True):
+        if prefix != src:
+            rel_path = os.path.relpath(entry.path, prefix)
 
-        if os.path.isfile(full_path):
-            files.append(rel_path)
-        else:
+        if entry.is_dir():
             directories.append(rel_path)
-            child_files, child_directories = list_tree(full_path, prefix)
-            files.extend(child_files)
-            files.extend(child_directories)
+        else:
+            files.append(rel_path)
 
     return files, directories
+
+
+def walk_tree(
+    root: str,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    dirs: bool = False,
+    follow_symlinks: bool = True,
+) -> Iterator[tuple[str, os.DirEntry[str]]]:
+    # Yields (path relative to root, entry) depth first, each directory's
+    # entries sorted by name. Globs match the relative path; include only
+    # filters files, while an excluded directory is not descended into.
+    # Entries keep the type and stat information scandir already fetched.
+    include_re = _globs_re(include)
+    exclude_re = _globs_re(exclude)
+
+    stack = [("", _scandir_sorted(root))]
+    while len(stack) != 0:
+        prefix, entries = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+
+        rel_path = prefix + entry.name
+        if exclude_re is not None and exclude_re.match(rel_path):
+            continue
+
+        if entry.is_dir(follow_symlinks=follow_symlinks):
+            if dirs:
+                yield rel_path, entry
+            stack.append((rel_path + os.sep, _scandir_sorted(entry.path)))
+        elif include_re is None or include_re.match(rel_path):
+            yield rel_path, entry
+
+
+def _scandir_sorted(path: str) -> Iterator[os.DirEntry[str]]:
+    with os.scandir(path) as entries:
+        return iter(sorted(entries, key=lambda entry: entry.name))
+
+
+class TreeIndex:
+    # The files under root, for polling the same tree over and over. A
+    # directory is only listed again once its mtime changes, which happens
+    # whenever an entry is added to, removed from or renamed in it. Files
+    # are still stat'ed on every walk, since writing to a file in place
+    # leaves its directory alone.
+    def __init__(self, root: str, include: Sequence[str] = ()) -> None:
+        self.root: str = root
+        self.include_re: re.Pattern[str] | None = _globs_re(include)
+        # Relative directory path -> its mtime and (name, is directory) for
+        # each of its entries, sorted by name
+        self.dirs: dict[str, tuple[int, list[tuple[str, bool]]]] = {}
+
+    def walk(self) -> Iterator[tuple[str, str, os.stat_result]]:
+        # Yields (path relative to root, path, stat) in the order walk_tree
+        # yields files
+        settled = time.time_ns() - MTIME_SETTLE_NS
+        dirs = dict[str, tuple[int, list[tuple[str, bool]]]]()
+        # (relative path, path) of each directory on the stack both end in
+        # a separator, so an entry's paths are one concatenation away
+        root = os.path.join(self.root, "")
+        stack = [("", root, self._list("", self.root, settled, dirs))]
+        while len(stack) != 0:
+            rel_prefix, prefix, entries = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                _ = stack.pop()
+                continue
+
+            name, is_dir = entry
+            rel_path = rel_prefix + name
+            path = prefix + name
+            if is_dir:
+                rel_dir = rel_path + os.sep
+                entries = self._list(rel_dir, path, settled, dirs)
+                stack.append((rel_dir, path + os.sep, entries))
+            elif self.include_re is None or self.include_re.match(rel_path):
+                yield rel_path, path, os.stat(path)
+
+        self.dirs = dirs
+
+    def _list(
+        self,
+        rel_path: str,
+        path: str,
+        settled: int,
+        dirs: dict[str, tuple[int, list[tuple[str, bool]]]],
+    ) -> Iterator[tuple[str, bool]]:
+        mtime_ns = os.stat(path).st_mtime_ns
+        listing = self.dirs.get(rel_path)
+        if listing is None or listing[0] != mtime_ns:
+            entries = [(entry.name, entry.is_dir()) for entry in _scandir_sorted(path)]
+            # A directory changed too recently is listed again next time
+            listing = (mtime_ns if mtime_ns < settled else -1, entries)
+
+        dirs[rel_path] = listing
+        return iter(listing[1])
+
+
+def _globs_re(globs: Sequence[str]) -> re.Pattern[str] | None:
+    if len(globs) == 0:
+        return None
+
+    return re.compile("|".join(fnmatch.translate(glob) for glob in globs))
+
+
+def copy_file(src: str, dest: str, mode: LinkMode = "copy"):
+    dir, _ = os.path.split(dest)
+    os.makedirs(dir, exist_ok=True)
+
+    # Never write through an existing destination, it may be a hardlink to
+    # the source from an earlier build
+    if os.path.lexists(dest):
+        os.remove(dest)
+
+    match mode:
+        case "copy":
+            _ = shutil.copy(src, dest)
+        case "hardlink":
+            try:
+                os.link(src, dest)
+            except OSError:
+                # Different filesystem, or one without hardlinks
+                _ = shutil.copy(src, dest)
+        case "reflink":
+            _reflink(src, dest)
+
+
+def _reflink(src: str, dest: str):
+    with open(src, "rb") as src_file, open(dest, "wb") as dest_file:
+        _copy_contents(src_file, dest_file)
+
+    # Whichever way the bytes got there
+    shutil.copymode(src, dest)
+
+
+def _copy_contents(src_file: BinaryIO, dest_file: BinaryIO):
+    if fcntl is not None:
+        try:
+            _ = fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+            return
+        except OSError:
+            pass
+
+    # copy_file_range still copies inside the kernel, and may reflink on its
+    # own where the filesystem supports it
+    try:
+        remaining = os.fstat(src_file.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(
+                src_file.fileno(), dest_file.fileno(), remaining
+            )
+            if copied == 0:
+                break
+            remaining -= copied
+        return
+    except (AttributeError, OSError):
+        _ = src_file.seek(0)
+        _ = dest_file.seek(0)
+        _ = dest_file.truncate()
+
+    shutil.copyfileobj(src_file, dest_file)
+
+
+def prune_tree(root: str, keep: set[str]) -> list[str]:
+    # Removes every file under root whose relative path is not in keep,
+    # then every directory left empty
+    removed = list[str]()
+    directories = list[str]()
+    for rel_path, entry in walk_tree(root, dirs=True, follow_symlinks=False):
+        if entry.is_dir(follow_symlinks=False):
+            directories.append(entry.path)
+        elif rel_path not in keep:
+            os.remove(entry.path)
+            removed.append(rel_path)
+
+    # Deepest first, so a parent is only checked once its children are gone
+    for directory in reversed(directories):
+        if len(os.listdir(directory)) == 0:
+            os.rmdir(directory)
+
+    return removed
+
+
+def remove_file(path: str, root: str):
+    if os.path.lexists(path):
+        os.remove(path)
+
+    # Clean up directories left empty, but never the root itself
+    dir, _ = os.path.split(path)
+    root = os.path.normpath(root)
+    while os.path.normpath(dir) != root and os.path.isdir(dir):
+        if len(os.listdir(dir)) != 0:
+            break
+
+        os.rmdir(dir)
+        dir, _ = os.path.split(dir)
+
+
+def write_text(path: str, text: str):
+    # Through a temporary file, so a failed write never leaves half a file
+    dir, _ = os.path.split(path)
+    os.makedirs(dir, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        _ = f.write(text)
+    os.replace(tmp_path, path)
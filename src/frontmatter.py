@@ -0,0 +1,125 @@
+import itertools
+import re
+from collections.abc import Iterable, Iterator
+
+
+type MetadataValue = str | list[str]
+type Metadata = dict[str, MetadataValue]
+
+# "---" opens YAML-style front matter, "+++" TOML-style. Only the flat
+# subset pages need is understood: strings, and lists of strings.
+YAML_FENCE = "---"
+TOML_FENCE = "+++"
+
+# Front matter values are strings, so flags are spelled out. YAML writes
+# them in any case, and as yes/on too.
+TRUE_VALUES = frozenset(("true", "yes", "on"))
+
+yaml_line_re = re.compile(r"([\w-]+):(?:\s+(.*))?")
+yaml_item_re = re.compile(r"\s*-\s+(.*)")
+toml_line_re = re.compile(r"([\w-]+)\s*=\s*(.*)")
+
+
+def split_front_matter(lines: Iterable[str]) -> tuple[Metadata, Iterator[str]]:
+    # Reads the front matter off the start of the lines and returns it with
+    # the lines that follow it. Nothing past the closing fence is read.
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, lines
+
+    fence = first.rstrip()
+    if fence not in (YAML_FENCE, TOML_FENCE):
+        return {}, itertools.chain((first,), lines)
+
+    header = list[str]()
+    for line in lines:
+        if line.rstrip() == fence:
+            break
+        header.append(line.rstrip("\r\n"))
+    else:
+        msg = f"Front matter opened with '{fence}' is never closed"
+        raise Exception(msg)
+
+    if fence == YAML_FENCE:
+        return parse_yaml(header), lines
+    return parse_toml(header), lines
+
+
+def read_metadata(path: str) -> Metadata:
+    # Only the front matter is read, not the body below it
+    with open(path, "r") as f:
+        metadata, _ = split_front_matter(f)
+
+    return metadata
+
+
+def is_true(value: MetadataValue | None) -> bool:
+    return isinstance(value, str) and value.lower() in TRUE_VALUES
+
+
+def parse_yaml(lines: list[str]) -> Metadata:
+    metadata: Metadata = {}
+    # The list that "- item" lines go into, after a key with no value
+    items: list[str] | None = None
+
+    for number, line in enumerate(lines, 2):
+        if _is_blank(line):
+            continue
+
+        item = yaml_item_re.fullmatch(line)
+        if item is not None and items is not None:
+            items.append(_unquote(item.group(1).strip()))
+            continue
+
+        match = yaml_line_re.fullmatch(line)
+        if match is None:
+            msg = f"Invalid front matter on line {number}: '{line}'"
+            raise Exception(msg)
+
+        key, value = match.group(1), (match.group(2) or "").strip()
+        if value == "":
+            items = list[str]()
+            metadata[key] = items
+        else:
+            metadata[key] = _value(value)
+            items = None
+
+    return metadata
+
+
+def parse_toml(lines: list[str]) -> Metadata:
+    metadata: Metadata = {}
+
+    for number, line in enumerate(lines, 2):
+        if _is_blank(line):
+            continue
+
+        match = toml_line_re.fullmatch(line.strip())
+        if match is None:
+            msg = f"Invalid front matter on line {number}: '{line}'"
+            raise Exception(msg)
+
+        metadata[match.group(1)] = _value(match.group(2).strip())
+
+    return metadata
+
+
+def _is_blank(line: str) -> bool:
+    stripped = line.strip()
+    return stripped == "" or stripped.startswith("#")
+
+
+def _value(value: str) -> MetadataValue:
+    if value.startswith("[") and value.endswith("]"):
+        items = value[1:-1].split(",")
+        return [_unquote(item.strip()) for item in items if item.strip() != ""]
+
+    return _unquote(value)
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+
+    return value
@@ -1,7 +1,35 @@
-from typing import Literal, override
+import sys
+from collections.abc import Iterable, Iterator, Mapping
+from types import MappingProxyType
+from typing import Literal, TextIO, cast, override
+
+
+# How much serialized HTML write_html collects before each write call
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# Minified output leaves out every end tag HTML lets it leave out: void
+# elements have none, an li ends where the next li or its list does, and a
+# p ends where a block starts or its parent ends.
+VOID_TAGS = frozenset(
+    ("area", "base", "br", "col", "embed", "hr", "img", "input", "keygen")
+    + ("link", "meta", "param", "source", "track", "wbr", "command")
+)
+OPTIONAL_END_TAGS = frozenset(("li", "p"))
+P_CLOSING_TAGS = frozenset(
+    ("address", "article", "aside", "blockquote", "details", "div", "dl")
+    + ("fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3")
+    + ("h4", "h5", "h6", "header", "hgroup", "hr", "menu", "nav", "ol", "p")
+    + ("pre", "section", "table", "ul")
+)
+P_KEEPING_PARENTS = frozenset(
+    ("a", "audio", "del", "ins", "map", "noscript", "video")
+)
 
 
 class HTMLNode:
+    # Pages can hold hundreds of thousands of nodes, so no per-node __dict__
+    __slots__ = ("_tag", "value", "children", "_props", "_start_tag")
+
     def __init__(
         self,
         tag: "TagType | None" = None,
@@ -9,19 +37,81 @@ class HTMLNode:
         children: "list[HTMLNode] | None" = None,
         props: dict[str, str] | None = None,
     ) -> None:
-        self.tag: "TagType | None" = tag
+        # Computed tags such as f"h{level}" share one string per tag name
+        self._tag: "TagType | None" = (
+            cast("TagType", sys.intern(tag)) if tag is not None else None
+        )
         self.value: str | None = value
         self.children: "list[HTMLNode] | None" = children
-        self.props: dict[str, str] | None = props
+        self._props: dict[str, str] | None = props
+        # Serialized on first use, dropped whenever tag or props are replaced
+        self._start_tag: str | None = None
+
+    @property
+    def tag(self) -> "TagType | None":
+        return self._tag
+
+    @tag.setter
+    def tag(self, tag: "TagType | None"):
+        self._tag = cast("TagType", sys.intern(tag)) if tag is not None else None
+        self._start_tag = None
+
+    @property
+    def props(self) -> Mapping[str, str] | None:
+        # Read-only, so the cached start tag can not go stale behind our
+        # back. Use set_prop or assign new props.
+        if self._props is None:
+            return None
+
+        return MappingProxyType(self._props)
+
+    @props.setter
+    def props(self, props: dict[str, str] | None):
+        self._props = props
+        self._start_tag = None
+
+    def set_prop(self, name: str, value: str):
+        if self._props is None:
+            self._props = {}
+
+        self._props[name] = value
+        self._start_tag = None
+
+    def start_tag(self) -> str:
+        start_tag = self._start_tag
+        if start_tag is None:
+            if self._props is None:
+                start_tag = _bare_start_tags.get(self._tag)
+                if start_tag is None:
+                    start_tag = _bare_start_tags[self._tag] = f"<{self._tag}>"
+            else:
+                start_tag = f"<{self._tag}{self.props_to_html()}>"
+
+            self._start_tag = start_tag
 
-    def to_html(self) -> str:
+        return start_tag
+
+    def end_tag(self) -> str:
+        end_tag = _end_tags.get(self._tag)
+        if end_tag is None:
+            end_tag = _end_tags[self._tag] = f"</{self._tag}>"
+
+        return end_tag
+
+    def to_html(self, minify: bool = False) -> str:
         raise NotImplementedError
 
+    def iter_html(self, minify: bool = False) -> Iterator[str]:
+        raise NotImplementedError
+
+    def write_html(self, stream: TextIO, minify: bool = False):
+        write_chunks(stream, self.iter_html(minify))
+
     def props_to_html(self) -> str:
-        if self.props is None:
+        if self._props is None:
             return ""
 
-        sorted_props = sorted(self.props.items())
+        sorted_props = sorted(self._props.items())
 
         return "".join(f' {k}="{v}"' for k, v in sorted_props)
 
@@ -34,14 +124,16 @@ class HTMLNode:
             fields["value"] = f"'{self.value}'"
         if self.children is not None:
             fields["children"] = str(self.children)
-        if self.props is not None:
-            fields["props"] = str(self.props)
+        if self._props is not None:
+            fields["props"] = str(self._props)
 
         fields_str = (f"{k}={v}" for k, v in fields.items())
         return f"{self.__class__.__name__}({', '.join(fields_str)})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: "TagType | None",
@@ -51,21 +143,27 @@ class LeafNode(HTMLNode):
         super().__init__(tag, value, None, props)
 
     @override
-    def to_html(self) -> str:
+    def to_html(self, minify: bool = False) -> str:
         if self.value is None:
             msg = f"Leaf node '{self}' has no value"
             raise ValueError(msg)
 
-        start_tag = ""
-        end_tag = ""
-        if self.tag is not None:
-            start_tag = f"<{self.tag}{self.props_to_html()}>"
-            end_tag = f"</{self.tag}>"
+        if self._tag is None:
+            return self.value
+
+        if minify and self._tag in VOID_TAGS:
+            return self.start_tag()
 
-        return f"{start_tag}{self.value}{end_tag}"
+        return f"{self.start_tag()}{self.value}{self.end_tag()}"
+
+    @override
+    def iter_html(self, minify: bool = False) -> Iterator[str]:
+        yield self.to_html(minify)
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: "TagType",
@@ -75,7 +173,7 @@ class ParentNode(HTMLNode):
         super().__init__(tag, None, children, props)
 
     @override
-    def to_html(self) -> str:
+    def to_html(self, minify: bool = False) -> str:
         if self.tag is None:
             msg = f"Parent node '{self}' has no tag"
             raise ValueError(msg)
@@ -84,10 +182,113 @@ class ParentNode(HTMLNode):
             msg = f"Parent node '{self}' has no children"
             raise ValueError(msg)
 
+        if minify:
+            children = _minified_children_html(self.children, self._tag)
+        else:
+            children = "".join(child.to_html() for child in self.children)
+
+        return f"{self.start_tag()}{children}{self.end_tag()}"
+
+    @override
+    def iter_html(self, minify: bool = False) -> Iterator[str]:
+        if self.tag is None:
+            msg = f"Parent node '{self}' has no tag"
+            raise ValueError(msg)
+
+        if self.children is None:
+            msg = f"Parent node '{self}' has no children"
+            raise ValueError(msg)
+
+        yield self.start_tag()
+        yield from iter_children_html(self.children, self._tag, minify)
+        yield self.end_tag()
+
+
+# Tags without attributes serialize the same for every node
+_bare_start_tags = dict[str | None, str]()
+_end_tags = dict[str | None, str]()
+
+
+def iter_children_html(
+    children: Iterable[HTMLNode], parent_tag: "TagType | None", minify: bool = False
+) -> Iterator[str]:
+    # The children of a parent_tag element, without its own tags. Children
+    # may be produced lazily, only one is looked ahead at.
+    if not minify:
+        for child in children:
+            yield from child.iter_html()
+        return
+
+    children = iter(children)
+    child = next(children, None)
+    while child is not None:
+        next_child = next(children, None)
+        if _omits_end_tag(child, next_child, parent_tag):
+            yield from _without_end_tag(child.iter_html(minify), child.end_tag())
+        else:
+            yield from child.iter_html(minify)
+        child = next_child
+
+
+def _minified_children_html(
+    children: list[HTMLNode], parent_tag: "TagType | None"
+) -> str:
+    # Same as iter_children_html(..., minify=True), without the generators
+    parts = list[str]()
+    last = len(children) - 1
+    for i, child in enumerate(children):
+        html = child.to_html(True)
+        if child._tag in OPTIONAL_END_TAGS and _omits_end_tag(
+            child, children[i + 1] if i < last else None, parent_tag
+        ):
+            html = html.removesuffix(child.end_tag())
+        parts.append(html)
+
+    return "".join(parts)
+
+
+def _omits_end_tag(
+    node: HTMLNode, next_node: HTMLNode | None, parent_tag: "TagType | None"
+) -> bool:
+    # Only ever true for tags whose end HTML infers from what follows
+    match node.tag:
+        case "li":
+            return next_node is None or next_node.tag == "li"
+        case "p":
+            if next_node is None:
+                return parent_tag not in P_KEEPING_PARENTS
+            return next_node.tag in P_CLOSING_TAGS
+        case _:
+            return False
+
+
+def _without_end_tag(chunks: Iterator[str], end_tag: str) -> Iterator[str]:
+    # The end tag is always the tail of the last chunk
+    last: str | None = None
+    for chunk in chunks:
+        if last is not None:
+            yield last
+        last = chunk
+
+    if last is not None:
+        yield last.removesuffix(end_tag)
+
 
-        children = "".join(child.to_html() for child in self.children)
+def write_chunks(stream: TextIO, chunks: Iterable[str]):
+    # Only the current path from the root plus one buffer of chunks is held
+    # in memory, however large the document is
+    buffer = list[str]()
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= WRITE_BUFFER_SIZE:
+            _ = stream.write("".join(buffer))
+            buffer.clear()
+            buffered = 0
 
-        return f"<{self.tag}{self.props_to_html()}>{children}</{self.tag}>"
+    if len(buffer) != 0:
+        _ = stream.write("".join(buffer))
 
 
 type TagType = Literal[
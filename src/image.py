@@ -0,0 +1,270 @@
+import os
+import re
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO
+
+from file import LinkMode, copy_file
+from manifest import FileState, ImageState
+
+try:
+    from PIL import Image
+except ImportError:
+    # Optional, without it images are served at their own size only
+    Image = None
+
+
+IMAGE_SUFFIXES = (".png", ".gif", ".jpg", ".jpeg", ".webp")
+# Widths the downscaled copies are made at, for images wider than that.
+# GIFs are left alone, resizing would drop every frame but the first.
+VARIANT_WIDTHS = (480, 960, 1920)
+VARIANT_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp")
+
+img_tag_re = re.compile(r"<img\s[^>]*>")
+img_src_re = re.compile(r'\ssrc="([^"]*)"')
+img_width_re = re.compile(r"\swidth=")
+
+
+def image_size(f: BinaryIO) -> tuple[int, int] | None:
+    # (width, height) from the header, None if the format is not known. Only
+    # the header is read, never the pixels.
+    head = f.read(30)
+    if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", head[6:10])
+
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return _webp_size(head)
+
+    if head[:2] == b"\xff\xd8":
+        _ = f.seek(2)
+        return _jpeg_size(f)
+
+    return None
+
+
+def _webp_size(head: bytes) -> tuple[int, int] | None:
+    match head[12:16]:
+        case b"VP8 ":
+            # Lossy: 14 bit sizes after the key frame start code
+            width, height = struct.unpack("<HH", head[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        case b"VP8L":
+            # Lossless: 14 bit sizes minus one, packed after the signature
+            bits = int.from_bytes(head[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        case b"VP8X":
+            # Extended: 24 bit sizes minus one
+            width = int.from_bytes(head[24:27], "little") + 1
+            height = int.from_bytes(head[27:30], "little") + 1
+            return width, height
+        case _:
+            return None
+
+
+def _jpeg_size(f: BinaryIO) -> tuple[int, int] | None:
+    # Skips from segment to segment until the start of frame, which holds
+    # the size. Most files have it within the first few kilobytes.
+    while True:
+        marker = f.read(2)
+        if len(marker) != 2 or marker[0] != 0xFF:
+            return None
+
+        code = marker[1]
+        if code == 0xFF:
+            # Fill byte before the real marker
+            _ = f.seek(-1, os.SEEK_CUR)
+            continue
+        if code == 0xD9 or code == 0xDA:
+            # End of image, or the pixels start
+            return None
+        if 0xD0 <= code <= 0xD7 or code == 0x01:
+            # Markers without a length
+            continue
+
+        length_bytes = f.read(2)
+        if len(length_bytes) != 2:
+            return None
+        (length,) = struct.unpack(">H", length_bytes)
+
+        # Every SOFn but DHT, JPG and DAC
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            frame = f.read(5)
+            if len(frame) != 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+
+        _ = f.seek(length - 2, os.SEEK_CUR)
+
+
+def index_images(
+    static_path: str,
+    static: dict[str, FileState],
+    previous: dict[str, ImageState] | None = None,
+) -> dict[str, ImageState]:
+    # The size of every image among the static files. Only images whose hash
+    # changed since previous are read again, and only their headers.
+    if previous is None:
+        previous = {}
+
+    images = dict[str, ImageState]()
+    for file, state in static.items():
+        if not file.lower().endswith(IMAGE_SUFFIXES):
+            continue
+
+        old = previous.get(file)
+        if old is not None and old.hash == state.hash:
+            images[file] = ImageState(old.hash, old.width, old.height)
+            continue
+
+        with open(os.path.join(static_path, file), "rb") as f:
+            size = image_size(f)
+        if size is not None:
+            images[file] = ImageState(state.hash, *size)
+
+    return images
+
+
+def variant_path(file: str, hash: str, width: int) -> str:
+    # images/tom.png -> images/tom.66709e99.480w.png, so a variant never
+    # needs revalidating
+    stem, ext = os.path.splitext(file)
+    return f"{stem}.{hash[:8]}.{width}w{ext}"
+
+
+def variant_widths(file: str, image: ImageState) -> list[int]:
+    if not file.lower().endswith(VARIANT_SUFFIXES):
+        return []
+
+    return [width for width in VARIANT_WIDTHS if width < image.width]
+
+
+def generate_variants(
+    static_path: str,
+    dest_path: str,
+    cache_path: str,
+    images: dict[str, ImageState],
+    jobs: int = 1,
+    link: LinkMode = "copy",
+) -> list[str]:
+    # Writes the downscaled copies of every image into the output, and
+    # records their widths in images. Copies are made once per image hash
+    # and kept in cache_path, so they are only ever resized again when
+    # the image changes. Returns the copies, relative to the output.
+    if Image is None:
+        print("Pillow is not installed, skipping image variants")
+        return []
+
+    # (source, cached copy, width) for the copies not made yet
+    missing = list[tuple[str, str, int]]()
+    for file, image in images.items():
+        for width in variant_widths(file, image):
+            cached = _cached_variant_path(cache_path, file, image, width)
+            if not os.path.exists(cached):
+                missing.append((os.path.join(static_path, file), cached, width))
+
+    if len(missing) != 0:
+        os.makedirs(cache_path, exist_ok=True)
+        for src, _, width in missing:
+            print(f"Resizing '{src}' to {width}px")
+
+        # Resizing is CPU bound, so every image gets a process
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for _ in executor.map(_resize, *zip(*missing)):
+                pass
+
+    variants = list[str]()
+    for file, image in images.items():
+        image.variants = variant_widths(file, image)
+        for width in image.variants:
+            cached = _cached_variant_path(cache_path, file, image, width)
+            variant = variant_path(file, image.hash, width)
+            dest_file_path = os.path.join(dest_path, variant)
+            if not os.path.exists(dest_file_path):
+                copy_file(cached, dest_file_path, link)
+            variants.append(variant)
+
+    return variants
+
+
+def _cached_variant_path(
+    cache_path: str, file: str, image: ImageState, width: int
+) -> str:
+    _, ext = os.path.splitext(file)
+    return os.path.join(cache_path, f"{image.hash}.{width}w{ext.lower()}")
+
+
+def _resize(src: str, dest: str, width: int):
+    # Only ever run when Pillow is installed
+    with Image.open(src) as image:  # pyright: ignore[reportOptionalMemberAccess]
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+
+        tmp_path = f"{dest}.tmp"
+        resized.save(tmp_path, format=image.format)
+        os.replace(tmp_path, dest)
+
+
+def image_props(
+    images: dict[str, ImageState],
+    base_path: str,
+    urls: dict[str, str] | None = None,
+) -> dict[str, dict[str, str]]:
+    # Image URL, after rebasing -> the props every img showing it gets. src
+    # is switched to the fingerprinted URL in urls separately, srcset has to
+    # name it up front.
+    if urls is None:
+        urls = {}
+
+    props = dict[str, dict[str, str]]()
+    for file, image in images.items():
+        url = base_path + file.replace(os.sep, "/")
+        attributes = {
+            "width": str(image.width),
+            "height": str(image.height),
+            "decoding": "async",
+        }
+        if len(image.variants) != 0:
+            srcset = ", ".join(
+                base_path
+                + variant_path(file, image.hash, width).replace(os.sep, "/")
+                + f" {width}w"
+                for width in image.variants
+            )
+            attributes["srcset"] = f"{srcset}, {urls.get(url, url)} {image.width}w"
+            attributes["sizes"] = (
+                f"(max-width: {image.width}px) 100vw, {image.width}px"
+            )
+        props[url] = attributes
+
+    return props
+
+
+def add_image_attributes(html: str, images: dict[str, dict[str, str]]) -> str:
+    # For the template, whose img tags are written by hand: fills in the
+    # size of every known image, so the page does not shift as images load.
+    # Images in pages get the same props on their nodes instead.
+    if len(images) == 0 or "<img" not in html:
+        return html
+
+    def replace(match: re.Match[str]) -> str:
+        tag = match.group(0)
+        src = img_src_re.search(tag)
+        if src is None:
+            return tag
+        if img_width_re.search(tag) is not None:
+            # Sized by hand
+            return tag
+
+        props = images.get(src.group(1))
+        if props is None:
+            return tag
+
+        extra = "".join(f' {name}="{value}"' for name, value in props.items())
+        end = len(tag) - 2 if tag.endswith("/>") else len(tag) - 1
+        return tag[:end].rstrip() + extra + tag[end:]
+
+    return img_tag_re.sub(replace, html)
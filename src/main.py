@@ -1,28 +1,223 @@
+import argparse
 import os
-import shutil
 import sys
 
-from file import copy_dir
-from page import generate_pages_recursive
+from build import build
+from cache import DEFAULT_CACHE_SIZE
+from collection import CollectionConfig
+from profiler import Profiler
+from serve import serve
+from watch import Watcher
 
 
 SRC_PATH = "static/"
 CONTENT_PATH = "content/"
 TEMPLATE_PATH = "template.html"
 DEST_PATH = "docs/"
+# Kept beside DEST_PATH, not inside it, so it is never deployed
+MANIFEST_PATH = ".ssg-manifest.json"
+PROFILE_TRACE_PATH = "profile.json"
+# Rendered page bodies, reused when only the template or nothing changed
+CACHE_PATH = ".ssg-cache.sqlite"
+# Downscaled copies of the images, made once per image
+VARIANTS_PATH = ".ssg-images"
+# Directories under CONTENT_PATH that get an index, archive and tag pages
+COLLECTIONS = [CollectionConfig("blog", "Blog")]
+
+COMMANDS = ("build", "watch", "serve")
 
 def main():
-    basepath = "/"
-    if len(sys.argv) != 1:
-        basepath = sys.argv[1]
+    # "build" is the default, so `main.py /base/` keeps working
+    argv = sys.argv[1:]
+    command = "build"
+    if len(argv) != 0 and argv[0] in COMMANDS:
+        command = argv.pop(0)
+
+    args = parse_args(command, argv)
+
+    match command:
+        case "build":
+            run_build(args)
+        case "watch":
+            watcher = Watcher(
+                SRC_PATH,
+                CONTENT_PATH,
+                TEMPLATE_PATH,
+                DEST_PATH,
+                MANIFEST_PATH,
+                args.basepath,
+                args.link,
+                cache_path(args),
+                args.cache_size * 1024 * 1024,
+                COLLECTIONS,
+            )
+            watcher.run(args.interval)
+        case "serve":
+            serve(
+                SRC_PATH,
+                CONTENT_PATH,
+                TEMPLATE_PATH,
+                args.basepath,
+                args.host,
+                args.port,
+                args.interval,
+                COLLECTIONS,
+            )
+
+
+def parse_args(command: str, argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog=f"main.py {command}",
+        description={
+            "build": "Build the site into docs/",
+            "watch": "Build the site into docs/, then rebuild what changed "
+            "on every save",
+            "serve": "Serve the site straight from its sources, reloading "
+            "open pages on every save",
+        }[command],
+    )
+    _ = parser.add_argument("basepath", nargs="?", default="/")
+
+    if command in ("watch", "serve"):
+        _ = parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.1,
+            metavar="SECONDS",
+            help="how often to check sources for changes (default: 0.1)",
+        )
+
+    if command == "serve":
+        _ = parser.add_argument(
+            "--host",
+            default="127.0.0.1",
+            help="address to listen on (default: 127.0.0.1)",
+        )
+        _ = parser.add_argument(
+            "--port",
+            type=int,
+            default=8888,
+            help="port to listen on (default: 8888)",
+        )
+        return parser.parse_args(argv)
+
+    _ = parser.add_argument(
+        "--link",
+        choices=["copy", "hardlink", "reflink"],
+        default="copy",
+        help="how static files are placed in the output (default: copy)",
+    )
+    _ = parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"parse every page instead of reusing bodies from {CACHE_PATH}",
+    )
+    _ = parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE // (1024 * 1024),
+        metavar="MB",
+        help="evict the least recently used bodies beyond this size "
+        f"(default: {DEFAULT_CACHE_SIZE // (1024 * 1024)})",
+    )
+
+    if command == "watch":
+        return parser.parse_args(argv)
+
+    _ = parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="render pages in N worker processes (0 = one per CPU)",
+    )
+    _ = parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time every build stage of every page and report the slowest",
+    )
+    _ = parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="how many of the slowest pages to report (default: 10)",
+    )
+    _ = parser.add_argument(
+        "--profile-trace",
+        default=PROFILE_TRACE_PATH,
+        metavar="PATH",
+        help=f"where to write the JSON trace (default: {PROFILE_TRACE_PATH})",
+    )
+    _ = parser.add_argument(
+        "--check",
+        choices=["mtime", "hash"],
+        default="mtime",
+        help="rehash only files whose size or mtime changed, or every file "
+        "(default: mtime)",
+    )
+    _ = parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="also copy every static file to a name with its hash in it, "
+        "and link pages to those copies",
+    )
+    _ = parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write a .gz sibling, and .br if brotli is installed, next to "
+        "every text output",
+    )
+    _ = parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="leave out the whitespace, comments and end tags pages do not "
+        "need, everywhere but inside <pre>",
+    )
+    _ = parser.add_argument(
+        "--image-variants",
+        action="store_true",
+        help="make downscaled copies of every image for srcset, needs Pillow "
+        f"(kept in {VARIANTS_PATH})",
+    )
+    return parser.parse_args(argv)
+
+
+def cache_path(args: argparse.Namespace) -> str | None:
+    return None if args.no_cache else CACHE_PATH
+
+
+def run_build(args: argparse.Namespace):
+    jobs: int = args.jobs
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
 
-    # Delete all contents of dest
-    if os.path.exists(DEST_PATH):
-        shutil.rmtree(DEST_PATH)
+    profiler = Profiler() if args.profile else None
 
-    copy_dir(SRC_PATH, DEST_PATH)
+    build(
+        SRC_PATH,
+        CONTENT_PATH,
+        TEMPLATE_PATH,
+        DEST_PATH,
+        MANIFEST_PATH,
+        args.basepath,
+        jobs,
+        profiler,
+        args.link,
+        args.check,
+        cache_path(args),
+        args.cache_size * 1024 * 1024,
+        COLLECTIONS,
+        args.fingerprint,
+        args.compress,
+        args.minify,
+        VARIANTS_PATH if args.image_variants else None,
+    )
 
-    generate_pages_recursive(CONTENT_PATH, TEMPLATE_PATH, DEST_PATH, basepath)
+    if profiler is not None:
+        print(profiler.report(args.profile_top))
+        profiler.write_trace(args.profile_trace)
+        print(f"Wrote profile trace to '{args.profile_trace}'")
     
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Literal
+
+from file import MTIME_SETTLE_NS, TreeIndex, walk_tree
+
+
+MANIFEST_VERSION = 7
+
+# "mtime" trusts a file whose size and mtime are unchanged since the last
+# build, "hash" always reads and hashes every file
+type CheckMode = Literal["mtime", "hash"]
+
+
+@dataclass(slots=True)
+class FileState:
+    hash: str
+    size: int
+    # -1 when the file had changed too recently to trust its mtime, so it is
+    # hashed again next time
+    mtime_ns: int
+
+
+@dataclass(slots=True)
+class ImageState:
+    # Hash of the image the size was read from
+    hash: str
+    width: int
+    height: int
+    # Widths of its downscaled copies, empty unless they were made
+    variants: list[int] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Manifest:
+    template: str = ""
+    base_path: str = ""
+    # Relative source path -> what the file looked like when last built
+    static: dict[str, FileState] = field(default_factory=dict)
+    content: dict[str, FileState] = field(default_factory=dict)
+    # Listing page -> key of the posts it showed
+    listings: dict[str, str] = field(default_factory=dict)
+    # Static file -> its fingerprinted copy, empty unless fingerprinting
+    assets: dict[str, str] = field(default_factory=dict)
+    minify: bool = False
+    # Static image -> its size
+    images: dict[str, ImageState] = field(default_factory=dict)
+
+
+def load_manifest(path: str) -> Manifest:
+    if not os.path.exists(path):
+        return Manifest()
+
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        # A broken manifest only costs us a full rebuild
+        return Manifest()
+
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return Manifest()
+
+    return Manifest(
+        template=data["template"],
+        base_path=data["base_path"],
+        static={k: FileState(**v) for k, v in data["static"].items()},
+        content={k: FileState(**v) for k, v in data["content"].items()},
+        listings=data["listings"],
+        assets=data["assets"],
+        minify=data["minify"],
+        images={k: ImageState(**v) for k, v in data["images"].items()},
+    )
+
+
+def save_manifest(manifest: Manifest, path: str):
+    data = {"version": MANIFEST_VERSION, **asdict(manifest)}
+
+    # Write to a temporary file first so an interrupted build never leaves a
+    # half-written manifest behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+
+    os.replace(tmp_path, path)
+
+
+def hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def hash_tree(
+    root: str,
+    suffix: str = "",
+    previous: dict[str, FileState] | None = None,
+    check: CheckMode = "mtime",
+    index: TreeIndex | None = None,
+) -> dict[str, FileState]:
+    # index, when given, lists root instead of walking it, and must have
+    # been made with the same suffix
+    if previous is None:
+        previous = {}
+
+    if index is None:
+        files = (
+            (file, entry.path, entry.stat())
+            for file, entry in walk_tree(root, include=[f"*{suffix}"])
+        )
+    else:
+        files = index.walk()
+
+    settled = time.time_ns() - MTIME_SETTLE_NS
+    states = dict[str, FileState]()
+    for file, path, stat in files:
+        states[file] = _file_state(path, stat, previous.get(file), check, settled)
+
+    return states
+
+
+def file_state(
+    path: str, previous: FileState | None = None, check: CheckMode = "mtime"
+) -> FileState:
+    settled = time.time_ns() - MTIME_SETTLE_NS
+    return _file_state(path, os.stat(path), previous, check, settled)
+
+
+def _file_state(
+    path: str,
+    stat: os.stat_result,
+    previous: FileState | None,
+    check: CheckMode,
+    settled: int,
+) -> FileState:
+    if (
+        check == "mtime"
+        and previous is not None
+        and previous.size == stat.st_size
+        and previous.mtime_ns == stat.st_mtime_ns
+    ):
+        return previous
+
+    # A file changed within a tick of now could change again without its
+    # mtime moving
+    mtime_ns = stat.st_mtime_ns if stat.st_mtime_ns < settled else -1
+    return FileState(hash_file(path), stat.st_size, mtime_ns)
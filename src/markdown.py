@@ -1,74 +1,237 @@
+import functools
 import typing
-from htmlnode import HTMLNode, LeafNode, ParentNode, TagType
-from markdown_blocks import block_to_block_type, markdown_to_blocks
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from asset import AssetMap
+from frontmatter import Metadata, split_front_matter
+from htmlnode import HTMLNode, LeafNode, ParentNode, TagType, iter_children_html
+from markdown_blocks import Block, parse_blocks
 from textnode import TextNode, text_node_to_html_node, text_to_textnodes
 
-def markdown_to_html_node(markdown: str) -> HTMLNode:
-    blocks = markdown_to_blocks(markdown)
 
-    top_children = list[HTMLNode]()
+# Bump whenever the HTML produced for the same markdown changes, so bodies
+# cached by an older parser are not reused
+PARSER_VERSION = 5
+
+# Turns the inline markdown of a paragraph, heading, quote or list item into
+# HTML nodes, given the base path and the asset map
+type InlineRenderer = Callable[[str, str, AssetMap | None], list[HTMLNode]]
+
+# Longer inline text, such as whole paragraphs, rarely repeats and would
+# only push the short fragments out of the memo
+MEMO_MAX_TEXT = 256
+MEMO_SIZE = 4096
+
+
+@dataclass(slots=True)
+class Heading:
+    level: int
+    # Inline markdown, as written
+    text: str
+
+
+@dataclass(slots=True)
+class Document:
+    node: HTMLNode
+    # Text of the first "# " line, None if there is none
+    title: str | None
+    # Every heading in document order, the title included
+    outline: list[Heading] = field(default_factory=list)
+    metadata: Metadata = field(default_factory=dict)
 
-    for block in blocks:
-        block_type = block_to_block_type(block)
-
-        node: HTMLNode
-        match block_type:
-            case "Paragraph":
-                block = block.replace("\n", " ")
-                children = text_to_children(block)
-                node = ParentNode("p", children)
-            case "Heading":
-                words = block.split(" ")
-                header_level = len(words[0])
-                children = text_to_children(" ".join(words[1:]))
-                node = ParentNode(typing.cast(TagType, f"h{header_level}"), children)
-            case "Code":
-                block = block[3:-3]
-                block = block.lstrip("\n")
-
-                node = ParentNode("pre", [LeafNode("code", block)]) 
-            case "Quote":
-                block = " ".join(map(lambda line: line[2:], block.split("\n")))
-                children = text_to_children(block)
-                node = ParentNode("blockquote", children)
-            case "UnorderedList":
-                children = list[HTMLNode]()
-                for line in block.split("\n"):
-                    text_nodes = list(map(text_node_to_html_node, text_to_textnodes(line[2:])))
-                    children.append(ParentNode("li", text_nodes))
-
-                node = ParentNode("ul", children)
-            case "OrderedList":
-                children = list[HTMLNode]()
-                for line in block.split("\n"):
-                    line_without_num = "".join(line.split(". ")[1:])
-                    text_nodes = list(map(text_node_to_html_node, text_to_textnodes(line_without_num)))
-                    children.append(ParentNode("li", text_nodes))
-
-                node = ParentNode("ol", children)
-
-        top_children.append(node)
+
+def markdown_to_html_node(
+    markdown: str, base_path: str = "/", assets: AssetMap | None = None
+) -> HTMLNode:
+    _, lines = split_front_matter(markdown.split("\n"))
+    blocks = parse_blocks(lines)
+
+    top_children = list(blocks_to_html_nodes(blocks, base_path, assets=assets))
 
     parent = ParentNode("div", top_children)
     return parent
 
 
-def text_to_children(text: str) -> list[HTMLNode]:
+def markdown_to_html_chunks(
+    lines: Iterable[str],
+    base_path: str = "/",
+    inline: "InlineRenderer | None" = None,
+    minify: bool = False,
+    assets: AssetMap | None = None,
+) -> Iterator[str]:
+    # Same HTML as markdown_to_html_node(...).to_html(minify), but produced
+    # one block at a time so only the current block is ever held in memory
+    if inline is None:
+        inline = minified_inline_memo if minify else inline_memo
+    _, lines = split_front_matter(lines)
+
+    yield "<div>"
+    nodes = blocks_to_html_nodes(parse_blocks(lines), base_path, inline, assets)
+    yield from iter_children_html(nodes, "div", minify)
+    yield "</div>"
+
+
+def markdown_to_document(
+    lines: Iterable[str],
+    base_path: str = "/",
+    inline: "InlineRenderer | None" = None,
+    assets: AssetMap | None = None,
+) -> Document:
+    # A single pass over the source: the front matter is read off the top,
+    # the title is picked up from the lines on their way into the block
+    # parser and the outline from the heading blocks as they become nodes
+    metadata, lines = split_front_matter(lines)
+    title: str | None = None
+
+    def watch_title(lines: Iterable[str]) -> Iterator[str]:
+        nonlocal title
+        for line in lines:
+            if title is None and line.startswith("# "):
+                title = _title(line)
+            yield line
+
+    children = list[HTMLNode]()
+    outline = list[Heading]()
+    for block in parse_blocks(watch_title(lines)):
+        if block.type == "Heading":
+            outline.append(Heading(*heading_level_text(block)))
+        children.append(block_to_html_node(block, base_path, inline, assets))
+
+    return Document(ParentNode("div", children), title, outline, metadata)
+
+
+def blocks_to_html_nodes(
+    blocks: Iterable[Block],
+    base_path: str = "/",
+    inline: "InlineRenderer | None" = None,
+    assets: AssetMap | None = None,
+) -> Iterator[HTMLNode]:
+    for block in blocks:
+        yield block_to_html_node(block, base_path, inline, assets)
+
+
+def block_to_html_node(
+    block: Block,
+    base_path: str = "/",
+    inline: "InlineRenderer | None" = None,
+    assets: AssetMap | None = None,
+) -> HTMLNode:
+    if inline is None:
+        inline = text_to_children
+
+    lines = block.lines
+
+    node: HTMLNode
+    match block.type:
+        case "Paragraph":
+            children = inline(" ".join(lines), base_path, assets)
+            node = ParentNode("p", children)
+        case "Heading":
+            header_level, text = heading_level_text(block)
+            children = inline(text, base_path, assets)
+            node = ParentNode(typing.cast(TagType, f"h{header_level}"), children)
+        case "Code":
+            code = "\n".join(lines)[3:-3]
+            code = code.lstrip("\n")
+
+            node = ParentNode("pre", [LeafNode("code", code)]) 
+        case "Quote":
+            children = inline(" ".join(block.items), base_path, assets)
+            node = ParentNode("blockquote", children)
+        case "UnorderedList":
+            children = list[HTMLNode]()
+            for item in block.items:
+                li_children = inline(item, base_path, assets)
+                children.append(ParentNode("li", li_children))
+
+            node = ParentNode("ul", children)
+        case "OrderedList":
+            children = list[HTMLNode]()
+            for item in block.items:
+                li_children = inline(item, base_path, assets)
+                children.append(ParentNode("li", li_children))
+
+            node = ParentNode("ol", children)
+
+    return node
+
+
+def heading_level_text(block: Block) -> tuple[int, str]:
+    level = block.lines[0].index(" ")
+    return level, "\n".join(block.lines)[level + 1 :]
+
+
+def text_to_children(
+    text: str, base_path: str = "/", assets: AssetMap | None = None
+) -> list[HTMLNode]:
     text_nodes = text_to_textnodes(text)
 
     html_nodes = list[HTMLNode]()
     for text_node in text_nodes:
-        html_nodes.append(text_node_to_html_node(text_node))
+        html_nodes.append(text_node_to_html_node(text_node, base_path, assets))
 
     return html_nodes
 
 
+class InlineMemo:
+    # Bounded LRU of inline markdown -> HTML for the fragments that repeat
+    # across pages, like list items, link lines and boilerplate quotes. A
+    # hit is a fresh raw HTML leaf, so no node is ever shared between trees.
+    # The HTML is serialized the way the page it goes into will be.
+    def __init__(self, size: int = MEMO_SIZE, minify: bool = False) -> None:
+        self.minify: bool = minify
+        self._html = functools.lru_cache(maxsize=size)(_inline_html)
+
+    def __call__(
+        self, text: str, base_path: str, assets: AssetMap | None = None
+    ) -> list[HTMLNode]:
+        if len(text) > MEMO_MAX_TEXT:
+            return text_to_children(text, base_path, assets)
+
+        return [LeafNode(None, self._html(text, base_path, assets, self.minify))]
+
+    def stats(self) -> tuple[int, int]:
+        # (hits, misses) since the memo was created
+        info = self._html.cache_info()
+        return info.hits, info.misses
+
+
+def _inline_html(
+    text: str, base_path: str, assets: AssetMap | None, minify: bool
+) -> str:
+    return "".join(
+        node.to_html(minify) for node in text_to_children(text, base_path, assets)
+    )
+
+
+# Shared by every page rendered in this process
+inline_memo = InlineMemo()
+minified_inline_memo = InlineMemo(minify=True)
+
+
 def extract_title(markdown: str) -> str:
-    lines = markdown.split("\n")
+    _, lines = split_front_matter(markdown.split("\n"))
+    return extract_title_from_lines(lines)
 
+
+def extract_title_from_lines(lines: Iterable[str]) -> str:
+    # The lines must not start with front matter
     for line in lines:
         if line.startswith("# "):
-            return line.lstrip("# ").strip()
+            return _title(line)
 
     msg = "No 'h1' header found"
     raise Exception(msg)
+
+
+def document_title(document: Document) -> str:
+    # The title of a page, which every page must have
+    if document.title is None:
+        msg = "No 'h1' header found"
+        raise Exception(msg)
+
+    return document.title
+
+
+def _title(line: str) -> str:
+    return line.lstrip("# ").strip()
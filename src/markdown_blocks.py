@@ -1,57 +1,120 @@
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from typing import Literal
 
 
+type BlockType = Literal[
+    "Paragraph", "Heading", "Code", "Quote", "UnorderedList", "OrderedList"
+]
+
+
+@dataclass(slots=True)
+class Block:
+    type: BlockType
+    lines: list[str]
+    # Line contents without their quote or list markers, otherwise the lines
+    items: list[str]
+
+
 def markdown_to_blocks(markdown: str) -> list[str]:
-    lines = markdown.split("\n\n")
-    lines = map(lambda line: line.strip(), lines)
-    lines = filter(lambda line: line != "", lines)
-    lines = list(lines)
+    return ["\n".join(lines) for lines in iter_block_lines(markdown.split("\n"))]
+
+
+def parse_blocks(lines: Iterable[str]) -> Iterator[Block]:
+    for block_lines in iter_block_lines(lines):
+        block_type, items = classify_block(block_lines)
+        yield Block(block_type, block_lines, items)
+
+
+def iter_block_lines(lines: Iterable[str]) -> Iterator[list[str]]:
+    # Blocks are separated by empty lines and stripped of surrounding
+    # whitespace, the same as splitting the whole document on "\n\n" and
+    # stripping each piece. Lines may come straight from a file object.
+    block_lines = list[str]()
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+
+        if line != "":
+            block_lines.append(line)
+            continue
+
+        if len(block_lines) != 0:
+            block_lines = _strip_block(block_lines)
+            if len(block_lines) != 0:
+                yield block_lines
+            block_lines = []
+
+    if len(block_lines) != 0:
+        block_lines = _strip_block(block_lines)
+        if len(block_lines) != 0:
+            yield block_lines
+
+
+def _strip_block(lines: list[str]) -> list[str]:
+    start = 0
+    end = len(lines)
+    while start < end and lines[start].isspace():
+        start += 1
+    while end > start and lines[end - 1].isspace():
+        end -= 1
+
+    if start == end:
+        return []
+
+    lines = lines[start:end]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
 
     return lines
 
 
-type BlockType = Literal[
-    "Paragraph", "Heading", "Code", "Quote", "UnorderedList", "OrderedList"
-]
+HEADING_PREFIXES = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
 
 
 def block_to_block_type(block: str) -> BlockType:
-    lines = block.split("\n")
+    block_type, _ = classify_block(block.split("\n"))
+    return block_type
+
+
+def classify_block(lines: list[str]) -> tuple[BlockType, list[str]]:
+    first = lines[0]
 
     # Heading
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-        return "Heading"
+    if first.startswith(HEADING_PREFIXES):
+        return "Heading", lines
 
     # Code
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
-        return "Code"
+    if len(lines) > 1 and first.startswith("```") and lines[-1].startswith("```"):
+        return "Code", lines
 
-    # Quote
-    is_quote = True
-    for line in lines:
-        words = line.split(" ")
-        if len(words) == 0 or words[0] != ">":
-            is_quote = False
-            break
-
-    if is_quote:
-        return "Quote"
-
-    # Unordered list
-    is_unordered_list = all(map(lambda line: line.startswith("- "), lines))
-    if is_unordered_list:
-        return "UnorderedList"
-
-    # Ordered list
-    is_ordered_list = True
-    for i, line in enumerate(lines):
-        number = i + 1
-        if not line.startswith(f"{number}. "):
-            is_ordered_list = False
-            break
-
-    if is_ordered_list:
-        return "OrderedList"
+    # Quotes and lists are told apart by their first line, so at most one of
+    # them has to be checked against the remaining lines
+    items = list[str]()
+    if first.startswith(">"):
+        for line in lines:
+            if line != ">" and not line.startswith("> "):
+                return "Paragraph", lines
+            items.append(line[2:])
+
+        return "Quote", items
+
+    if first.startswith("- "):
+        for line in lines:
+            if not line.startswith("- "):
+                return "Paragraph", lines
+            items.append(line[2:])
+
+        return "UnorderedList", items
+
+    if first.startswith("1. "):
+        for i, line in enumerate(lines):
+            prefix = f"{i + 1}. "
+            if not line.startswith(prefix):
+                return "Paragraph", lines
+            items.append(line[len(prefix) :])
+
+        return "OrderedList", items
 
     # Paragraph
-    return "Paragraph"
+    return "Paragraph", lines
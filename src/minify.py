@@ -0,0 +1,82 @@
+import re
+
+from htmlnode import VOID_TAGS
+
+
+# Whitespace next to these never renders: they are blocks, or never shown
+BLOCK_TAGS = frozenset(
+    ("!doctype", "html", "head", "body", "title", "meta", "link", "base")
+    + ("script", "style", "noscript", "address", "article", "aside")
+    + ("blockquote", "details", "div", "dl", "dt", "dd", "fieldset", "figure")
+    + ("figcaption", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6")
+    + ("header", "hgroup", "hr", "li", "main", "menu", "nav", "ol", "p", "pre")
+    + ("section", "summary", "table", "thead", "tbody", "tfoot", "tr", "th")
+    + ("td", "ul")
+)
+
+# Elements copied byte for byte, start tag to end tag
+raw_element_re = re.compile(
+    r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.DOTALL | re.IGNORECASE
+)
+token_re = re.compile(
+    r"(<!--.*?-->)|(<(/?)(!doctype|[a-z][\w-]*)\b[^>]*>)|([^<]+|<)",
+    re.DOTALL | re.IGNORECASE,
+)
+whitespace_re = re.compile(r"\s+")
+self_closing_re = re.compile(r"\s*/>$")
+
+
+def minify_html(html: str) -> str:
+    # Drops comments, whitespace between blocks and the "/" of void tags,
+    # and collapses every other run of whitespace to one space, like the
+    # browser would. Meant for templates: it runs once per build, so a
+    # simple regex pass is enough.
+    # (kind, text, tag) with kind "tag", "raw" or "text"
+    tokens = list[tuple[str, str, str]]()
+    last = 0
+    for match in raw_element_re.finditer(html):
+        _tokenize(html[last : match.start()], tokens)
+        tokens.append(("raw", match.group(0), match.group(1).lower()))
+        last = match.end()
+    _tokenize(html[last:], tokens)
+
+    def is_block(index: int) -> bool:
+        # The start and end of the document count as blocks
+        if index < 0 or index >= len(tokens):
+            return True
+        kind, _, tag = tokens[index]
+        return kind != "text" and tag in BLOCK_TAGS
+
+    out = list[str]()
+    for i, (kind, text, _) in enumerate(tokens):
+        if kind != "text":
+            out.append(text)
+            continue
+
+        text = whitespace_re.sub(" ", text)
+        if is_block(i - 1):
+            text = text.lstrip(" ")
+        if is_block(i + 1):
+            text = text.rstrip(" ")
+        out.append(text)
+
+    return "".join(out)
+
+
+def _tokenize(html: str, tokens: list[tuple[str, str, str]]):
+    for match in token_re.finditer(html):
+        comment, tag, _, name, text = match.groups()
+        if comment is not None:
+            # Conditional comments are read by old browsers
+            if comment.startswith("<!--[if"):
+                tokens.append(("raw", comment, ""))
+        elif tag is not None:
+            name = name.lower()
+            if name in VOID_TAGS:
+                tag = self_closing_re.sub(">", tag)
+            tokens.append(("tag", tag, name))
+        elif len(tokens) != 0 and tokens[-1][0] == "text":
+            # A lone "<" is text, and belongs to the text before it
+            tokens[-1] = ("text", tokens[-1][1] + text, "")
+        else:
+            tokens.append(("text", text, ""))
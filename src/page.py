@@ -1,46 +1,389 @@
+import io
 import os
-from file import list_tree
-from markdown import extract_title, markdown_to_html_node
+import time
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from typing import TextIO
+from asset import AssetMap
+from cache import BodyCache, body_key
+from file import walk_tree
+from frontmatter import Metadata, split_front_matter
+from htmlnode import HTMLNode, ParentNode
+from markdown import (
+    block_to_html_node,
+    document_title,
+    extract_title_from_lines,
+    InlineMemo,
+    inline_memo,
+    markdown_to_document,
+    markdown_to_html_chunks,
+    minified_inline_memo,
+)
+from markdown_blocks import Block, classify_block, iter_block_lines
+from profiler import PAGE_STAGES, Profiler
+from template import Template, load_template
+from textnode import text_node_to_html_node, text_to_textnodes
+
+
+# How many chunks each worker gets on average; more chunks balance better,
+# fewer chunks cost less in process round trips
+CHUNKS_PER_JOB = 4
+
+# Bigger pages are streamed block by block instead of being parsed into a
+# document, so they are never held in memory whole. They skip the body cache.
+MAX_DOCUMENT_SIZE = 1024 * 1024
 
 
 def generate_pages_recursive(
-    dir_path_content: str, template_path: str, dest_dir_path: str, base_path: str
+    dir_path_content: str,
+    template_path: str,
+    dest_dir_path: str,
+    base_path: str,
+    jobs: int = 1,
 ):
-    dir_files, _ = list_tree(dir_path_content, dir_path_content)
+    pages = list[tuple[str, str]]()
+    for dir_file, entry in walk_tree(dir_path_content, include=["*.md"]):
+        src_file_path = entry.path
+        dest_file_path = os.path.join(dest_dir_path, page_dest_path(dir_file))
+        pages.append((src_file_path, dest_file_path))
 
-    for dir_file in dir_files:
-        if not dir_file.endswith(".md"):
-            continue
+    generate_pages(pages, template_path, base_path, jobs)
 
-        src_file_path = os.path.join(dir_path_content, dir_file)
-        dest_file_path = os.path.join(dest_dir_path, dir_file[:-3] + ".html")
 
-        generate_page(src_file_path, template_path, dest_file_path, base_path)
+def generate_pages(
+    pages: list[tuple[str, str]],
+    template_path: str,
+    base_path: str,
+    jobs: int = 1,
+    profiler: Profiler | None = None,
+    cache_path: str | None = None,
+    assets: AssetMap | None = None,
+    minify: bool = False,
+):
+    if len(pages) == 0:
+        return
 
+    # Parsed once for the whole build, then shipped to every worker
+    template = load_template(template_path, base_path, assets, minify)
+    memo = page_memo(minify)
 
-def generate_page(from_path: str, template_path: str, dest_path: str, base_path: str):
+    if jobs <= 1 or len(pages) == 1:
+        hits, misses = memo.stats()
+        cache = BodyCache(cache_path) if cache_path is not None else None
+        try:
+            for src_file_path, dest_file_path in pages:
+                print_generating(src_file_path, template_path, dest_file_path)
+                if profiler is None:
+                    write_page(
+                        src_file_path, template, dest_file_path, base_path, cache
+                    )
+                else:
+                    stages = profile_page(
+                        src_file_path, template, dest_file_path, base_path
+                    )
+                    profiler.add_page(src_file_path, stages)
+        finally:
+            if cache is not None:
+                cache.close()
+
+        new_hits, new_misses = memo.stats()
+        print_memo_stats(new_hits - hits, new_misses - misses)
+        return
+
+    for src_file_path, dest_file_path in pages:
+        print_generating(src_file_path, template_path, dest_file_path)
+
+    chunks = chunk_pages(pages, jobs * CHUNKS_PER_JOB)
+
+    errors = list[tuple[str, str]]()
+    hits, misses = 0, 0
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                _generate_chunk,
+                chunk,
+                template,
+                base_path,
+                profiler is not None,
+                cache_path,
+            )
+            for chunk in chunks
+        ]
+        for future in futures:
+            chunk_errors, chunk_stages, (chunk_hits, chunk_misses) = future.result()
+            errors.extend(chunk_errors)
+            hits += chunk_hits
+            misses += chunk_misses
+            if profiler is not None:
+                for src_file_path, stages in chunk_stages.items():
+                    profiler.add_page(src_file_path, stages)
+
+    print_memo_stats(hits, misses)
+
+    if len(errors) != 0:
+        # Report in page order no matter which worker finished first
+        order = {src: i for i, (src, _) in enumerate(pages)}
+        errors.sort(key=lambda error: order[error[0]])
+
+        lines = "\n".join(f"  {src}: {error}" for src, error in errors)
+        msg = f"Failed to generate {len(errors)} page(s):\n{lines}"
+        raise Exception(msg)
+
+
+def chunk_pages(
+    pages: list[tuple[str, str]], chunk_count: int
+) -> list[list[tuple[str, str]]]:
+    # Rendering cost is roughly linear in markdown size, so fill chunks up to
+    # an equal share of the total bytes, biggest pages first
+    sized_pages = sorted(
+        ((os.path.getsize(src), src, dest) for src, dest in pages),
+        key=lambda page: (-page[0], page[1]),
+    )
+    total_size = sum(size for size, _, _ in sized_pages)
+    chunk_size = max(1, total_size // max(1, chunk_count))
+
+    chunks = list[list[tuple[str, str]]]()
+    chunk = list[tuple[str, str]]()
+    chunk_total = 0
+    for size, src, dest in sized_pages:
+        chunk.append((src, dest))
+        chunk_total += size
+
+        if chunk_total >= chunk_size:
+            chunks.append(chunk)
+            chunk = []
+            chunk_total = 0
+
+    if len(chunk) != 0:
+        chunks.append(chunk)
+
+    return chunks
+
+
+def _generate_chunk(
+    chunk: list[tuple[str, str]],
+    template: Template,
+    base_path: str,
+    profile: bool,
+    cache_path: str | None,
+) -> tuple[
+    list[tuple[str, str]], dict[str, dict[str, float]], tuple[int, int]
+]:
+    errors = list[tuple[str, str]]()
+    page_stages = dict[str, dict[str, float]]()
+    # Workers outlive their chunks, so only this chunk's share is reported
+    memo = page_memo(template.minify)
+    hits, misses = memo.stats()
+    # Every worker has its own connection, sqlite serializes the writes
+    cache = BodyCache(cache_path) if cache_path is not None else None
+    try:
+        for src_file_path, dest_file_path in chunk:
+            try:
+                if profile:
+                    page_stages[src_file_path] = profile_page(
+                        src_file_path, template, dest_file_path, base_path
+                    )
+                else:
+                    write_page(
+                        src_file_path, template, dest_file_path, base_path, cache
+                    )
+            except Exception as e:
+                errors.append((src_file_path, f"{type(e).__name__}: {e}"))
+    finally:
+        if cache is not None:
+            cache.close()
+
+    new_hits, new_misses = memo.stats()
+    return errors, page_stages, (new_hits - hits, new_misses - misses)
+
+
+def page_memo(minify: bool) -> InlineMemo:
+    return minified_inline_memo if minify else inline_memo
+
+
+def page_dest_path(rel_path: str) -> str:
+    return rel_path[:-3] + ".html"
+
+
+def print_generating(from_path: str, template_path: str, dest_path: str):
     print(
         f"Generating page from '{from_path}' to '{dest_path}' using '{template_path}'"
     )
 
+
+def print_memo_stats(hits: int, misses: int):
+    if hits + misses != 0:
+        print(
+            f"Inline memo: {hits} hit(s), {misses} miss(es), "
+            + f"{hits / (hits + misses) * 100:.0f}% hit rate"
+        )
+
+
+def generate_page(from_path: str, template_path: str, dest_path: str, base_path: str):
+    print_generating(from_path, template_path, dest_path)
+    template = load_template(template_path, base_path)
+    write_page(from_path, template, dest_path, base_path)
+
+
+def write_page(
+    from_path: str,
+    template: Template,
+    dest_path: str,
+    base_path: str,
+    cache: BodyCache | None = None,
+):
+    dir, _ = os.path.split(dest_path)
+    os.makedirs(dir, exist_ok=True)
+
+    # The page is written to a temporary file so a failed render never leaves
+    # a half-written page behind
+    tmp_path = f"{dest_path}.tmp"
+    with open(from_path, "r") as f:
+        try:
+            with open(tmp_path, "w") as dest_file:
+                if os.fstat(f.fileno()).st_size <= MAX_DOCUMENT_SIZE:
+                    values = page_values(
+                        f, base_path, cache, template.minify, template.assets
+                    )
+                    template.write(dest_file, values)
+                else:
+                    stream_page(f, template, dest_file, base_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    os.replace(tmp_path, dest_path)
+
+
+def render_page(from_path: str, template: Template, base_path: str) -> str:
+    # Same page as write_page, kept in memory
+    with open(from_path, "r") as f:
+        return template.render(
+            page_values(f, base_path, minify=template.minify, assets=template.assets)
+        )
+
+
+def page_values(
+    src: TextIO,
+    base_path: str,
+    cache: BodyCache | None = None,
+    minify: bool = False,
+    assets: AssetMap | None = None,
+) -> dict[str, str]:
+    # What the template slots are filled with: the front matter, the title
+    # and the body HTML. The body is only parsed if the cache has not seen
+    # this markdown before.
+    memo = page_memo(minify)
+    if cache is None:
+        document = markdown_to_document(src, base_path, memo, assets)
+        return template_values(
+            document.metadata, document_title(document), document.node.to_html(minify)
+        )
+
+    markdown = src.read()
+    key = body_key(markdown, base_path, minify, assets)
+    cached = cache.get(key)
+    if cached is not None:
+        metadata, _ = split_front_matter(io.StringIO(markdown))
+        return template_values(metadata, *cached)
+
+    document = markdown_to_document(io.StringIO(markdown), base_path, memo, assets)
+    title = document_title(document)
+    body = document.node.to_html(minify)
+
+    cache.put(key, title, body)
+    return template_values(document.metadata, title, body)
+
+
+def template_values(metadata: Metadata, title: str, content: str) -> dict[str, str]:
+    # Front matter fills the slots named after its keys, lists joined by
+    # commas. Title and Content always come from the page itself.
+    values = dict[str, str]()
+    for key, value in metadata.items():
+        values[key] = value if isinstance(value, str) else ", ".join(value)
+
+    values["Title"] = title
+    values["Content"] = content
+    return values
+
+
+def stream_page(src: TextIO, template: Template, dest: TextIO, base_path: str):
+    # The markdown is streamed block by block, so the title has to be found
+    # before the first block is written. The scan stops at the title, which
+    # is usually right below the front matter.
+    metadata, lines = split_front_matter(src)
+    title = extract_title_from_lines(lines)
+    _ = src.seek(0)
+
+    values: dict[str, str | Iterable[str]] = dict(template_values(metadata, title, ""))
+    values["Content"] = markdown_to_html_chunks(
+        src, base_path, minify=template.minify, assets=template.assets
+    )
+    template.write(dest, values)
+
+
+def profile_page(
+    from_path: str, template: Template, dest_path: str, base_path: str
+) -> dict[str, float]:
+    # Produces the same page as write_page, but runs each stage to completion
+    # before the next one instead of streaming, so every stage can be timed
+    stages = dict.fromkeys(PAGE_STAGES, 0.0)
+    clock = time.perf_counter
+
+    def lap(stage: str):
+        nonlocal start
+        now = clock()
+        stages[stage] += now - start
+        start = now
+
+    start = clock()
     with open(from_path, "r") as f:
         markdown = f.read()
+    lap("read")
 
-    with open(template_path, "r") as f:
-        template = f.read()
+    metadata, lines = split_front_matter(markdown.split("\n"))
+    lines = list(lines)
+    title = extract_title_from_lines(lines)
+    lap("extract_title")
 
-    content = markdown_to_html_node(markdown).to_html()
-    title = extract_title(markdown)
+    block_lines = list(iter_block_lines(lines))
+    lap("markdown_to_blocks")
 
-    finished_html = (
-        template.replace("{{ Title }}", title)
-        .replace("{{ Content }}", content)
-        .replace('href="/', f'href="{base_path}')
-        .replace('src="/', f'src="{base_path}')
-    )
+    blocks = list[Block]()
+    for lines in block_lines:
+        block_type, items = classify_block(lines)
+        blocks.append(Block(block_type, lines, items))
+    lap("block_to_block_type")
+
+    def inline(
+        text: str, base_path: str, assets: AssetMap | None
+    ) -> list[HTMLNode]:
+        inline_start = clock()
+        text_nodes = text_to_textnodes(text)
+        stages["text_to_textnodes"] += clock() - inline_start
+        return [text_node_to_html_node(node, base_path, assets) for node in text_nodes]
+
+    nodes = [
+        block_to_html_node(block, base_path, inline, template.assets)
+        for block in blocks
+    ]
+    lap("build_nodes")
+    # build_nodes was timed including the inline tokenizing inside it
+    stages["build_nodes"] -= stages["text_to_textnodes"]
+
+    content = ParentNode("div", nodes).to_html(template.minify)
+    lap("to_html")
+
+    finished_html = template.render(template_values(metadata, title, content))
+    lap("template")
 
     dir, _ = os.path.split(dest_path)
     os.makedirs(dir, exist_ok=True)
-
-    with open(dest_path, "w") as dest_file:
+    tmp_path = f"{dest_path}.tmp"
+    with open(tmp_path, "w") as dest_file:
         _ = dest_file.write(finished_html)
+    os.replace(tmp_path, dest_path)
+    lap("write")
+
+    return stages
@@ -0,0 +1,93 @@
+import json
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+
+TRACE_VERSION = 1
+
+# Per-page stages in pipeline order
+PAGE_STAGES = (
+    "read",
+    "extract_title",
+    "markdown_to_blocks",
+    "block_to_block_type",
+    "text_to_textnodes",
+    "build_nodes",
+    "to_html",
+    "template",
+    "write",
+)
+
+
+@dataclass(slots=True)
+class Profiler:
+    # Whole-build stages such as hashing and copying assets
+    build: dict[str, float] = field(default_factory=dict)
+    # Source path -> stage -> seconds
+    pages: dict[str, dict[str, float]] = field(default_factory=dict)
+    started: float = field(default_factory=time.time)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.build[name] = self.build.get(name, 0.0) + elapsed
+
+    def add_page(self, path: str, stages: dict[str, float]):
+        self.pages[path] = stages
+
+    def page_totals(self) -> dict[str, float]:
+        totals = dict.fromkeys(PAGE_STAGES, 0.0)
+        for stages in self.pages.values():
+            for name, seconds in stages.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+
+        return totals
+
+    def report(self, top: int) -> str:
+        lines = list[str]()
+
+        slowest = sorted(
+            self.pages.items(), key=lambda page: sum(page[1].values()), reverse=True
+        )
+        lines.append(f"Slowest {min(top, len(slowest))} of {len(slowest)} page(s):")
+        for path, stages in slowest[:top]:
+            slowest_stage = max(stages, key=lambda name: stages[name])
+            lines.append(
+                f"  {_ms(sum(stages.values()))}  {path}  (mostly {slowest_stage})"
+            )
+
+        page_totals = self.page_totals()
+        total = sum(page_totals.values()) + sum(self.build.values())
+
+        lines.append("Stage totals:")
+        for name, seconds in [*page_totals.items(), *self.build.items()]:
+            share = seconds / total * 100 if total > 0 else 0.0
+            lines.append(f"  {_ms(seconds)}  {share:5.1f}%  {name}")
+        lines.append(f"  {_ms(total)}  100.0%  total")
+
+        return "\n".join(lines)
+
+    def write_trace(self, path: str):
+        trace = {
+            "version": TRACE_VERSION,
+            "started": self.started,
+            "build": self.build,
+            "totals": self.page_totals(),
+            "pages": [
+                {"path": path, "total": sum(stages.values()), "stages": stages}
+                for path, stages in sorted(self.pages.items())
+            ],
+        }
+
+        with open(path, "w") as f:
+            json.dump(trace, f, indent=1)
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:10.2f} ms"
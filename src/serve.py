@@ -0,0 +1,466 @@
+import asyncio
+import os
+import posixpath
+from http import HTTPStatus
+from mimetypes import guess_type
+from typing import Literal
+from urllib.parse import quote, unquote, urlsplit
+
+from asset import AssetMap
+from collection import CollectionConfig, Listing, collect_listings, render_listing
+from image import image_props, index_images
+from manifest import FileState, ImageState, file_state, hash_tree
+from page import render_page
+from template import Template, load_template
+
+
+# Every rendered page subscribes to this event stream and reloads itself on
+# any message
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    f'<script>new EventSource("{LIVE_RELOAD_PATH}").onmessage = '
+    "() => location.reload()</script>"
+)
+# Idle event streams get a comment this often, so proxies keep them open
+KEEPALIVE_INTERVAL = 15.0
+MAX_HEADERS = 100
+BACKLOG = 1024
+
+type Route = Literal["Page", "Listing", "Static", "Redirect", "NotFound"]
+
+
+class DevServer:
+    # Serves the site straight from its sources instead of from docs/. Each
+    # page is rendered on its first request and kept in memory until its
+    # markdown, the template, or the size of an image changes. Listing pages
+    # are rendered on every request from an index kept up to date with the
+    # content. Static files are sent from disk.
+    def __init__(
+        self,
+        static_path: str,
+        content_path: str,
+        template_path: str,
+        base_path: str,
+        collections: list[CollectionConfig] | None = None,
+    ) -> None:
+        self.static_path: str = static_path
+        self.content_path: str = content_path
+        self.template_path: str = template_path
+        self.base_path: str = base_path
+        self.collections: list[CollectionConfig] = collections or []
+
+        self.template_state: FileState = file_state(template_path)
+        self.content: dict[str, FileState] = hash_tree(content_path, ".md")
+        self.static: dict[str, FileState] = hash_tree(static_path)
+        self.images: dict[str, ImageState] = index_images(static_path, self.static)
+        assets = AssetMap(images=image_props(self.images, base_path))
+        self.template: Template = load_template(template_path, base_path, assets)
+        # Output path -> the listing page written there
+        self.listings: dict[str, tuple[CollectionConfig, Listing]] = {}
+        self._index_listings()
+
+        # Relative markdown path -> its page, still rendering or done. Every
+        # request for a page that is being rendered waits on the same future.
+        self.pages: dict[str, asyncio.Future[bytes]] = {}
+        # One queue per open live reload stream
+        self.clients: set[asyncio.Queue[str]] = set()
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        return await asyncio.start_server(self.handle, host, port, backlog=BACKLOG)
+
+    async def serve_forever(self, host: str, port: int, interval: float):
+        server = await self.start(host, port)
+        print(
+            f"Serving '{self.content_path}' at http://{host}:{port}{self.base_path}, "
+            + "Ctrl+C to stop"
+        )
+
+        async with server:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    changed = await self.refresh()
+                except OSError as e:
+                    # Most likely a file saved or removed mid-scan
+                    print(f"Refresh failed: {type(e).__name__}: {e}")
+                    continue
+
+                if len(changed) != 0:
+                    print(
+                        f"Changed: {', '.join(changed)}; "
+                        + f"reloading {len(self.clients)} client(s)"
+                    )
+
+    async def refresh(self) -> list[str]:
+        # Rescans the sources, drops every page they affect from memory and
+        # tells the open pages to reload. Returns the changed sources.
+        template_state, content, static, images = await asyncio.to_thread(self._scan)
+        changed = list[str]()
+
+        assets = AssetMap(images=image_props(images, self.base_path))
+        template_changed = template_state.hash != self.template_state.hash
+        if template_changed or assets != self.template.assets:
+            self.template = await asyncio.to_thread(
+                load_template, self.template_path, self.base_path, assets
+            )
+            self.pages.clear()
+        if template_changed:
+            changed.append(self.template_path)
+
+        content_changed = _changed_files(self.content, content)
+        for file in content_changed:
+            _ = self.pages.pop(file, None)
+            changed.append(os.path.join(self.content_path, file))
+
+        for file in _changed_files(self.static, static):
+            changed.append(os.path.join(self.static_path, file))
+
+        self.template_state = template_state
+        self.content = content
+        self.static = static
+        self.images = images
+        if len(content_changed) != 0:
+            await asyncio.to_thread(self._index_listings)
+
+        if len(changed) != 0:
+            for queue in self.clients:
+                queue.put_nowait("reload")
+
+        return changed
+
+    def _scan(
+        self,
+    ) -> tuple[
+        FileState, dict[str, FileState], dict[str, FileState], dict[str, ImageState]
+    ]:
+        static = hash_tree(self.static_path, "", self.static)
+        return (
+            file_state(self.template_path, self.template_state),
+            hash_tree(self.content_path, ".md", self.content),
+            static,
+            index_images(self.static_path, static, self.images),
+        )
+
+    def _index_listings(self):
+        if len(self.collections) == 0:
+            return
+
+        try:
+            listings = collect_listings(self.collections, self.content_path)
+        except Exception as e:
+            # Keep serving the last good listings until the post is fixed
+            print(f"Failed to index collections: {type(e).__name__}: {e}")
+            return
+
+        self.listings = {listing.dest: (config, listing) for config, listing in listings}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # ValueError is a request line or header over the stream limit
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> bool:
+        # Answers one request, returns whether the connection stays open
+        request_line = await reader.readline()
+        if request_line == b"":
+            return False
+
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3:
+            await _respond(writer, HTTPStatus.BAD_REQUEST, keep_alive=False)
+            return False
+        method, target, version = parts
+
+        headers = dict[str, str]()
+        for _ in range(MAX_HEADERS):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            await _respond(writer, HTTPStatus.BAD_REQUEST, keep_alive=False)
+            return False
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+
+        if method not in ("GET", "HEAD"):
+            await _respond(writer, HTTPStatus.METHOD_NOT_ALLOWED, keep_alive=False)
+            return False
+        head_only = method == "HEAD"
+
+        path = unquote(urlsplit(target).path)
+        if path == LIVE_RELOAD_PATH:
+            await self._live_reload(reader, writer)
+            return False
+
+        route, value = self._resolve(path)
+        match route:
+            case "Page":
+                try:
+                    body = await self._page(value)
+                except Exception as e:
+                    src_file_path = os.path.join(self.content_path, value)
+                    msg = f"Failed to render '{src_file_path}': {type(e).__name__}: {e}"
+                    print(msg)
+                    await _respond(
+                        writer,
+                        HTTPStatus.INTERNAL_SERVER_ERROR,
+                        msg.encode(),
+                        keep_alive=keep_alive,
+                        head_only=head_only,
+                    )
+                    return keep_alive
+
+                await _respond(
+                    writer,
+                    HTTPStatus.OK,
+                    body,
+                    "text/html; charset=utf-8",
+                    keep_alive=keep_alive,
+                    head_only=head_only,
+                )
+            case "Listing":
+                config, listing = self.listings[value]
+                html = render_listing(listing, config, self.template, self.base_path)
+                await _respond(
+                    writer,
+                    HTTPStatus.OK,
+                    _with_live_reload(html).encode(),
+                    "text/html; charset=utf-8",
+                    keep_alive=keep_alive,
+                    head_only=head_only,
+                )
+            case "Static":
+                try:
+                    await _send_file(writer, value, keep_alive, head_only)
+                except FileNotFoundError:
+                    # Removed since the last refresh
+                    await _respond(
+                        writer,
+                        HTTPStatus.NOT_FOUND,
+                        keep_alive=keep_alive,
+                        head_only=head_only,
+                    )
+            case "Redirect":
+                await _respond(
+                    writer,
+                    HTTPStatus.MOVED_PERMANENTLY,
+                    keep_alive=keep_alive,
+                    head_only=head_only,
+                    headers={"Location": quote(value)},
+                )
+            case "NotFound":
+                await _respond(
+                    writer,
+                    HTTPStatus.NOT_FOUND,
+                    keep_alive=keep_alive,
+                    head_only=head_only,
+                )
+
+        return keep_alive
+
+    def _resolve(self, path: str) -> tuple[Route, str]:
+        # Maps a URL path to the page or static file the build would have
+        # written there
+        if path + "/" == self.base_path:
+            return "Redirect", self.base_path
+        if not path.startswith(self.base_path):
+            return "NotFound", ""
+
+        rel_path = path[len(self.base_path) :]
+        is_dir = rel_path == "" or rel_path.endswith("/")
+        rel_path = posixpath.normpath(rel_path + "index.html" if is_dir else rel_path)
+        if rel_path == ".." or rel_path.startswith(("../", "/")) or "\0" in rel_path:
+            return "NotFound", ""
+
+        found = self._find(rel_path)
+        if found is not None:
+            return found
+
+        if not is_dir and self._find(posixpath.join(rel_path, "index.html")):
+            return "Redirect", path + "/"
+
+        return "NotFound", ""
+
+    def _find(self, rel_path: str) -> tuple[Route, str] | None:
+        file = rel_path.replace("/", os.sep)
+
+        # Pages are written after static files are copied, so they win
+        if file.endswith(".html"):
+            page = file[:-5] + ".md"
+            if page in self.content:
+                return "Page", page
+            if file in self.listings:
+                return "Listing", file
+
+        if file in self.static:
+            return "Static", os.path.join(self.static_path, file)
+
+        return None
+
+    async def _page(self, file: str) -> bytes:
+        page = self.pages.get(file)
+        if page is None:
+            page = asyncio.ensure_future(asyncio.to_thread(self._render, file))
+            self.pages[file] = page
+
+        try:
+            return await asyncio.shield(page)
+        except Exception:
+            # Let the next request try again
+            if self.pages.get(file) is page:
+                del self.pages[file]
+            raise
+
+    def _render(self, file: str) -> bytes:
+        html = render_page(
+            os.path.join(self.content_path, file), self.template, self.base_path
+        )
+        return _with_live_reload(html).encode()
+
+    async def _live_reload(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        writer.write(
+            _head(
+                HTTPStatus.OK,
+                {"Content-Type": "text/event-stream", "Cache-Control": "no-cache"},
+            )
+        )
+
+        queue = asyncio.Queue[str]()
+        self.clients.add(queue)
+        # The client never sends anything else, so the read only returns
+        # once it goes away
+        closed = asyncio.ensure_future(reader.read())
+        try:
+            await writer.drain()
+            while not closed.done():
+                event = asyncio.ensure_future(queue.get())
+                _ = await asyncio.wait(
+                    (event, closed),
+                    timeout=KEEPALIVE_INTERVAL,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if event.done():
+                    writer.write(f"data: {event.result()}\n\n".encode())
+                else:
+                    _ = event.cancel()
+                    writer.write(b": keepalive\n\n")
+                await writer.drain()
+        finally:
+            _ = closed.cancel()
+            self.clients.discard(queue)
+
+
+def serve(
+    static_path: str,
+    content_path: str,
+    template_path: str,
+    base_path: str,
+    host: str,
+    port: int,
+    interval: float,
+    collections: list[CollectionConfig] | None = None,
+):
+    server = DevServer(static_path, content_path, template_path, base_path, collections)
+    try:
+        asyncio.run(server.serve_forever(host, port, interval))
+    except KeyboardInterrupt:
+        pass
+
+
+def _changed_files(old: dict[str, FileState], new: dict[str, FileState]) -> list[str]:
+    changed = list[str]()
+    for file in old.keys() | new.keys():
+        old_state = old.get(file)
+        new_state = new.get(file)
+        if old_state is None or new_state is None or old_state.hash != new_state.hash:
+            changed.append(file)
+
+    return sorted(changed)
+
+
+def _with_live_reload(html: str) -> str:
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + LIVE_RELOAD_SCRIPT
+
+    return html[:index] + LIVE_RELOAD_SCRIPT + html[index:]
+
+
+def _head(status: HTTPStatus, headers: dict[str, str]) -> bytes:
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+    for name, value in headers.items():
+        lines.append(f"{name}: {value}")
+
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _respond(
+    writer: asyncio.StreamWriter,
+    status: HTTPStatus,
+    body: bytes | None = None,
+    content_type: str = "text/plain; charset=utf-8",
+    keep_alive: bool = True,
+    head_only: bool = False,
+    headers: dict[str, str] | None = None,
+):
+    if body is None:
+        body = f"{status.value} {status.phrase}".encode()
+
+    writer.write(
+        _head(
+            status,
+            {
+                "Content-Type": content_type,
+                "Content-Length": str(len(body)),
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive" if keep_alive else "close",
+                **(headers or {}),
+            },
+        )
+    )
+    if not head_only:
+        writer.write(body)
+    await writer.drain()
+
+
+async def _send_file(
+    writer: asyncio.StreamWriter, path: str, keep_alive: bool, head_only: bool
+):
+    content_type, _ = guess_type(path)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        writer.write(
+            _head(
+                HTTPStatus.OK,
+                {
+                    "Content-Type": content_type or "application/octet-stream",
+                    "Content-Length": str(size),
+                    "Cache-Control": "no-cache",
+                    "Connection": "keep-alive" if keep_alive else "close",
+                },
+            )
+        )
+        await writer.drain()
+
+        if not head_only and size != 0:
+            # os.sendfile where the transport supports it, so the file never
+            # passes through Python
+            loop = asyncio.get_running_loop()
+            _ = await loop.sendfile(writer.transport, f, 0, size)
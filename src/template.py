@@ -0,0 +1,103 @@
+import re
+from dataclasses import dataclass, field
+from collections.abc import Iterable
+from typing import TextIO
+
+from asset import AssetMap, rewrite_urls
+from htmlnode import HTMLNode, write_chunks
+from image import add_image_attributes
+from minify import minify_html
+
+# {{ Title }}, {{ Content }}, ...
+slot_re = re.compile(r"\{\{ (\w+) \}\}")
+
+# href="/..." and src="/...", but not protocol-relative "//host/..."
+absolute_url_re = re.compile(r'(href|src)="/(?!/)')
+
+
+@dataclass(slots=True)
+class Template:
+    # Static text with a placeholder at each slot index
+    segments: list[str]
+    # (index into segments, slot name)
+    slots: list[tuple[int, str]]
+    # Applied to the segments when the template was compiled, and handed to
+    # the pages poured into it, whose nodes are built with it
+    assets: AssetMap = field(default_factory=AssetMap)
+    # Whether pages poured into it are serialized minified, like it was
+    minify: bool = False
+
+    def render(self, values: dict[str, str]) -> str:
+        parts = self.segments.copy()
+        for index, name in self.slots:
+            value = values.get(name)
+            if value is not None:
+                parts[index] = value
+
+        return "".join(parts)
+
+    def write(
+        self, stream: TextIO, values: dict[str, str | HTMLNode | Iterable[str]]
+    ):
+        # Like render, but HTML nodes and chunk iterators are streamed into
+        # their slot instead of being serialized to one string first
+        slots = dict(self.slots)
+        for index, segment in enumerate(self.segments):
+            name = slots.get(index)
+            value = values.get(name) if name is not None else None
+
+            if value is None:
+                _ = stream.write(segment)
+            elif isinstance(value, str):
+                _ = stream.write(value)
+            elif isinstance(value, HTMLNode):
+                value.write_html(stream, self.minify)
+            else:
+                write_chunks(stream, value)
+
+
+def compile_template(
+    template: str,
+    base_path: str,
+    assets: AssetMap | None = None,
+    minify: bool = False,
+) -> Template:
+    assets = assets or AssetMap()
+    if minify:
+        # Once per build, not once per page
+        template = minify_html(template)
+
+    segments = list[str]()
+    slots = list[tuple[int, str]]()
+
+    last = 0
+    for match in slot_re.finditer(template):
+        text = template[last : match.start()]
+        segments.append(_rewrite(text, base_path, assets))
+        slots.append((len(segments), match.group(1)))
+        # Unfilled slots render as they were written
+        segments.append(match.group(0))
+        last = match.end()
+
+    segments.append(_rewrite(template[last:], base_path, assets))
+
+    return Template(segments, slots, assets, minify)
+
+
+def load_template(
+    path: str,
+    base_path: str,
+    assets: AssetMap | None = None,
+    minify: bool = False,
+) -> Template:
+    with open(path, "r") as f:
+        return compile_template(f.read(), base_path, assets, minify)
+
+
+def _rewrite(text: str, base_path: str, assets: AssetMap) -> str:
+    text = add_image_attributes(_rebase(text, base_path), assets.images)
+    return rewrite_urls(text, assets.urls)
+
+
+def _rebase(text: str, base_path: str) -> str:
+    return absolute_url_re.sub(lambda m: f'{m.group(1)}="{base_path}', text)
@@ -0,0 +1,44 @@
+import os
+import unittest
+
+from asset import asset_urls, fingerprint_path, rewrite_urls
+
+
+class TestAsset(unittest.TestCase):
+    def test_fingerprint_path(self):
+        self.assertEqual(
+            fingerprint_path("index.css", "3fa9c1d2e5"), "index.3fa9c1d2.css"
+        )
+        self.assertEqual(
+            fingerprint_path(os.path.join("images", "tom.png"), "66709e99ab"),
+            os.path.join("images", "tom.66709e99.png"),
+        )
+        self.assertEqual(fingerprint_path("CNAME", "abcdef0123"), "CNAME.abcdef01")
+        self.assertEqual(
+            fingerprint_path(".nojekyll", "abcdef0123"), ".nojekyll.abcdef01"
+        )
+
+    def test_asset_urls(self):
+        assets = {os.path.join("images", "a.png"): os.path.join("images", "a.1.png")}
+        self.assertEqual(
+            asset_urls(assets, "/base/"), {"/base/images/a.png": "/base/images/a.1.png"}
+        )
+
+    def test_rewrite_urls(self):
+        urls = {"/base/index.css": "/base/index.1.css", "/base/a.png": "/base/a.2.png"}
+        self.assertEqual(
+            rewrite_urls(
+                '<link href="/base/index.css"><img src="/base/a.png">'
+                + '<a href="/base/other.css">x</a><a data-href="/base/a.png">',
+                urls,
+            ),
+            '<link href="/base/index.1.css"><img src="/base/a.2.png">'
+            + '<a href="/base/other.css">x</a><a data-href="/base/a.png">',
+        )
+        self.assertEqual(
+            rewrite_urls('<a href="/base/a.png">', {}), '<a href="/base/a.png">'
+        )
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
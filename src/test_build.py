@@ -0,0 +1,236 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from asset import ASSET_MANIFEST_PATH, fingerprint_path
+from build import build
+from manifest import hash_file
+
+
+class TestBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.static = os.path.join(root, "static")
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        self.dest = os.path.join(root, "docs")
+        self.manifest = os.path.join(root, "manifest.json")
+
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path: str, text: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            _ = f.write(text)
+
+    def build(self, base_path: str = "/", **kwargs) -> str:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            build(
+                self.static,
+                self.content,
+                self.template,
+                self.dest,
+                self.manifest,
+                base_path,
+                **kwargs,
+            )
+        return out.getvalue()
+
+    def test_full_then_noop(self):
+        log = self.build()
+        self.assertIn("index.css", log)
+        self.assertEqual(log.count("Generating page"), 2)
+
+        with open(os.path.join(self.dest, "blog", "post", "index.html")) as f:
+            self.assertEqual(f.read(), "<title>Post</title><div><h1>Post</h1></div>")
+
+        self.assertEqual(self.build(), "")
+
+    def test_only_changed_page(self):
+        _ = self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Changed")
+
+        log = self.build()
+        self.assertEqual(log.count("Generating page"), 1)
+        self.assertIn("index.md", log)
+
+    def test_template_and_base_path_rebuild_all(self):
+        _ = self.build()
+        self.write(self.template, "{{ Content }}")
+        self.assertEqual(self.build().count("Generating page"), 2)
+        self.assertEqual(self.build("/base/").count("Generating page"), 2)
+
+    def test_prune_deleted_sources(self):
+        _ = self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        os.remove(os.path.join(self.static, "index.css"))
+
+        _ = self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.css")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_prune_unknown_outputs(self):
+        _ = self.build()
+        self.write(os.path.join(self.dest, "old", "page.html"), "stale")
+
+        self.assertIn("Removing stale 'old/page.html'", self.build())
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "old")))
+
+    def test_check_modes(self):
+        # Same size and mtime, different bytes
+        path = os.path.join(self.content, "index.md")
+        hour_ago = time.time_ns() - 3600 * 10**9
+        os.utime(path, ns=(hour_ago, hour_ago))
+        _ = self.build()
+        self.write(path, "# Emoh")
+        os.utime(path, ns=(hour_ago, hour_ago))
+
+        self.assertEqual(self.build(check="mtime"), "")
+        self.assertEqual(self.build(check="hash").count("Generating page"), 1)
+
+    def test_check_recent_mtime(self):
+        # Written within the tick of the last build, so its mtime may not have
+        # moved. It is hashed again anyway.
+        path = os.path.join(self.content, "index.md")
+        _ = self.build()
+        stat = os.stat(path)
+        self.write(path, "# Emoh")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        self.assertEqual(self.build(check="mtime").count("Generating page"), 1)
+
+    def test_link_modes(self):
+        css = os.path.join(self.dest, "index.css")
+        for link in ("copy", "hardlink", "reflink"):
+            if os.path.exists(css):
+                os.remove(css)
+
+            _ = self.build(link=link)
+            with open(css) as f:
+                self.assertEqual(f.read(), "body {}")
+
+    def test_hardlink_replaced_not_written_through(self):
+        _ = self.build(link="hardlink")
+
+        # Edited in place, so the hardlinked output sees it too
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0; }")
+        _ = self.build(link="copy")
+
+        self.write(os.path.join(self.dest, "index.css"), "changed")
+        with open(os.path.join(self.static, "index.css")) as f:
+            self.assertEqual(f.read(), "body { margin: 0; }")
+
+    def test_missing_output_is_rebuilt(self):
+        _ = self.build()
+        os.remove(os.path.join(self.dest, "index.html"))
+        self.assertEqual(self.build().count("Generating page"), 1)
+
+    def test_fingerprint(self):
+        self.write(self.template, '<link href="/index.css">{{ Content }}')
+        self.write(
+            os.path.join(self.content, "index.md"),
+            '# Home\n\n[css](/index.css) `<link href="/base/index.css">`',
+        )
+        log = self.build("/base/", fingerprint=True)
+        self.assertEqual(log.count("Generating page"), 2)
+
+        css = os.path.join(self.static, "index.css")
+        asset = fingerprint_path("index.css", hash_file(css))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, asset)))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.css")))
+        with open(os.path.join(self.dest, ASSET_MANIFEST_PATH)) as f:
+            self.assertEqual(json.load(f), {"index.css": asset})
+        with open(os.path.join(self.dest, "index.html")) as f:
+            html = f.read()
+        self.assertEqual(html.count(f'href="/base/{asset}"'), 2)
+        # Only real links, an example in code is left as written
+        self.assertIn('<code><link href="/base/index.css"></code>', html)
+
+        self.assertEqual(self.build("/base/", fingerprint=True), "")
+
+        # A new asset hash relinks every page and prunes the old copy
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        log = self.build("/base/", fingerprint=True)
+        self.assertEqual(log.count("Generating page"), 2)
+        self.assertIn(f"Removing stale '{asset}'", log)
+
+        log = self.build("/base/")
+        self.assertEqual(log.count("Generating page"), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, ASSET_MANIFEST_PATH)))
+
+    def test_compress(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n" + "Text " * 500)
+        log = self.build(compress=True)
+        self.assertEqual(log.count("Compressing"), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html.gz")))
+        self.assertEqual(self.build(compress=True), "")
+
+        log = self.build()
+        self.assertIn("Removing stale 'index.html.gz'", log)
+
+    def test_minify(self):
+        self.write(self.template, "<title>{{ Title }}</title>\n  <main>{{ Content }}</main>\n")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n- a\n- b")
+        cache = os.path.join(self.tmp.name, "cache.sqlite")
+        _ = self.build(cache_path=cache)
+
+        log = self.build(cache_path=cache, minify=True)
+        self.assertEqual(log.count("Generating page"), 2)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertEqual(
+                f.read(),
+                "<title>Home</title><main><div><h1>Home</h1><ul><li>a<li>b</ul></div></main>",
+            )
+
+        # The bodies cached by the first build are used again, not the
+        # minified ones
+        log = self.build(cache_path=cache)
+        self.assertEqual(log.count("Generating page"), 2)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertIn("<li>a</li>", f.read())
+
+    def test_image_sizes(self):
+        with open(os.path.join(self.static, "a.gif"), "wb") as f:
+            _ = f.write(b"GIF89a\x10\x00\x08\x00" + b"\x00" * 20)
+        self.write(self.template, '<img src="/a.gif">{{ Content }}')
+        self.write(
+            os.path.join(self.content, "index.md"),
+            '# A\n\n![a](/a.gif) `<img src="/a.gif">`',
+        )
+        _ = self.build()
+
+        # Only the template's img tag and the markdown image, not the example
+        # in code
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertEqual(
+                f.read(),
+                '<img src="/a.gif" width="16" height="8" decoding="async">'
+                + '<div><h1>A</h1><p><img alt="a" decoding="async" height="8"'
+                + ' loading="lazy" src="/a.gif" width="16"></img>'
+                + ' <code><img src="/a.gif"></code></p></div>',
+            )
+
+        # A new size reaches every page, even with the same file size
+        with open(os.path.join(self.static, "a.gif"), "wb") as f:
+            _ = f.write(b"GIF89a\x20\x00\x08\x00" + b"\x00" * 20)
+        log = self.build()
+        self.assertEqual(log.count("Generating page"), 2)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertIn('width="32"', f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import cache
+from cache import BodyCache, body_key
+
+
+class TestBodyCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open(self) -> BodyCache:
+        body_cache = BodyCache(self.path)
+        self.addCleanup(body_cache.close)
+        return body_cache
+
+    def test_get_put(self):
+        body_cache = self.open()
+        self.assertIsNone(body_cache.get("a"))
+        body_cache.put("a", "Title", "<div></div>")
+        self.assertEqual(body_cache.get("a"), ("Title", "<div></div>"))
+        self.assertEqual((body_cache.hits, body_cache.misses), (1, 1))
+
+        # Kept on disk
+        body_cache.flush()
+        self.assertEqual(self.open().get("a"), ("Title", "<div></div>"))
+
+    def test_writes_batched(self):
+        body_cache = self.open()
+        other = self.open()
+        body_cache.put("a", "", "x")
+        self.assertIsNone(other.get("a"))
+
+        for i in range(cache.CACHE_BATCH_SIZE - 1):
+            body_cache.put(str(i), "", "")
+        self.assertEqual(other.get("a"), ("", "x"))
+
+        # Written on close too
+        body_cache.put("b", "", "y")
+        body_cache.close()
+        self.assertEqual(other.get("b"), ("", "y"))
+
+    def test_evict_least_recently_used(self):
+        body_cache = self.open()
+        for key in "abc":
+            body_cache.put(key, "", "x" * 10)
+        _ = body_cache.get("a")
+
+        self.assertEqual(body_cache.evict(20), 1)
+        self.assertIsNone(body_cache.get("b"))
+        self.assertIsNotNone(body_cache.get("a"))
+        self.assertIsNotNone(body_cache.get("c"))
+        self.assertEqual(body_cache.size(), 20)
+
+        self.assertEqual(body_cache.evict(20), 0)
+
+    def test_size_counts_bytes(self):
+        body_cache = self.open()
+        body_cache.put("a", "é", "ü")
+        self.assertEqual(body_cache.size(), 4)
+
+    def test_old_schema_dropped(self):
+        body_cache = BodyCache(self.path)
+        body_cache.put("a", "", "")
+        body_cache.close()
+
+        db = sqlite3.connect(self.path)
+        _ = db.execute(f"PRAGMA user_version = {cache.CACHE_VERSION + 1}")
+        db.close()
+
+        self.assertIsNone(self.open().get("a"))
+
+    def test_broken_cache_replaced(self):
+        with open(self.path, "wb") as f:
+            _ = f.write(b"not a database" * 100)
+
+        with open(self.path + "-wal", "wb") as f:
+            _ = f.write(b"stale")
+
+        body_cache = self.open()
+        body_cache.put("a", "", "")
+        self.assertEqual(body_cache.get("a"), ("", ""))
+
+    def test_unopenable_cache_kept(self):
+        # Not corrupt, so the error is raised instead of the file deleted
+        os.mkdir(self.path)
+        with self.assertRaises(sqlite3.OperationalError):
+            _ = self.open()
+        self.assertTrue(os.path.isdir(self.path))
+
+    def test_body_key(self):
+        self.assertEqual(body_key("# A", "/"), body_key("# A", "/"))
+        self.assertNotEqual(body_key("# A", "/"), body_key("# B", "/"))
+        self.assertNotEqual(body_key("# A", "/"), body_key("# A", "/base/"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from collection import (
+    CollectionConfig,
+    collect_listings,
+    generate_collections,
+    index_collection,
+    listing_html,
+    listings,
+    page_url,
+    slugify,
+)
+
+
+class TestCollection(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        self.dest = os.path.join(root, "docs")
+        self.config = CollectionConfig("blog", "Blog", per_page=2)
+
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.post("a", "---\ndate: 2024-01-01\ntags: [python, Web Dev]\n---\n# A")
+        self.post("b", "---\ndate: 2024-03-01\n---\n# B")
+        self.post("c", "---\ndate: 2024-02-01\ntags: [python]\n---\n# C")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path: str, text: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            _ = f.write(text)
+
+    def read(self, *parts: str) -> str:
+        with open(os.path.join(self.dest, *parts)) as f:
+            return f.read()
+
+    def post(self, name: str, text: str):
+        self.write(os.path.join(self.content, "blog", name, "index.md"), text)
+
+    def generate(self, previous: dict[str, str]) -> tuple[dict[str, str], str]:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            keys = generate_collections(
+                [self.config],
+                self.content,
+                self.template,
+                self.dest,
+                "/",
+                previous,
+                False,
+                set(),
+            )
+        return keys, out.getvalue()
+
+    def test_index(self):
+        posts = index_collection(self.content, self.config)
+        self.assertEqual([post.title for post in posts], ["B", "C", "A"])
+        self.assertEqual(posts[2].url, "/blog/a/")
+        self.assertEqual(posts[2].tags, ["python", "Web Dev"])
+
+    def test_index_skips_drafts_and_own_index(self):
+        self.post("d", "---\ndraft: true\n---\n# D")
+        self.post("e", "---\ndraft: True\n---\n# E")
+        self.post("f", '+++\ndraft = "yes"\n+++\n# F')
+        self.post("g", "---\ndraft: false\n---\n# G")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        posts = index_collection(self.content, self.config)
+        self.assertEqual([post.title for post in posts], ["B", "C", "A", "G"])
+
+    def test_index_missing_dir(self):
+        self.assertEqual(index_collection(self.content, CollectionConfig("x", "X")), [])
+
+    def test_title_from_metadata(self):
+        self.post("d", "---\ntitle: Front\n---\n# Heading")
+        titles = [post.title for post in index_collection(self.content, self.config)]
+        self.assertIn("Front", titles)
+
+    def test_pagination_and_tags(self):
+        pages = listings(self.config, index_collection(self.content, self.config))
+        self.assertEqual(
+            [page.dest for page in pages],
+            [
+                os.path.join("blog", "index.html"),
+                os.path.join("blog", "page", "2", "index.html"),
+                os.path.join("blog", "tags", "python", "index.html"),
+                os.path.join("blog", "tags", "web-dev", "index.html"),
+            ],
+        )
+        self.assertEqual([post.title for post in pages[1].posts], ["A"])
+        self.assertEqual(pages[0].older_url, "/blog/page/2/")
+        self.assertEqual(pages[1].newer_url, "/blog/")
+        self.assertEqual([post.title for post in pages[2].posts], ["C", "A"])
+
+    def test_listing_html(self):
+        pages = listings(self.config, index_collection(self.content, self.config))
+        self.assertEqual(
+            listing_html(pages[1], self.config, "/base/"),
+            '<div><h1>Blog (page 2)</h1><ul><li><a href="/base/blog/a/">A</a> '
+            + '<time datetime="2024-01-01">2024-01-01</time> '
+            + '<a href="/base/blog/tags/python/">#python</a> '
+            + '<a href="/base/blog/tags/web-dev/">#Web Dev</a></li></ul>'
+            + '<nav><a href="/base/blog/" rel="prev">Newer posts</a></nav></div>',
+        )
+
+    def test_only_changed_listings_are_rewritten(self):
+        keys, out = self.generate({})
+        self.assertEqual(out.count("Generating listing"), 4)
+        self.assertTrue(
+            self.read("blog", "index.html").startswith("<title>Blog</title>")
+        )
+
+        _, out = self.generate(keys)
+        self.assertEqual(out, "")
+
+        # Only on the second archive page and the tag pages
+        self.post("a", "---\ndate: 2024-01-01\ntags: [python, Web Dev]\n---\n# A2")
+        new_keys, out = self.generate(keys)
+        self.assertNotIn(os.path.join("blog", "index.html"), out)
+        self.assertEqual(out.count("Generating listing"), 3)
+        self.assertEqual(keys.keys(), new_keys.keys())
+
+    def test_removed_tag(self):
+        keys, _ = self.generate({})
+        self.post("a", "---\ndate: 2024-01-01\n---\n# A")
+        new_keys, _ = self.generate(keys)
+        self.assertNotIn(os.path.join("blog", "tags", "web-dev", "index.html"), new_keys)
+
+    def test_overwrite_page(self):
+        with self.assertRaises(Exception):
+            _ = generate_collections(
+                [self.config],
+                self.content,
+                self.template,
+                self.dest,
+                "/",
+                {},
+                False,
+                {os.path.join("blog", "index.html")},
+            )
+
+    def test_duplicate_collection(self):
+        with self.assertRaises(Exception):
+            _ = collect_listings([self.config, self.config], self.content)
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join("blog", "a", "index.md")), "/blog/a/")
+        self.assertEqual(page_url(os.path.join("blog", "a.md")), "/blog/a.html")
+
+    def test_slugify(self):
+        self.assertEqual(slugify("Web Dev!"), "web-dev")
+        # Never empty, and different tags still get different slugs
+        self.assertNotEqual(slugify("日本語"), "")
+        self.assertNotEqual(slugify("日本語"), slugify("中文"))
+        self.assertEqual(slugify("日本語"), slugify("日本語"))
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
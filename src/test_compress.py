@@ -0,0 +1,71 @@
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from compress import compress_outputs, compressed_suffixes
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = self.tmp.name
+
+        self.write("index.html", "<p>Hello</p>" * 200)
+        self.write("index.css", "body {}")
+        self.write(os.path.join("images", "a.png"), "\x89PNG" * 1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, file: str, text: str):
+        path = os.path.join(self.dest, file)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            _ = f.write(text)
+
+    def compress(self) -> tuple[set[str], str]:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            siblings = compress_outputs(
+                self.dest,
+                ["index.html", "index.css", os.path.join("images", "a.png")],
+            )
+        return siblings, out.getvalue()
+
+    def test_compress(self):
+        siblings, out = self.compress()
+        # Too small, and not text
+        self.assertEqual(siblings, {"index.html" + s for s in compressed_suffixes()})
+        self.assertEqual(out.count("Compressing"), 1)
+
+        with gzip.open(os.path.join(self.dest, "index.html.gz"), "rt") as f:
+            self.assertEqual(f.read(), "<p>Hello</p>" * 200)
+
+    def test_unchanged_outputs_are_skipped(self):
+        _ = self.compress()
+        siblings, out = self.compress()
+        self.assertEqual(out, "")
+        self.assertEqual(len(siblings), len(compressed_suffixes()))
+
+        self.write("index.html", "<p>Changed</p>" * 200)
+        _, out = self.compress()
+        self.assertEqual(out.count("Compressing"), 1)
+        with gzip.open(os.path.join(self.dest, "index.html.gz"), "rt") as f:
+            self.assertEqual(f.read(), "<p>Changed</p>" * 200)
+
+    def test_reproducible(self):
+        _ = self.compress()
+        with open(os.path.join(self.dest, "index.html.gz"), "rb") as f:
+            first = f.read()
+
+        os.remove(os.path.join(self.dest, "index.html.gz"))
+        _ = self.compress()
+        with open(os.path.join(self.dest, "index.html.gz"), "rb") as f:
+            self.assertEqual(f.read(), first)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import time
+import unittest
+
+from file import (
+    TreeIndex,
+    copy_dir,
+    copy_file,
+    list_tree,
+    prune_tree,
+    walk_tree,
+)
+
+
+class TestFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "root")
+        for path in (
+            "b.md",
+            "a/z.md",
+            "a/deep/er/x.md",
+            "a/deep/y.png",
+            "c.txt",
+            "skip/w.md",
+        ):
+            full_path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w") as f:
+                _ = f.write(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_walk_tree_order(self):
+        self.assertEqual(
+            [path for path, _ in walk_tree(self.root, dirs=True)],
+            [
+                "a",
+                "a/deep",
+                "a/deep/er",
+                "a/deep/er/x.md",
+                "a/deep/y.png",
+                "a/z.md",
+                "b.md",
+                "c.txt",
+                "skip",
+                "skip/w.md",
+            ],
+        )
+
+    def test_walk_tree_globs(self):
+        self.assertEqual(
+            [path for path, _ in walk_tree(self.root, include=["*.md"], exclude=["skip"])],
+            ["a/deep/er/x.md", "a/z.md", "b.md"],
+        )
+        self.assertEqual(
+            [path for path, _ in walk_tree(self.root, exclude=["a/deep", "*.md"])],
+            ["c.txt"],
+        )
+
+    def test_tree_index(self):
+        index = TreeIndex(self.root, ["*.md"])
+        files = [path for path, _ in walk_tree(self.root, include=["*.md"])]
+        self.assertEqual([path for path, _, _ in index.walk()], files)
+
+        # A directory changed within the last second is always listed again
+        deep = os.path.join(self.root, "a", "deep")
+        mtime_ns = os.stat(deep).st_mtime_ns
+        with open(os.path.join(deep, "new.md"), "w") as f:
+            _ = f.write("new")
+        os.utime(deep, ns=(mtime_ns, mtime_ns))
+        self.assertIn("a/deep/new.md", [path for path, _, _ in index.walk()])
+
+        # An older one only when its mtime changes
+        old_ns = time.time_ns() - 10_000_000_000
+        os.utime(deep, ns=(old_ns, old_ns))
+        _ = list(index.walk())
+        os.remove(os.path.join(deep, "new.md"))
+        os.utime(deep, ns=(old_ns, old_ns))
+        with self.assertRaises(FileNotFoundError):
+            _ = list(index.walk())
+
+        os.utime(deep)
+        self.assertEqual([path for path, _, _ in index.walk()], files)
+
+    def test_list_tree_nested_directories(self):
+        files, directories = list_tree(self.root, self.root)
+
+        self.assertNotIn("a/deep", files)
+        self.assertEqual(directories, ["a", "a/deep", "a/deep/er", "skip"])
+        self.assertEqual(len(files), 6)
+
+    def test_copy_dir_nested_directories(self):
+        dest = os.path.join(self.tmp.name, "dest")
+        copy_dir(self.root, dest)
+
+        with open(os.path.join(dest, "a", "deep", "er", "x.md")) as f:
+            self.assertEqual(f.read(), "a/deep/er/x.md")
+
+    def test_copy_file_keeps_mode(self):
+        src = os.path.join(self.root, "c.txt")
+        os.chmod(src, 0o755)
+        for mode in ("copy", "hardlink", "reflink"):
+            dest = os.path.join(self.tmp.name, mode, "c.txt")
+            copy_file(src, dest, mode)
+
+            with open(dest) as f:
+                self.assertEqual(f.read(), "c.txt")
+            self.assertEqual(os.stat(dest).st_mode & 0o777, 0o755)
+
+    def test_prune_tree(self):
+        removed = prune_tree(self.root, {"b.md", "a/deep/y.png"})
+
+        self.assertEqual(removed, ["a/deep/er/x.md", "a/z.md", "c.txt", "skip/w.md"])
+        self.assertEqual(
+            [path for path, _ in walk_tree(self.root, dirs=True)],
+            ["a", "a/deep", "a/deep/y.png", "b.md"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
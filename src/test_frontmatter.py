@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from collections.abc import Iterator
+
+from frontmatter import is_true, read_metadata, split_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_yaml(self):
+        lines = [
+            "---",
+            "# a comment",
+            "title: Hello: world",
+            "date: 2024-05-01",
+            'author: "Bilbo Baggins"',
+            "tags: [tolkien, 'elves']",
+            "",
+            "aliases:",
+            "  - /old/",
+            "- /older/",
+            "draft:",
+            "---",
+            "# Page",
+        ]
+        metadata, rest = split_front_matter(lines)
+        self.assertEqual(
+            metadata,
+            {
+                "title": "Hello: world",
+                "date": "2024-05-01",
+                "author": "Bilbo Baggins",
+                "tags": ["tolkien", "elves"],
+                "aliases": ["/old/", "/older/"],
+                "draft": [],
+            },
+        )
+        self.assertEqual(list(rest), ["# Page"])
+
+    def test_toml(self):
+        lines = [
+            "+++\n",
+            'title = "Hello = world"\n',
+            "date = 2024-05-01\n",
+            "tags = [\"tolkien\", 'elves', ]\n",
+            "+++\n",
+            "# Page\n",
+        ]
+        metadata, rest = split_front_matter(lines)
+        self.assertEqual(
+            metadata,
+            {"title": "Hello = world", "date": "2024-05-01", "tags": ["tolkien", "elves"]},
+        )
+        self.assertEqual(list(rest), ["# Page\n"])
+
+    def test_none(self):
+        for lines in ([], ["# Page", "", "---"], ["--- x", "---"]):
+            metadata, rest = split_front_matter(lines)
+            self.assertEqual(metadata, {})
+            self.assertEqual(list(rest), lines)
+
+    def test_errors(self):
+        with self.assertRaises(Exception) as cm:
+            _ = split_front_matter(["---", "title: x", "# Page"])
+        self.assertIn("never closed", str(cm.exception))
+
+        with self.assertRaises(Exception) as cm:
+            _ = split_front_matter(["---", "title: x", "not a key", "---"])
+        self.assertIn("line 3", str(cm.exception))
+
+        with self.assertRaises(Exception):
+            _ = split_front_matter(["+++", "[table]", "+++"])
+
+    def test_body_not_read(self):
+        def lines() -> Iterator[str]:
+            yield "---"
+            yield "title: x"
+            yield "---"
+            raise AssertionError("Read past the front matter")
+
+        metadata, _ = split_front_matter(lines())
+        self.assertEqual(metadata, {"title": "x"})
+
+    def test_read_metadata(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.md")
+            with open(path, "w") as f:
+                _ = f.write("---\ndate: 2024-05-01\n---\n\n# Page\n")
+
+            self.assertEqual(read_metadata(path), {"date": "2024-05-01"})
+
+    def test_is_true(self):
+        for value in ("true", "True", "TRUE", "yes", "on"):
+            self.assertTrue(is_true(value))
+        for value in ("false", "no", "", "1", ["true"], None):
+            self.assertFalse(is_true(value))
+
+
+if __name__ == "__main__":
+    unittest.main()
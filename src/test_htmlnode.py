@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -100,6 +101,88 @@ class TestTextNode(unittest.TestCase):
             '<div hello="world"><span><b>grandchild</b><b>grandchild</b><b>grandchild</b><b>grandchild</b></span></div>',
         )
 
+    def test_slots(self):
+        level = 2
+        nodes = [
+            HTMLNode(f"h{level}"),
+            LeafNode(f"h{level}", "text"),
+            ParentNode(f"h{level}", []),
+        ]
+
+        for node in nodes:
+            self.assertFalse(hasattr(node, "__dict__"))
+            self.assertIs(node.tag, nodes[0].tag)
+
+    def test_start_tag_invalidation(self):
+        node = LeafNode("a", "link", {"href": "/one"})
+        self.assertEqual(node.to_html(), '<a href="/one">link</a>')
+
+        node.props = {"href": "/two"}
+        self.assertEqual(node.to_html(), '<a href="/two">link</a>')
+
+        node.set_prop("target", "blank")
+        self.assertEqual(node.to_html(), '<a href="/two" target="blank">link</a>')
+
+        node.tag = "b"
+        node.props = None
+        self.assertEqual(node.to_html(), "<b>link</b>")
+
+        node.set_prop("class", "x")
+        self.assertEqual(node.to_html(), '<b class="x">link</b>')
+
+        # Props can not be changed in place, which the start tag would miss
+        with self.assertRaises(TypeError):
+            node.props["class"] = "y"  # pyright: ignore[reportOptionalSubscript, reportIndexIssue]
+        self.assertEqual(node.to_html(), '<b class="x">link</b>')
+
+    def test_iter_html(self):
+        parent_node = ParentNode(
+            "div",
+            [LeafNode("b", "bold"), ParentNode("p", [LeafNode(None, "text")])],
+            {"class": "x"},
+        )
+        self.assertEqual(
+            list(parent_node.iter_html()),
+            ['<div class="x">', "<b>bold</b>", "<p>", "text", "</p>", "</div>"],
+        )
+
+    def test_write_html(self):
+        node = LeafNode(None, "leaf")
+        for _ in range(200):
+            node = ParentNode("div", [LeafNode("i", "x" * 200), node])
+
+        stream = io.StringIO()
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), node.to_html())
+
+    def test_minify(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "a"), LeafNode("img", "", {"src": "x"})]),
+                ParentNode("ul", [LeafNode("li", "x"), ParentNode("li", [LeafNode("b", "y")])]),
+                LeafNode("p", "b"),
+                LeafNode("span", "c"),
+                ParentNode("pre", [LeafNode("code", "  x\n</p>")]),
+                ParentNode("a", [LeafNode("p", "d")]),
+                LeafNode("p", "e"),
+            ],
+        )
+        expected = (
+            '<div><p>a<img src="x"><ul><li>x<li><b>y</b></ul><p>b</p><span>c</span>'
+            + "<pre><code>  x\n</p></code></pre><a><p>d</p></a><p>e</div>"
+        )
+        self.assertEqual(node.to_html(minify=True), expected)
+        self.assertEqual("".join(node.iter_html(minify=True)), expected)
+
+        stream = io.StringIO()
+        node.write_html(stream, minify=True)
+        self.assertEqual(stream.getvalue(), expected)
+
+    def test_iter_html_no_children(self):
+        with self.assertRaises(ValueError):
+            _ = list(ParentNode("div", None).iter_html())  # pyright: ignore[reportArgumentType]
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,152 @@
+import io
+import os
+import struct
+import tempfile
+import unittest
+
+from image import (
+    Image,
+    add_image_attributes,
+    generate_variants,
+    image_props,
+    image_size,
+    index_images,
+    variant_path,
+)
+from manifest import ImageState, hash_tree
+
+
+def png(width: int, height: int) -> bytes:
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + struct.pack(">I", 13)
+        + b"IHDR"
+        + struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    )
+
+
+def jpeg(width: int, height: int) -> bytes:
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHH", 11, 8, height, width) + b"\x03"
+    return b"\xff\xd8" + app0 + b"\xff\xff" + sof0 + b"\xff\xd9"
+
+
+class TestImage(unittest.TestCase):
+    def test_image_size(self):
+        webp_lossy = (
+            b"RIFF\x00\x00\x00\x00WEBPVP8 \x00\x00\x00\x00"
+            + b"\x00\x00\x00\x9d\x01\x2a"
+            + struct.pack("<HH", 640, 480)
+        )
+        webp_lossless = (
+            b"RIFF\x00\x00\x00\x00WEBPVP8L\x00\x00\x00\x00\x2f"
+            + ((640 - 1) | (480 - 1) << 14).to_bytes(4, "little")
+            + b"\x00" * 5
+        )
+        webp_extended = (
+            b"RIFF\x00\x00\x00\x00WEBPVP8X\x00\x00\x00\x00"
+            + b"\x00" * 4
+            + (640 - 1).to_bytes(3, "little")
+            + (480 - 1).to_bytes(3, "little")
+        )
+        for data in (
+            png(640, 480),
+            b"GIF89a" + struct.pack("<HH", 640, 480) + b"\x00" * 20,
+            jpeg(640, 480),
+            webp_lossy,
+            webp_lossless,
+            webp_extended,
+        ):
+            self.assertEqual(image_size(io.BytesIO(data)), (640, 480))
+
+        self.assertIsNone(image_size(io.BytesIO(b"<svg></svg>")))
+        self.assertIsNone(image_size(io.BytesIO(b"\xff\xd8\xff\xd9")))
+
+    def test_index_images(self):
+        with tempfile.TemporaryDirectory() as static_path:
+            for file, data in (
+                ("a.png", png(100, 50)),
+                ("b.jpg", jpeg(20, 10)),
+                ("c.svg", b"<svg></svg>"),
+                ("d.png", b"not really"),
+            ):
+                with open(os.path.join(static_path, file), "wb") as f:
+                    _ = f.write(data)
+
+            static = hash_tree(static_path)
+            images = index_images(static_path, static)
+            self.assertEqual(
+                {file: (i.width, i.height) for file, i in images.items()},
+                {"a.png": (100, 50), "b.jpg": (20, 10)},
+            )
+
+            # Unchanged images are taken from previous without being read
+            previous = {
+                "a.png": ImageState(static["a.png"].hash, 1, 2),
+                "b.jpg": ImageState("stale", 3, 4),
+            }
+            images = index_images(static_path, static, previous)
+            self.assertEqual((images["a.png"].width, images["a.png"].height), (1, 2))
+            self.assertEqual((images["b.jpg"].width, images["b.jpg"].height), (20, 10))
+
+    def test_image_props(self):
+        images = {
+            os.path.join("images", "a.png"): ImageState(
+                "0123456789", 1000, 500, [480, 960]
+            ),
+            "b.gif": ImageState("abcdef", 10, 20),
+        }
+        urls = {"/base/images/a.png": "/x.png"}
+        props = image_props(images, "/base/", urls)
+        self.assertEqual(
+            props["/base/b.gif"], {"width": "10", "height": "20", "decoding": "async"}
+        )
+        self.assertEqual(
+            props["/base/images/a.png"],
+            {
+                "width": "1000",
+                "height": "500",
+                "decoding": "async",
+                "srcset": "/base/images/a.01234567.480w.png 480w, "
+                + "/base/images/a.01234567.960w.png 960w, /x.png 1000w",
+                "sizes": "(max-width: 1000px) 100vw, 1000px",
+            },
+        )
+
+    def test_add_image_attributes(self):
+        images = {"/a.png": {"width": "1", "height": "2"}}
+        html = (
+            '<img alt="a" src="/a.png"><img src="/a.png" />'
+            + '<img src="/b.png"><img src="/a.png" width="5"><img alt="src">'
+        )
+        self.assertEqual(
+            add_image_attributes(html, images),
+            '<img alt="a" src="/a.png" width="1" height="2">'
+            + '<img src="/a.png" width="1" height="2"/>'
+            + '<img src="/b.png"><img src="/a.png" width="5"><img alt="src">',
+        )
+
+    @unittest.skipIf(Image is None, "Pillow is not installed")
+    def test_generate_variants(self):
+        with tempfile.TemporaryDirectory() as root:
+            static_path = os.path.join(root, "static")
+            dest_path = os.path.join(root, "docs")
+            cache_path = os.path.join(root, "cache")
+            os.makedirs(static_path)
+            image = Image.new("RGB", (1000, 500))  # pyright: ignore[reportOptionalMemberAccess]
+            image.save(os.path.join(static_path, "a.png"))
+
+            static = hash_tree(static_path)
+            images = index_images(static_path, static)
+            variants = generate_variants(static_path, dest_path, cache_path, images)
+            self.assertEqual(
+                variants,
+                [variant_path("a.png", static["a.png"].hash, w) for w in (480, 960)],
+            )
+            self.assertEqual(images["a.png"].variants, [480, 960])
+            with open(os.path.join(dest_path, variants[0]), "rb") as f:
+                self.assertEqual(image_size(f), (480, 240))
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -1,7 +1,18 @@
 from typing import Literal
+import io
 import unittest
 
-from markdown import extract_title, markdown_to_html_node
+from markdown import (
+    MEMO_MAX_TEXT,
+    Heading,
+    InlineMemo,
+    document_title,
+    extract_title,
+    markdown_to_document,
+    markdown_to_html_chunks,
+    markdown_to_html_node,
+    text_to_children,
+)
 
 
 class TestMarkdown(unittest.TestCase):
@@ -137,6 +148,178 @@ Pull requests are welcome!
             "<div><ol><li>One</li><li>Two</li><li>Three</li><li>Four</li><li>Five</li><li>Six</li><li>Seven</li><li>Eight</li><li>Nine</li><li>Ten</li></ol></div>",
         )
 
+    def test_ordered_list_with_sentences(self):
+        md = """
+1. First. Then more.
+2. Second
+"""
+
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html, "<div><ol><li>First. Then more.</li><li>Second</li></ol></div>"
+        )
+
+    def test_base_path(self):
+        md = """
+[Home](/index.html) [Out](https://example.com/) ![Logo](/images/logo.png)
+
+```
+<a href="/untouched">
+```
+"""
+
+        node = markdown_to_html_node(md, "/site/")
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="/site/index.html">Home</a> <a href="https://example.com/">Out</a> <img alt="Logo" src="/site/images/logo.png"></img></p><pre><code><a href="/untouched">\n</code></pre></div>',
+        )
+
+    def test_html_chunks(self):
+        md = """
+# Title
+
+Some **text**
+with [a link](/a)
+
+- One
+- Two
+
+```
+code
+```
+"""
+
+        chunks = markdown_to_html_chunks(io.StringIO(md), "/base/")
+        self.assertEqual(
+            "".join(chunks), markdown_to_html_node(md, "/base/").to_html()
+        )
+
+    def test_html_chunks_minified(self):
+        md = """
+# Title
+
+Some **text** with ![an image](/a.png)
+
+- One
+- Two
+
+```
+  code  </p>
+```
+
+> Quote
+"""
+
+        chunks = markdown_to_html_chunks(io.StringIO(md), "/base/", minify=True)
+        expected = markdown_to_html_node(md, "/base/").to_html(minify=True)
+        self.assertEqual("".join(chunks), expected)
+        self.assertEqual(
+            expected,
+            '<div><h1>Title</h1><p>Some <b>text</b> with <img alt="an image" '
+            + 'src="/base/a.png"><ul><li>One<li>Two</ul>'
+            + "<pre><code>  code  </p>\n</code></pre>"
+            + "<blockquote>Quote</blockquote></div>",
+        )
+
+        memo = InlineMemo(minify=True)
+        chunks = markdown_to_html_chunks(io.StringIO(md), "/base/", memo, minify=True)
+        self.assertEqual("".join(chunks), expected)
+
+    def test_inline_memo(self):
+        memo = InlineMemo(size=2)
+        text = "[Home](/) and **more**"
+        expected = "".join(node.to_html() for node in text_to_children(text, "/b/"))
+
+        for _ in range(3):
+            nodes = memo(text, "/b/")
+            self.assertEqual("".join(node.to_html() for node in nodes), expected)
+        self.assertEqual(memo.stats(), (2, 1))
+
+        # Every hit is a fresh node
+        self.assertIsNot(memo(text, "/b/")[0], memo(text, "/b/")[0])
+
+        # Rebased links differ per base path
+        self.assertIn('href="/c/"', memo(text, "/c/")[0].to_html())
+        self.assertEqual(memo.stats(), (4, 2))
+
+        # Least recently used is dropped
+        _ = memo("a", "/")
+        _ = memo("b", "/")
+        _ = memo(text, "/b/")
+        self.assertEqual(memo.stats(), (4, 5))
+
+        # Long text is never memoized
+        _ = memo("x" * (MEMO_MAX_TEXT + 1), "/")
+        self.assertEqual(memo.stats(), (4, 5))
+
+    def test_html_chunks_memoized(self):
+        md = "\n".join(f"- [Item](/{i % 3}) **bold**" for i in range(30))
+        memo = InlineMemo()
+        chunks = markdown_to_html_chunks(io.StringIO(md), "/base/", memo)
+        self.assertEqual(
+            "".join(chunks), markdown_to_html_node(md, "/base/").to_html()
+        )
+        self.assertEqual(memo.stats(), (27, 3))
+
+    def test_document(self):
+        md = """
+# Title
+
+Intro with [a link](/a)
+
+## Setup **now**
+
+```
+# not a heading
+```
+
+### Details
+"""
+        document = markdown_to_document(io.StringIO(md), "/base/")
+        self.assertEqual(
+            document.node.to_html(), markdown_to_html_node(md, "/base/").to_html()
+        )
+        self.assertEqual(document.title, "Title")
+        self.assertEqual(
+            document.outline,
+            [Heading(1, "Title"), Heading(2, "Setup **now**"), Heading(3, "Details")],
+        )
+        self.assertEqual(document.metadata, {})
+
+    def test_front_matter(self):
+        md = "---\ntags: [a, b]\n# not the title\n---\n\n# Title\n\nText"
+        document = markdown_to_document(md.split("\n"))
+        self.assertEqual(document.metadata, {"tags": ["a", "b"]})
+        self.assertEqual(document.title, "Title")
+        self.assertEqual(extract_title(md), "Title")
+
+        expected = "<div><h1>Title</h1><p>Text</p></div>"
+        self.assertEqual(document.node.to_html(), expected)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual("".join(markdown_to_html_chunks(io.StringIO(md))), expected)
+
+    def test_document_title_matches_extract_title(self):
+        test_cases = [
+            "# Title",
+            "Paragraph\n# Title inside it",
+            "```\n# In code\n```\n\n# Later",
+            "## No H1",
+            "",
+        ]
+
+        for md in test_cases:
+            document = markdown_to_document(md.split("\n"))
+            try:
+                expected = extract_title(md)
+            except Exception:
+                self.assertIsNone(document.title, md)
+                with self.assertRaises(Exception):
+                    _ = document_title(document)
+            else:
+                self.assertEqual(document_title(document), expected, md)
+
     def test_extract_title(self):
         test_cases: list[tuple[str, str | None]] = [
             ("# Hello", "Hello"),
@@ -1,6 +1,13 @@
+import io
 import unittest
 
-from markdown_blocks import BlockType, block_to_block_type, markdown_to_blocks
+from markdown_blocks import (
+    Block,
+    BlockType,
+    block_to_block_type,
+    markdown_to_blocks,
+    parse_blocks,
+)
 
 
 class TestTextNode(unittest.TestCase):
@@ -72,6 +79,31 @@ Run HTML, the programming language code outside of the browser.
             actual = markdown_to_blocks(input)
             self.assertEqual(actual, expected)
 
+    def test_parse_blocks(self):
+        md = io.StringIO(
+            "  # Title  \n\n\n\nSome text\nover lines\n   \n\n- a\n- b\n\n \n\n> quote\n"
+        )
+        self.assertEqual(
+            list(parse_blocks(md)),
+            [
+                Block("Heading", ["# Title"], ["# Title"]),
+                Block("Paragraph", ["Some text", "over lines"], ["Some text", "over lines"]),
+                Block("UnorderedList", ["- a", "- b"], ["a", "b"]),
+                Block("Quote", ["> quote"], ["quote"]),
+            ],
+        )
+
+    def test_parse_blocks_is_lazy(self):
+        def lines():
+            yield "First block"
+            yield ""
+            raise AssertionError("Read past the first block")
+
+        blocks = parse_blocks(lines())
+        self.assertEqual(
+            next(blocks), Block("Paragraph", ["First block"], ["First block"])
+        )
+
     def test_block_to_block_type(self):
         test_cases: list[tuple[str, BlockType]] = [
             (
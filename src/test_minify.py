@@ -0,0 +1,54 @@
+import unittest
+
+from minify import minify_html
+
+
+class TestMinify(unittest.TestCase):
+    def test_template(self):
+        template = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <!-- The stylesheet -->
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+        self.assertEqual(
+            minify_html(template),
+            '<!doctype html><html><head><meta charset="utf-8"><title>{{ Title }}'
+            + '</title><link href="/index.css" rel="stylesheet"></head><body>'
+            + "<article>{{ Content }}</article></body></html>",
+        )
+
+    def test_inline_whitespace(self):
+        self.assertEqual(
+            minify_html("<p>\n  a  <b>b</b>\n <i>c</i> <!-- x --> d\n</p>"),
+            "<p>a <b>b</b> <i>c</i> d</p>",
+        )
+
+    def test_raw_elements(self):
+        for html in (
+            "<pre>  a\n\n  b  </pre>",
+            "<PRE class='x'> <!-- kept -->  </PRE>",
+            "<textarea>  a  </textarea>",
+            "<script>if (a  <  b) {}</script>",
+            "<style>\n  p  { }\n</style>",
+        ):
+            self.assertEqual(minify_html(html), html)
+
+    def test_text_with_angle_bracket(self):
+        self.assertEqual(minify_html("<p>a  <  b</p>"), "<p>a < b</p>")
+
+    def test_conditional_comment(self):
+        html = "<!--[if IE]><p>Old</p><![endif]-->"
+        self.assertEqual(minify_html(html), html)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
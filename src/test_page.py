@@ -0,0 +1,176 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import page
+from cache import BodyCache
+from page import chunk_pages, generate_pages, generate_pages_recursive, write_page
+from template import compile_template
+from profiler import PAGE_STAGES, Profiler
+
+
+class TestPage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+
+        for i in range(8):
+            body = "\n\n".join(f"Paragraph **{j}**" for j in range(i * 10))
+            self.write(os.path.join(self.content, f"p{i}", "index.md"), f"# P{i}\n\n{body}")
+        self.write(self.template, '<a href="/">{{ Title }}</a>{{ Content }}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path: str, text: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            _ = f.write(text)
+
+    def generate(self, dest: str, jobs: int) -> dict[str, str]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, dest, "/base/", jobs
+            )
+
+        return self.read_tree(dest)
+
+    def read_tree(self, dest: str) -> dict[str, str]:
+        pages = dict[str, str]()
+        for dir, _, files in os.walk(dest):
+            for file in files:
+                with open(os.path.join(dir, file)) as f:
+                    pages[os.path.relpath(os.path.join(dir, file), dest)] = f.read()
+        return pages
+
+    def test_parallel_matches_serial(self):
+        serial = self.generate(os.path.join(self.tmp.name, "serial"), 1)
+        parallel = self.generate(os.path.join(self.tmp.name, "parallel"), 3)
+        self.assertEqual(len(serial), 8)
+        self.assertEqual(serial, parallel)
+
+    def test_profiled_matches_serial(self):
+        serial = self.generate(os.path.join(self.tmp.name, "serial"), 1)
+
+        dest = os.path.join(self.tmp.name, "profiled")
+        pages = [
+            (
+                os.path.join(self.content, os.path.dirname(path), "index.md"),
+                os.path.join(dest, path),
+            )
+            for path in serial
+        ]
+        for jobs in (1, 2):
+            profiler = Profiler()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages(pages, self.template, "/base/", jobs, profiler)
+
+            self.assertEqual(self.read_tree(dest), serial)
+            self.assertEqual(len(profiler.pages), len(pages))
+            for stages in profiler.pages.values():
+                self.assertEqual(tuple(stages), PAGE_STAGES)
+
+    def test_parallel_errors_reported_together(self):
+        p2 = os.path.join(self.content, "p2", "index.md")
+        p5 = os.path.join(self.content, "p5", "index.md")
+        self.write(p2, "No title")
+        self.write(p5, "No title")
+
+        with self.assertRaises(Exception) as cm:
+            _ = self.generate(os.path.join(self.tmp.name, "out"), 3)
+
+        # One line per page, in page order. Look for whole lines: a bare "p5"
+        # can also turn up in the random temporary directory name.
+        lines = str(cm.exception).splitlines()
+        self.assertEqual(lines[0], "Failed to generate 2 page(s):")
+        self.assertEqual(
+            [line.split(": ", 1)[0] for line in lines[1:]], [f"  {p2}", f"  {p5}"]
+        )
+
+    def test_cached_matches_serial(self):
+        serial = self.generate(os.path.join(self.tmp.name, "serial"), 1)
+
+        dest = os.path.join(self.tmp.name, "cached")
+        cache_path = os.path.join(self.tmp.name, "cache.sqlite")
+        pages = [
+            (
+                os.path.join(self.content, os.path.dirname(path), "index.md"),
+                os.path.join(dest, path),
+            )
+            for path in serial
+        ]
+        # Cold, then warm from the serial path, then warm from the workers
+        for jobs in (1, 1, 3):
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages(pages, self.template, "/base/", jobs, None, cache_path)
+
+            self.assertEqual(self.read_tree(dest), serial)
+
+    def test_cache_survives_template_change(self):
+        src = os.path.join(self.content, "p1", "index.md")
+        dest = os.path.join(self.tmp.name, "out.html")
+        cache = BodyCache(os.path.join(self.tmp.name, "cache.sqlite"))
+        self.addCleanup(cache.close)
+
+        write_page(src, compile_template("{{ Content }}", "/"), dest, "/", cache)
+        write_page(src, compile_template("<b>{{ Title }}</b>", "/"), dest, "/", cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        with open(dest) as f:
+            self.assertEqual(f.read(), "<b>P1</b>")
+
+        # Links are rebased, so another base path is another body
+        write_page(src, compile_template("{{ Content }}", "/"), dest, "/base/", cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_front_matter_fills_template(self):
+        src = os.path.join(self.content, "fm", "index.md")
+        self.write(src, "---\ndate: 2024-05-01\ntags: [a, b]\n---\n# Post\n\nText")
+        dest = os.path.join(self.tmp.name, "out.html")
+        template = compile_template("{{ date }}|{{ tags }}|{{ Title }}|{{ Content }}", "/")
+        cache = BodyCache(os.path.join(self.tmp.name, "cache.sqlite"))
+        self.addCleanup(cache.close)
+
+        max_size = page.MAX_DOCUMENT_SIZE
+        self.addCleanup(setattr, page, "MAX_DOCUMENT_SIZE", max_size)
+        # Parsed, cold and warm cache, then streamed
+        runs = [(None, max_size), (cache, max_size), (cache, max_size), (None, 0)]
+        for cached, size in runs:
+            page.MAX_DOCUMENT_SIZE = size
+            write_page(src, template, dest, "/", cached)
+            with open(dest) as f:
+                self.assertEqual(
+                    f.read(), "2024-05-01|a, b|Post|<div><h1>Post</h1><p>Text</p></div>"
+                )
+        self.assertEqual(cache.hits, 1)
+
+    def test_large_page_skips_cache(self):
+        src = os.path.join(self.content, "p7", "index.md")
+        dest = os.path.join(self.tmp.name, "out.html")
+        cache = BodyCache(os.path.join(self.tmp.name, "cache.sqlite"))
+        self.addCleanup(cache.close)
+
+        max_size = page.MAX_DOCUMENT_SIZE
+        page.MAX_DOCUMENT_SIZE = os.path.getsize(src) - 1
+        self.addCleanup(setattr, page, "MAX_DOCUMENT_SIZE", max_size)
+
+        write_page(src, compile_template("{{ Content }}", "/"), dest, "/", cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+        self.assertEqual(cache.size(), 0)
+
+    def test_chunk_pages(self):
+        pages = [
+            (os.path.join(self.content, f"p{i}", "index.md"), f"p{i}.html")
+            for i in range(8)
+        ]
+        chunks = chunk_pages(pages, 4)
+
+        self.assertEqual(sorted(page for chunk in chunks for page in chunk), pages)
+        # Largest page goes out first
+        self.assertEqual(chunks[0][0], pages[7])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import json
+import os
+import tempfile
+import unittest
+
+from profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = Profiler()
+        self.profiler.add_page("fast.md", {"read": 0.001, "write": 0.001})
+        self.profiler.add_page("slow.md", {"read": 0.001, "write": 0.5})
+        self.profiler.build["copy"] = 0.25
+
+    def test_report(self):
+        report = self.profiler.report(1)
+
+        self.assertIn("slow.md", report)
+        self.assertNotIn("fast.md", report)
+        self.assertIn("(mostly write)", report)
+        self.assertIn("501.00 ms", report)
+        self.assertIn("copy", report)
+
+    def test_write_trace(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            self.profiler.write_trace(path)
+
+            with open(path) as f:
+                trace = json.load(f)
+
+        self.assertEqual(trace["build"], {"copy": 0.25})
+        self.assertEqual(trace["totals"]["write"], 0.501)
+        self.assertEqual([page["path"] for page in trace["pages"]], ["fast.md", "slow.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from collection import CollectionConfig
+from serve import LIVE_RELOAD_PATH, LIVE_RELOAD_SCRIPT, DevServer
+
+
+class TestDevServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.static = os.path.join(root, "static")
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post")
+        self.write(
+            self.template,
+            '<link href="/index.css"><body>{{ Title }}{{ Content }}</body>',
+        )
+
+        self.dev_server = DevServer(self.static, self.content, self.template, "/base/")
+        self.server = await self.dev_server.start("127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.tmp.cleanup()
+
+    def write(self, path: str, text: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            _ = f.write(text)
+
+    async def get(
+        self, path: str, method: str = "GET"
+    ) -> tuple[int, dict[str, str], bytes]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n".encode()
+        )
+        response = await reader.read()
+        writer.close()
+
+        head, _, body = response.partition(b"\r\n\r\n")
+        status_line, *header_lines = head.decode().split("\r\n")
+        headers = dict[str, str]()
+        for line in header_lines:
+            name, _, value = line.partition(": ")
+            headers[name.lower()] = value
+
+        return int(status_line.split()[1]), headers, body
+
+    async def refresh(self) -> list[str]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return await self.dev_server.refresh()
+
+    async def test_page(self):
+        status, headers, body = await self.get("/base/blog/post/")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-type"], "text/html; charset=utf-8")
+        self.assertEqual(
+            body.decode(),
+            '<link href="/base/index.css"><body>Post<div><h1>Post</h1></div>'
+            + LIVE_RELOAD_SCRIPT
+            + "</body>",
+        )
+        self.assertEqual(int(headers["content-length"]), len(body))
+
+    async def test_static(self):
+        status, headers, body = await self.get("/base/index.css")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-type"], "text/css")
+        self.assertEqual(body, b"body {}")
+
+    async def test_head(self):
+        status, headers, body = await self.get("/base/index.css", "HEAD")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-length"], "7")
+        self.assertEqual(body, b"")
+
+    async def test_redirect(self):
+        status, headers, _ = await self.get("/base/blog/post")
+        self.assertEqual(status, 301)
+        self.assertEqual(headers["location"], "/base/blog/post/")
+
+        status, headers, _ = await self.get("/base")
+        self.assertEqual(status, 301)
+        self.assertEqual(headers["location"], "/base/")
+
+    async def test_not_found(self):
+        for path in ("/index.css", "/base/missing.html", "/base/../template.html"):
+            status, _, _ = await self.get(path)
+            self.assertEqual(status, 404, path)
+
+        status, _, _ = await self.get("/base/", "POST")
+        self.assertEqual(status, 405)
+
+    async def test_invalidation(self):
+        _, _, body = await self.get("/base/")
+        self.assertIn(b"<h1>Home</h1>", body)
+
+        self.write(os.path.join(self.content, "index.md"), "# Changed")
+        _, _, body = await self.get("/base/")
+        self.assertIn(b"<h1>Home</h1>", body)
+
+        self.assertEqual(await self.refresh(), [os.path.join(self.content, "index.md")])
+        _, _, body = await self.get("/base/")
+        self.assertIn(b"<h1>Changed</h1>", body)
+
+        self.write(self.template, "<p>{{ Title }}</p>{{ Content }}")
+        self.assertEqual(await self.refresh(), [self.template])
+        _, _, body = await self.get("/base/blog/post/index.html")
+        self.assertTrue(body.startswith(b"<p>Post</p>"))
+
+        self.assertEqual(await self.refresh(), [])
+
+    async def test_image_size_change(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![a](/a.gif)")
+        self.write(os.path.join(self.static, "a.gif"), "GIF89a\x10\x00\x08\x00")
+        _ = await self.refresh()
+        _, _, body = await self.get("/base/")
+        self.assertIn(b'height="8" loading="lazy" src="/base/a.gif" width="16"', body)
+
+        # Same size, written within a tick of the last check
+        self.write(os.path.join(self.static, "a.gif"), "GIF89a\x20\x00\x08\x00")
+        self.assertEqual(await self.refresh(), [os.path.join(self.static, "a.gif")])
+        _, _, body = await self.get("/base/")
+        self.assertIn(b'height="8" loading="lazy" src="/base/a.gif" width="32"', body)
+
+    async def test_listing(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.dev_server = DevServer(
+            self.static,
+            self.content,
+            self.template,
+            "/base/",
+            [CollectionConfig("blog", "Blog")],
+        )
+        self.server = await self.dev_server.start("127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+        status, _, body = await self.get("/base/blog/")
+        self.assertEqual(status, 200)
+        self.assertIn(b'<a href="/base/blog/post/">Post</a>', body)
+        self.assertIn(LIVE_RELOAD_SCRIPT.encode(), body)
+
+        self.write(os.path.join(self.content, "blog", "new", "index.md"), "# New")
+        _ = await self.refresh()
+        _, _, body = await self.get("/base/blog/")
+        self.assertIn(b'<a href="/base/blog/new/">New</a>', body)
+
+    async def test_render_error(self):
+        self.write(os.path.join(self.content, "index.md"), "No title")
+        _ = await self.refresh()
+        with contextlib.redirect_stdout(io.StringIO()):
+            status, _, body = await self.get("/base/")
+        self.assertEqual(status, 500)
+        self.assertIn(b"index.md", body)
+
+    async def test_live_reload(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(f"GET {LIVE_RELOAD_PATH} HTTP/1.1\r\n\r\n".encode())
+        head = await reader.readuntil(b"\r\n\r\n")
+        self.assertIn(b"text/event-stream", head)
+
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.assertEqual(await self.refresh(), [os.path.join(self.static, "index.css")])
+        self.assertEqual(await reader.readuntil(b"\n\n"), b"data: reload\n\n")
+
+        writer.close()
+
+    async def test_concurrent(self):
+        results = await asyncio.gather(
+            *(self.get("/base/" if i % 2 else "/base/index.css") for i in range(300))
+        )
+        self.assertEqual({status for status, _, _ in results}, {200})
+
+    async def test_keep_alive(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        for _ in range(3):
+            writer.write(b"GET /base/index.css HTTP/1.1\r\n\r\n")
+            head = await reader.readuntil(b"\r\n\r\n")
+            self.assertIn(b"Connection: keep-alive", head)
+            self.assertEqual(await reader.readexactly(7), b"body {}")
+
+        writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
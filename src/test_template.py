@@ -0,0 +1,50 @@
+import io
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import compile_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = compile_template(
+            "<title>{{ Title }}</title><main>{{ Content }}</main>", "/"
+        )
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>Body</p>"}),
+            "<title>Hi</title><main><p>Body</p></main>",
+        )
+
+    def test_segments(self):
+        template = compile_template("a{{ Title }}b{{ Content }}", "/")
+        self.assertEqual(template.segments, ["a", "{{ Title }}", "b", "{{ Content }}", ""])
+        self.assertEqual(template.slots, [(1, "Title"), (3, "Content")])
+
+    def test_unfilled_slot(self):
+        template = compile_template("{{ Title }} {{ Author }}", "/")
+        self.assertEqual(template.render({"Title": "Hi"}), "Hi {{ Author }}")
+
+    def test_base_path(self):
+        template = compile_template(
+            '<link href="/index.css" /><script src="/app.js"></script>'
+            '<img src="//cdn.example.com/a.png" />{{ Content }}',
+            "/site/",
+        )
+        self.assertEqual(
+            template.render({"Content": '<code>href="/raw"</code>'}),
+            '<link href="/site/index.css" /><script src="/site/app.js"></script>'
+            '<img src="//cdn.example.com/a.png" /><code>href="/raw"</code>',
+        )
+
+    def test_write(self):
+        template = compile_template("<h1>{{ Title }}</h1>{{ Content }}{{ Other }}", "/")
+        stream = io.StringIO()
+        template.write(
+            stream,
+            {"Title": "Hi", "Content": ParentNode("p", [LeafNode("b", "Body")])},
+        )
+        self.assertEqual(stream.getvalue(), "<h1>Hi</h1><p><b>Body</b></p>{{ Other }}")
+
+
+if __name__ == "__main__":
+    unittest.main()
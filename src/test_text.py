@@ -1,6 +1,13 @@
+import random
 import unittest
 
-from text import extract_markdown_images, extract_markdown_links
+from text import (
+    extract_markdown_images,
+    extract_markdown_links,
+    image_re,
+    link_re,
+    scan_markdown_images_and_links,
+)
 
 
 class TestText(unittest.TestCase):
@@ -56,6 +63,46 @@ class TestText(unittest.TestCase):
             actual = extract_markdown_links(input)
             self.assertEqual(actual, expected)
 
+    def test_scan_markdown_images_and_links(self):
+        test_cases: list[tuple[str, list[tuple[int, int, bool, str, str]]]] = [
+            (
+                "A [link](/a) and ![an image](/b.png)",
+                [(2, 12, False, "link", "/a"), (17, 36, True, "an image", "/b.png")],
+            ),
+            ("[not a link] (/a) !(/b)", []),
+            # The image wins over the link it overlaps
+            ("[a](b ![c)](d)", [(6, 14, True, "c)", "d")]),
+            ("[a](b ![c) d", [(0, 10, False, "a", "b ![c")]),
+        ]
+
+        for input, expected in test_cases:
+            actual = scan_markdown_images_and_links(input)
+            self.assertEqual(actual, expected, input)
+
+        # A "!" before the range makes it neither an image nor a link
+        self.assertEqual(scan_markdown_images_and_links("![a](b)", 1), [])
+        self.assertEqual(
+            scan_markdown_images_and_links("x [a](b) [c](d)", 2, 8),
+            [(2, 8, False, "a", "b")],
+        )
+
+    def test_scan_matches_two_passes(self):
+        rng = random.Random(0)
+        for _ in range(5000):
+            text = "".join(rng.choice("![]()ab ") for _ in range(rng.randint(0, 24)))
+
+            expected = list[tuple[int, int, bool, str, str]]()
+            start = 0
+            for image in image_re.finditer(text):
+                for link in link_re.finditer(text, start, image.start()):
+                    expected.append((*link.span(), False, link[1], link[2]))
+                expected.append((*image.span(), True, image[1], image[2]))
+                start = image.end()
+            for link in link_re.finditer(text, start):
+                expected.append((*link.span(), False, link[1], link[2]))
+
+            self.assertEqual(scan_markdown_images_and_links(text), expected, text)
+
 
 if __name__ == "__main__":
     unittest.main()
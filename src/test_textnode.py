@@ -1,6 +1,8 @@
 from typing import Literal
+import random
 import unittest
 
+from asset import AssetMap
 from textnode import (
     TextNode,
     split_nodes_delimiter,
@@ -89,9 +91,31 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(html_node.value, "")
         self.assertEqual(html_node.children, None)
         self.assertEqual(
-            html_node.props, {"href": "public/cat.png", "alt": "This is an image node"}
+            html_node.props, {"src": "public/cat.png", "alt": "This is an image node"}
         )
 
+    def test_assets(self):
+        assets = AssetMap(
+            {"/base/a.png": "/base/a.1.png", "/base/a.css": "/base/a.2.css"},
+            {"/base/b.png": {"width": "1", "height": "2"}},
+        )
+        for node, props in (
+            (TextNode("a", "Image", "/a.png"), {"src": "/base/a.1.png", "alt": "a"}),
+            (
+                TextNode("b", "Image", "/b.png"),
+                {
+                    "src": "/base/b.png",
+                    "alt": "b",
+                    "width": "1",
+                    "height": "2",
+                    "loading": "lazy",
+                },
+            ),
+            (TextNode("a", "Link", "/a.css"), {"href": "/base/a.2.css"}),
+            (TextNode("b", "Link", "/b.css"), {"href": "/base/b.css"}),
+        ):
+            self.assertEqual(text_node_to_html_node(node, "/base/", assets).props, props)
+
     def test_split_nodes_delimiter(self):
         test_cases: list[
             tuple[list[TextNode], Literal["Bold", "Italic", "Code"], list[TextNode]]
@@ -248,6 +272,14 @@ class TestTextNode(unittest.TestCase):
             new_nodes,
         )
 
+    def test_split_links_same_as_image(self):
+        # The image's own "[a](b)" is not the link
+        new_nodes = split_nodes_link([TextNode("![a](b) [a](b)", "Plain")])
+        self.assertListEqual(
+            [TextNode("![a](b) ", "Plain"), TextNode("a", "Link", "b")],
+            new_nodes,
+        )
+
     def test_text_to_textnodes(self):
         test_cases: list[tuple[str, list[TextNode]]] = [
             (
@@ -319,6 +351,132 @@ class TestTextNode(unittest.TestCase):
             actual = text_to_textnodes(input)
             self.assertEqual(actual, expected)
 
+    def test_text_to_textnodes_matches_split_passes(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            text = "".join(rng.choice("*_`![]()ab ") for _ in range(rng.randint(0, 16)))
+
+            nodes = [TextNode(text, "Plain")]
+            for text_type in ("Bold", "Italic", "Code"):
+                nodes = split_nodes_delimiter(nodes, text_type)
+            nodes = split_nodes_link(split_nodes_image(nodes))
+
+            actual = text_to_textnodes(text)
+            # The split passes can not pair italic delimiters across a bold
+            # span, nor look inside a span
+            if any(n.text_type == "Italic" and "**" in n.text for n in actual):
+                continue
+            for node in actual:
+                node.children = None
+
+            self.assertEqual(actual, nodes, text)
+
+    def test_text_to_textnodes_escapes(self):
+        test_cases: list[tuple[str, list[TextNode]]] = [
+            (
+                r"\*\*not bold\*\* and \_not italic\_",
+                [TextNode("**not bold** and _not italic_", "Plain")],
+            ),
+            (
+                r"**2 \* 3** is \`six\`",
+                [TextNode("2 * 3", "Bold"), TextNode(" is `six`", "Plain")],
+            ),
+            (
+                r"[a\]b](/c\(d\)) \![e](f)",
+                [
+                    TextNode("a]b", "Link", "/c(d)"),
+                    TextNode(" !", "Plain"),
+                    TextNode("e", "Link", "f"),
+                ],
+            ),
+            (
+                r"C:\Users\ stays \\",
+                [TextNode("C:\\Users\\ stays \\", "Plain")],
+            ),
+            (
+                r"`a\*b` and \*c\*",
+                [TextNode(r"a\*b", "Code"), TextNode(" and *c*", "Plain")],
+            ),
+            (
+                # Characters that look like the placeholders are left alone
+                "\ue000\ue001 \\* \ue009",
+                [TextNode("\ue000\ue001 * \ue009", "Plain")],
+            ),
+            (
+                r"**a \_b\_ c**",
+                [TextNode("a _b_ c", "Bold")],
+            ),
+        ]
+
+        for input, expected in test_cases:
+            actual = text_to_textnodes(input)
+            self.assertEqual(actual, expected)
+
+
+    def test_text_to_textnodes_nested(self):
+        test_cases: list[tuple[str, list[TextNode], str]] = [
+            (
+                "**a _b_ c**",
+                [
+                    TextNode(
+                        "a _b_ c",
+                        "Bold",
+                        children=[
+                            TextNode("a ", "Plain"),
+                            TextNode("b", "Italic"),
+                            TextNode(" c", "Plain"),
+                        ],
+                    )
+                ],
+                "<b>a <i>b</i> c</b>",
+            ),
+            (
+                "_a **b** c_ d",
+                [
+                    TextNode(
+                        "a **b** c",
+                        "Italic",
+                        children=[
+                            TextNode("a ", "Plain"),
+                            TextNode("b", "Bold"),
+                            TextNode(" c", "Plain"),
+                        ],
+                    ),
+                    TextNode(" d", "Plain"),
+                ],
+                "<i>a <b>b</b> c</i> d",
+            ),
+            (
+                "**see [x](/x) and _y_**",
+                [
+                    TextNode(
+                        "see [x](/x) and _y_",
+                        "Bold",
+                        children=[
+                            TextNode("see ", "Plain"),
+                            TextNode("x", "Link", "/x"),
+                            TextNode(" and ", "Plain"),
+                            TextNode("y", "Italic"),
+                        ],
+                    )
+                ],
+                '<b>see <a href="/x">x</a> and <i>y</i></b>',
+            ),
+            (
+                "**`a*b`**",
+                [TextNode("`a*b`", "Bold", children=[TextNode("a*b", "Code")])],
+                "<b><code>a*b</code></b>",
+            ),
+        ]
+
+        for input, expected, html in test_cases:
+            actual = text_to_textnodes(input)
+            self.assertEqual(actual, expected)
+            self.assertEqual(
+                "".join(text_node_to_html_node(node).to_html() for node in actual),
+                html,
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
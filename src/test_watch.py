@@ -0,0 +1,175 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from build import build
+from collection import CollectionConfig
+from watch import Watcher
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.static = os.path.join(root, "static")
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        self.dest = os.path.join(root, "docs")
+        self.manifest = os.path.join(root, "manifest.json")
+
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.watcher = Watcher(
+                self.static,
+                self.content,
+                self.template,
+                self.dest,
+                self.manifest,
+                "/",
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path: str, text: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            _ = f.write(text)
+
+    def read(self, *parts: str) -> str:
+        with open(os.path.join(self.dest, *parts)) as f:
+            return f.read()
+
+    def update(self) -> list[str]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.watcher.update()
+
+    def build(self) -> str:
+        # A full build, as after quitting the watcher
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.watcher.flush()
+            build(
+                self.static,
+                self.content,
+                self.template,
+                self.dest,
+                self.manifest,
+                "/",
+            )
+        return out.getvalue()
+
+    def test_initial_build(self):
+        self.assertEqual(self.read("index.html"), "<title>Home</title><div><h1>Home</h1></div>")
+        self.assertEqual(self.update(), [])
+
+    def test_page_change(self):
+        self.write(os.path.join(self.content, "index.md"), "# Changed")
+        self.assertEqual(self.update(), [os.path.join(self.dest, "index.html")])
+        self.assertEqual(
+            self.read("index.html"), "<title>Changed</title><div><h1>Changed</h1></div>"
+        )
+        self.assertEqual(self.update(), [])
+
+    def test_manifest_saved_on_flush(self):
+        with open(self.manifest) as f:
+            saved = f.read()
+
+        self.write(os.path.join(self.content, "index.md"), "# Changed")
+        self.assertEqual(len(self.update()), 1)
+        with open(self.manifest) as f:
+            self.assertEqual(f.read(), saved)
+
+        self.watcher.flush()
+        self.assertEqual(self.build(), "")
+
+    def test_template_change(self):
+        self.write(self.template, "<h2>{{ Title }}</h2>{{ Content }}")
+        self.assertEqual(len(self.update()), 2)
+        self.assertEqual(
+            self.read("blog", "post", "index.html"), "<h2>Post</h2><div><h1>Post</h1></div>"
+        )
+
+    def test_static_change(self):
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        self.assertEqual(self.update(), [os.path.join(self.dest, "index.css")])
+        self.assertEqual(self.read("index.css"), "body { color: red }")
+
+    def test_image_size_change(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![a](/a.gif)")
+        self.write(os.path.join(self.static, "a.gif"), "GIF89a\x10\x00\x08\x00")
+        # Both pages, any of them could show it, and the image itself
+        self.assertEqual(len(self.update()), 3)
+        self.assertIn('src="/a.gif" width="16"', self.read("index.html"))
+        self.assertEqual(self.update(), [])
+
+        # Same size, written within a tick of the last check
+        self.write(os.path.join(self.static, "a.gif"), "GIF89a\x20\x00\x08\x00")
+        self.assertEqual(len(self.update()), 3)
+        self.assertIn('src="/a.gif" width="32"', self.read("index.html"))
+
+    def test_removal(self):
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        os.remove(os.path.join(self.static, "index.css"))
+        self.assertEqual(len(self.update()), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.css")))
+
+    def test_broken_page(self):
+        self.write(os.path.join(self.content, "index.md"), "No title")
+        self.assertEqual(self.update(), [])
+        self.assertEqual(self.update(), [])
+
+        # Saved along with another page, the broken one is still not built
+        post = os.path.join(self.content, "blog", "post", "index.md")
+        self.write(post, "# Changed")
+        self.assertEqual(
+            self.update(), [os.path.join(self.dest, "blog", "post", "index.html")]
+        )
+        with self.assertRaises(Exception) as cm:
+            self.build()
+        self.assertIn("No 'h1' header found", str(cm.exception))
+
+        self.write(os.path.join(self.content, "index.md"), "# Fixed")
+        self.assertEqual(self.update(), [os.path.join(self.dest, "index.html")])
+        self.assertEqual(self.build(), "")
+
+    def test_listings(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.watcher = Watcher(
+                self.static,
+                self.content,
+                self.template,
+                self.dest,
+                self.manifest,
+                "/",
+                collections=[CollectionConfig("blog", "Blog")],
+            )
+        self.assertIn('<a href="/blog/post/">Post</a>', self.read("blog", "index.html"))
+        self.assertEqual(self.update(), [])
+
+        self.write(os.path.join(self.content, "blog", "new", "index.md"), "# New")
+        self.assertEqual(
+            self.update(),
+            [
+                os.path.join(self.dest, "blog", "new", "index.html"),
+                os.path.join(self.dest, "blog", "index.html"),
+            ],
+        )
+        self.assertIn('<a href="/blog/new/">New</a>', self.read("blog", "index.html"))
+
+        # Edits below the title do not change the listing
+        self.write(os.path.join(self.content, "blog", "new", "index.md"), "# New\n\nText")
+        self.assertEqual(
+            self.update(), [os.path.join(self.dest, "blog", "new", "index.html")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,18 @@
 import re
 
+# The quantifiers are possessive: no class overlaps the character after it,
+# so giving back characters could never turn a failed match into one.
+
 # ![<alt text>](<URL>)
-image_re = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+image_re = re.compile(r"!\[([^\[\]]*+)\]\(([^\(\)]*+)\)")
 
 # [<alt text>](<URL>)
-link_re = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+link_re = re.compile(r"(?<!!)\[([^\[\]]*+)\]\(([^\(\)]*+)\)")
+
+# [<alt text>](<URL>), an image if "!" comes right before it. Starting on
+# a literal lets the regex engine jump from "[" to "[" instead of trying
+# every position in between.
+bracket_re = re.compile(r"\[([^\[\]]*+)\]\(([^\(\)]*+)\)")
 
 def extract_markdown_images(text: str) -> list[tuple[str, str]]:
     images: list[tuple[str, str]] = image_re.findall(text)
@@ -13,3 +21,61 @@ def extract_markdown_images(text: str) -> list[tuple[str, str]]:
 def extract_markdown_links(text: str) -> list[tuple[str, str]]:
     links: list[tuple[str, str]] = link_re.findall(text)
     return links
+
+def find_markdown_images(text: str) -> list[re.Match[str]]:
+    # Like extract_markdown_images, but each image keeps its span
+    return list(image_re.finditer(text))
+
+def find_markdown_links(text: str) -> list[re.Match[str]]:
+    return list(link_re.finditer(text))
+
+def scan_markdown_images_and_links(
+    text: str, start: int = 0, end: int | None = None
+) -> list[tuple[int, int, bool, str, str]]:
+    # (start, end, is image, alt text, URL) of every image and link in
+    # text[start:end], in one pass over it. Finds what image_re does over
+    # the whole range and then link_re does over the gaps between the
+    # images, so images win where the two overlap.
+    if end is None:
+        end = len(text)
+
+    if text.find("!", max(start - 1, 0), end) == -1:
+        # No images, and no "!" right before the range either
+        return [
+            (match.start(), match.end(), False, match[1], match[2])
+            for match in bracket_re.finditer(text, start, end)
+        ]
+
+    found = list[tuple[int, int, bool, str, str]]()
+    while True:
+        for match in bracket_re.finditer(text, start, end):
+            match_start, match_end = match.span()
+            alt, url = match.groups()
+            if match_start != 0 and text[match_start - 1] == "!":
+                # Unless the "!" is out of range, then it is neither
+                if match_start != start:
+                    found.append((match_start - 1, match_end, True, alt, url))
+            elif "![" not in url:
+                found.append((match_start, match_end, False, alt, url))
+            elif (
+                image := image_re.search(text, match.start(2), end)
+            ) is not None and image.start() < match_end:
+                # The only way a link and an image overlap: the image starts
+                # in the link's URL, and its alt text holds the link's ")".
+                # As in "[a](b ![c)](d)", where "![c)](d)" is the image.
+                found.append(
+                    (image.start(), image.end(), True, image[1], image[2])
+                )
+                start = image.end()
+                break
+            else:
+                found.append((match_start, match_end, False, alt, url))
+        else:
+            return found
+
+def rebase_url(url: str, base_path: str) -> str:
+    # Only site-absolute URLs, not "//host/..." protocol-relative ones
+    if url.startswith("/") and not url.startswith("//"):
+        return base_path + url[1:]
+
+    return url
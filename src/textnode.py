@@ -1,9 +1,17 @@
-from collections.abc import Sequence
+import functools
+import re
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass
 from typing import Literal, override
 
-from htmlnode import HTMLNode, LeafNode
-from text import extract_markdown_images, extract_markdown_links
+from asset import AssetMap
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from text import (
+    find_markdown_images,
+    find_markdown_links,
+    rebase_url,
+    scan_markdown_images_and_links,
+)
 
 
 type TextType = Literal["Plain", "Bold", "Italic", "Code", "Link", "Image"]
@@ -14,6 +22,8 @@ class TextNode:
     text: str
     text_type: TextType
     url: str | None = None
+    # The markup inside a Bold or Italic span, None when text is all plain
+    children: "list[TextNode] | None" = None
 
     @override
     def __eq__(self, value: object, /) -> bool:
@@ -24,21 +34,33 @@ class TextNode:
             self.text == value.text
             and self.text_type == value.text_type
             and self.url == value.url
+            and self.children == value.children
         )
 
     @override
     def __repr__(self) -> str:
-        return f"{self.__class__.__name__}('{self.text}', '{self.text_type}', '{self.url}')"
+        fields = f"'{self.text}', '{self.text_type}', '{self.url}'"
+        if self.children is not None:
+            fields += f", {self.children}"
+        return f"{self.__class__.__name__}({fields})"
 
 
-def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
+def text_node_to_html_node(
+    text_node: TextNode, base_path: str = "/", assets: AssetMap | None = None
+) -> HTMLNode:
     match text_node.text_type:
         case "Plain":
             return LeafNode(tag=None, value=text_node.text)
-        case "Bold":
-            return LeafNode(tag="b", value=text_node.text)
-        case "Italic":
-            return LeafNode(tag="i", value=text_node.text)
+        case "Bold" | "Italic":
+            tag = "b" if text_node.text_type == "Bold" else "i"
+            if text_node.children is None:
+                return LeafNode(tag=tag, value=text_node.text)
+
+            children = [
+                text_node_to_html_node(child, base_path, assets)
+                for child in text_node.children
+            ]
+            return ParentNode(tag=tag, children=children)
         case "Code":
             return LeafNode(tag="code", value=text_node.text)
         case "Link":
@@ -46,32 +68,83 @@ def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
                 msg = f"{text_node} has no url"
                 raise ValueError(msg)
 
-            return LeafNode(
-                tag="a", value=text_node.text, props={"href": text_node.url}
-            )
+            href = rebase_url(text_node.url, base_path)
+            if assets is not None:
+                href = assets.url(href)
+
+            return LeafNode(tag="a", value=text_node.text, props={"href": href})
         case "Image":
             if text_node.url is None:
                 msg = f"{text_node} has no url"
                 raise ValueError(msg)
 
-            return LeafNode(
-                tag="img",
-                value="",
-                props={"href": text_node.url, "alt": text_node.text},
-            )
+            src = rebase_url(text_node.url, base_path)
+            props = {"src": src, "alt": text_node.text}
+            if assets is not None:
+                props["src"] = assets.url(src)
+                image = assets.images.get(src)
+                if image is not None:
+                    # Sized so the page does not shift as it loads, and only
+                    # fetched once it is scrolled near
+                    props.update(image)
+                    props["loading"] = "lazy"
+
+            return LeafNode(tag="img", value="", props=props)
+
+
+# Inline delimiters in the order they take precedence. Bold spans are found
+# first, and an italic span may hold them or sit inside one. Code spans are
+# literal and hold nothing.
+DELIMITERS: dict[Literal["Bold", "Italic", "Code"], str] = {
+    "Bold": "**",
+    "Italic": "_",
+    "Code": "`",
+}
+
+# Characters that lose their markup meaning when preceded by a backslash
+ESCAPABLE = "\\`*_[]()!"
+_escape_re = re.compile(r"\\([\\`*_\[\]()!])")
+# First code point tried for the placeholders of escaped characters
+_PLACEHOLDER_BASE = 0xE000
+# The characters that start an italic, code, image or link span. Content
+# without any of them is all plain.
+_markup_re = re.compile(r"[_`\[]")
+
+
+@dataclass(slots=True, frozen=True)
+class _EscapeTables:
+    # Escaped characters are swapped for placeholders while tokenizing so no
+    # delimiter or link scan can see them, then swapped back
+    placeholders: dict[str, str]
+    unescape: dict[int, str]
+    # Code spans are literal, so there they are swapped back with the backslash
+    code_unescape: dict[int, str]
+
+
+@functools.cache
+def _escape_tables(base: int) -> _EscapeTables:
+    placeholders = {char: chr(base + i) for i, char in enumerate(ESCAPABLE)}
+    return _EscapeTables(
+        placeholders,
+        str.maketrans({p: char for char, p in placeholders.items()}),
+        str.maketrans({p: "\\" + char for char, p in placeholders.items()}),
+    )
+
+
+def _escape_tables_for(text: str) -> _EscapeTables:
+    # Placeholders that do not occur in the text, so none can be mistaken
+    # for an escape on the way back
+    base = _PLACEHOLDER_BASE
+    while not _escape_tables(base).unescape.keys().isdisjoint(map(ord, text)):
+        base += len(ESCAPABLE)
+
+    return _escape_tables(base)
 
 
 def split_nodes_delimiter(
     old_nodes: Sequence[TextNode], text_type: Literal["Bold", "Italic", "Code"]
 ) -> list[TextNode]:
-    delimiter: str
-    match text_type:
-        case "Bold":
-            delimiter = "**"
-        case "Italic":
-            delimiter = "_"
-        case "Code":
-            delimiter = "`"
+    delimiter = DELIMITERS[text_type]
 
     new_nodes = list[TextNode]()
     for node in old_nodes:
@@ -79,36 +152,42 @@ def split_nodes_delimiter(
             new_nodes.append(node)
             continue
 
-        last = ""
-        text_so_far = ""
-        start_delimiter = False
-        for char in node.text:
-            is_delimiter = (last + char).endswith(delimiter)
-            if is_delimiter:
-                # Hacky hack hack for bold
-                if len(delimiter) == 2:
-                    text_so_far = text_so_far[:-1]
-
-                if not start_delimiter:
-                    start_delimiter = True
-                    if len(text_so_far) != 0:
-                        new_nodes.append(TextNode(text_so_far, "Plain"))
-                        text_so_far = ""
-                else:
-                    start_delimiter = False
-                    new_nodes.append(TextNode(text_so_far, text_type))
-                    text_so_far = ""
-            else:
-                text_so_far += char
+        text = node.text
+        for start, end, is_delimited in _delimited_spans(
+            text, 0, len(text), delimiter
+        ):
+            new_nodes.append(
+                TextNode(text[start:end], text_type if is_delimited else "Plain")
+            )
 
-            last = char
+    return new_nodes
 
-        # Not raising an error on not finding a closing delimiter
 
-        if len(text_so_far) != 0:
-            new_nodes.append(TextNode(text_so_far, "Plain"))
+def _delimited_spans(
+    text: str, start: int, end: int, delimiter: str
+) -> Iterator[tuple[int, int, bool]]:
+    # Yields (start, end, is_delimited) for every piece of text[start:end].
+    # Empty plain pieces are skipped, empty delimited ones are not. An
+    # unclosed delimiter is dropped and the rest is plain text.
+    width = len(delimiter)
+    is_open = False
+    span_start = start
+
+    index = text.find(delimiter, start, end)
+    while index != -1:
+        if is_open:
+            # "***" toggles twice, the second delimiter overlapping the first
+            yield span_start, max(index, span_start), True
+        elif index > span_start:
+            yield span_start, index, False
+
+        is_open = not is_open
+        span_start = index + width
+        index = text.find(delimiter, index + 1, end)
+
+    if span_start < end:
+        yield span_start, end, False
 
-    return new_nodes
 
 def split_nodes_image(old_nodes: Sequence[TextNode]) -> list[TextNode]:
     new_nodes = list[TextNode]()
@@ -117,23 +196,22 @@ def split_nodes_image(old_nodes: Sequence[TextNode]) -> list[TextNode]:
             new_nodes.append(node)
             continue
 
-        images = extract_markdown_images(node.text)
+        images = find_markdown_images(node.text)
 
         if len(images) == 0:
             new_nodes.append(node)
             continue
 
-        text_to_split = node.text
-        for alt, url in images:
-            left_text, text_to_split = text_to_split.split(f"![{alt}]({url})", 1)
+        start = 0
+        for match in images:
+            if match.start() > start:
+                new_nodes.append(TextNode(node.text[start : match.start()], "Plain"))
 
-            if left_text != "":
-                new_nodes.append(TextNode(left_text, "Plain"))
+            new_nodes.append(TextNode(match.group(1), "Image", match.group(2)))
+            start = match.end()
 
-            new_nodes.append(TextNode(alt, "Image", url))
-
-        if text_to_split != "":
-            new_nodes.append(TextNode(text_to_split, "Plain"))
+        if len(node.text) > start:
+            new_nodes.append(TextNode(node.text[start:], "Plain"))
 
     return new_nodes
 
@@ -144,33 +222,158 @@ def split_nodes_link(old_nodes: Sequence[TextNode]) -> list[TextNode]:
             new_nodes.append(node)
             continue
 
-        links = extract_markdown_links(node.text)
+        links = find_markdown_links(node.text)
 
         if len(links) == 0:
             new_nodes.append(node)
             continue
 
-        text_to_split = node.text
-        for alt, url in links:
-            left_text, text_to_split = text_to_split.split(f"[{alt}]({url})", 1)
-
-            if left_text != "":
-                new_nodes.append(TextNode(left_text, "Plain"))
+        start = 0
+        for match in links:
+            if match.start() > start:
+                new_nodes.append(TextNode(node.text[start : match.start()], "Plain"))
 
-            new_nodes.append(TextNode(alt, "Link", url))
+            new_nodes.append(TextNode(match.group(1), "Link", match.group(2)))
+            start = match.end()
 
-        if text_to_split != "":
-            new_nodes.append(TextNode(text_to_split, "Plain"))
+        if len(node.text) > start:
+            new_nodes.append(TextNode(node.text[start:], "Plain"))
 
     return new_nodes
 
 
 def text_to_textnodes(text: str) -> list[TextNode]:
-    nodes = [TextNode(text, "Plain")]
-    for text_type in ("Bold", "Italic", "Code"):
-        nodes = split_nodes_delimiter(nodes, text_type)
+    tables = None
+    if "\\" in text:
+        tables = _escape_tables_for(text)
+        placeholders = tables.placeholders
+        text = _escape_re.sub(lambda m: placeholders[m.group(1)], text)
+
+    nodes = list[TextNode]()
+    _tokenize(text, 0, len(text), nodes)
 
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    if tables is not None:
+        _unescape(nodes, tables)
 
     return nodes
+
+
+def _unescape(nodes: list[TextNode], tables: _EscapeTables):
+    for node in nodes:
+        if node.text_type == "Code":
+            node.text = node.text.translate(tables.code_unescape)
+            continue
+
+        node.text = node.text.translate(tables.unescape)
+        if node.url is not None:
+            node.url = node.url.translate(tables.unescape)
+        if node.children is not None:
+            _unescape(node.children, tables)
+
+
+def _tokenize(text: str, start: int, end: int, nodes: list[TextNode]):
+    # Without nested spans, the same result as running split_nodes_delimiter
+    # for each delimiter and then split_nodes_image and split_nodes_link, but
+    # by slicing one string by offset instead of rebuilding every
+    # intermediate node.
+    #
+    # Italic delimiters outside the bold spans pair up in order, across the
+    # bold spans between them. The content of each span is tokenized into
+    # its children.
+    pieces = list(_delimited_spans(text, start, end, DELIMITERS["Bold"]))
+    italic = DELIMITERS["Italic"]
+    marks = list[int]()
+    for piece_start, piece_end, is_bold in pieces:
+        if not is_bold:
+            index = text.find(italic, piece_start, piece_end)
+            while index != -1:
+                marks.append(index)
+                index = text.find(italic, index + 1, piece_end)
+    # An unclosed delimiter is dropped and splits plain text, like in
+    # _delimited_spans
+    paired = len(marks) - len(marks) % 2
+
+    out = nodes
+    italic_start = start
+    mark = 0
+    for piece_start, piece_end, is_bold in pieces:
+        if is_bold:
+            out.append(_span(text, piece_start, piece_end, "Bold", None))
+            continue
+
+        while mark < len(marks) and marks[mark] < piece_end:
+            index = marks[mark]
+            if index > piece_start:
+                _tokenize_code(text, piece_start, index, out)
+
+            mark += 1
+            piece_start = index + 1
+            if mark > paired:
+                continue
+
+            if mark % 2 == 0:
+                nodes.append(_span(text, italic_start, index, "Italic", out))
+                out = nodes
+            elif marks[mark] < piece_end:
+                # Closed in the same piece, so there is nothing bold inside
+                close = marks[mark]
+                nodes.append(_span(text, piece_start, close, "Italic", None))
+                mark += 1
+                piece_start = close + 1
+            else:
+                out = list[TextNode]()
+                italic_start = piece_start
+
+        if piece_end > piece_start:
+            _tokenize_code(text, piece_start, piece_end, out)
+
+
+def _span(
+    text: str,
+    start: int,
+    end: int,
+    text_type: Literal["Bold", "Italic"],
+    children: list[TextNode] | None,
+) -> TextNode:
+    # children is what the span holds, tokenized here when None
+    if children is None:
+        if _markup_re.search(text, start, end) is None:
+            return TextNode(text[start:end], text_type)
+
+        children = list[TextNode]()
+        _tokenize(text, start, end, children)
+
+    value = text[start:end]
+    if len(children) == 0 or (
+        len(children) == 1
+        and children[0].text_type == "Plain"
+        and children[0].text == value
+    ):
+        return TextNode(value, text_type)
+
+    return TextNode(value, text_type, children=children)
+
+
+def _tokenize_code(text: str, start: int, end: int, nodes: list[TextNode]):
+    for span_start, span_end, is_code in _delimited_spans(
+        text, start, end, DELIMITERS["Code"]
+    ):
+        if is_code:
+            nodes.append(TextNode(text[span_start:span_end], "Code"))
+        else:
+            _tokenize_images_and_links(text, span_start, span_end, nodes)
+
+
+def _tokenize_images_and_links(
+    text: str, start: int, end: int, nodes: list[TextNode]
+):
+    for match_start, match_end, is_image, alt, url in scan_markdown_images_and_links(
+        text, start, end
+    ):
+        if match_start > start:
+            nodes.append(TextNode(text[start:match_start], "Plain"))
+        nodes.append(TextNode(alt, "Image" if is_image else "Link", url))
+        start = match_end
+
+    if end > start:
+        nodes.append(TextNode(text[start:end], "Plain"))
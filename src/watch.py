@@ -0,0 +1,268 @@
+import os
+import time
+
+from asset import AssetMap
+from build import build
+from cache import DEFAULT_CACHE_SIZE, BodyCache
+from collection import (
+    CollectionConfig,
+    PostCache,
+    collect_listings,
+    generate_collections,
+)
+from file import LinkMode, TreeIndex, copy_file, remove_file
+from image import image_props, index_images
+from manifest import FileState, file_state, hash_tree, load_manifest, save_manifest
+from page import page_dest_path, print_generating, write_page
+from template import load_template
+
+
+class Watcher:
+    # Keeps the compiled template and the last seen state of every source in
+    # memory, and on each update rebuilds only the outputs whose inputs
+    # changed:
+    #
+    #   template.html      -> every page
+    #   content/**/x.md    -> x.html, and the listings it shows up on
+    #   static/**/asset    -> its copy, and every page if its size changed
+    def __init__(
+        self,
+        static_path: str,
+        content_path: str,
+        template_path: str,
+        dest_path: str,
+        manifest_path: str,
+        base_path: str,
+        link: LinkMode = "copy",
+        cache_path: str | None = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        collections: list[CollectionConfig] | None = None,
+    ) -> None:
+        self.static_path: str = static_path
+        self.content_path: str = content_path
+        self.template_path: str = template_path
+        self.dest_path: str = dest_path
+        self.manifest_path: str = manifest_path
+        self.base_path: str = base_path
+        self.link: LinkMode = link
+        self.cache_size: int = cache_size
+        self.collections: list[CollectionConfig] = collections or []
+
+        # Bring the output up to date once, then track it from memory
+        build(
+            static_path,
+            content_path,
+            template_path,
+            dest_path,
+            manifest_path,
+            base_path,
+            link=link,
+            cache_path=cache_path,
+            cache_size=cache_size,
+            collections=collections,
+        )
+        self.manifest = load_manifest(manifest_path)
+        self.template = load_template(
+            template_path,
+            base_path,
+            AssetMap(images=image_props(self.manifest.images, base_path)),
+        )
+        self.template_state: FileState = file_state(template_path)
+        # Last seen state of every page. The manifest keeps the state each
+        # one was last built from, which differs for the pages that failed.
+        self.content: dict[str, FileState] = dict(self.manifest.content)
+        self.failed: set[str] = set()
+        self.cache: BodyCache | None = None
+        if cache_path is not None:
+            self.cache = BodyCache(cache_path)
+
+        # Polling has to stay well below the interval on large sites, so the
+        # directory listings and every post's title, date and tags are kept
+        # from one update to the next, and only read again once they change
+        self.content_index: TreeIndex = TreeIndex(content_path, ["*.md"])
+        self.static_index: TreeIndex = TreeIndex(static_path)
+        for _ in self.content_index.walk():
+            pass
+        for _ in self.static_index.walk():
+            pass
+        self.posts: PostCache = {}
+        if len(self.collections) != 0:
+            _ = collect_listings(
+                self.collections, content_path, self.content, self.posts
+            )
+        # Whether the manifest on disk is behind the one in memory. Saving
+        # it rewrites the state of every file, so that waits for a poll
+        # without changes. A manifest left behind only costs a full build
+        # some work it did not need to redo.
+        self.unsaved: bool = False
+
+    def update(self) -> list[str]:
+        # Returns the outputs that were written or removed
+        changed = list[str]()
+
+        # State is only committed at the end, so an update cut short by an
+        # unexpected error is redone in full by the next one
+        static = hash_tree(
+            self.static_path, "", self.manifest.static, index=self.static_index
+        )
+        images = index_images(self.static_path, static, self.manifest.images)
+        assets = AssetMap(images=image_props(images, self.base_path))
+
+        # Any page may show any image, so a new image size rebuilds them all
+        template_state = file_state(self.template_path, self.template_state)
+        template_changed = (
+            template_state.hash != self.template_state.hash
+            or assets != self.template.assets
+        )
+        template = self.template
+        if template_changed:
+            template = load_template(self.template_path, self.base_path, assets)
+
+        content = hash_tree(
+            self.content_path, ".md", self.content, index=self.content_index
+        )
+        failed = self.failed & content.keys()
+        for file, state in content.items():
+            old_state = self.content.get(file)
+            if (
+                not template_changed
+                and old_state is not None
+                and old_state.hash == state.hash
+            ):
+                continue
+
+            src_file_path = os.path.join(self.content_path, file)
+            dest_file_path = os.path.join(self.dest_path, page_dest_path(file))
+            print_generating(src_file_path, self.template_path, dest_file_path)
+            try:
+                write_page(
+                    src_file_path, template, dest_file_path, self.base_path, self.cache
+                )
+            except Exception as e:
+                # Keep watching, the page is retried on its next change and by
+                # the next full build
+                print(f"Failed to generate '{src_file_path}': {type(e).__name__}: {e}")
+                failed.add(file)
+                continue
+            failed.discard(file)
+            changed.append(dest_file_path)
+
+        for file in self.content.keys() - content.keys():
+            dest_file_path = os.path.join(self.dest_path, page_dest_path(file))
+            print(f"Removing stale '{page_dest_path(file)}'")
+            remove_file(dest_file_path, self.dest_path)
+            changed.append(dest_file_path)
+
+        listings = self.manifest.listings
+        content_changed = _hashes(content) != _hashes(self.content)
+        if len(self.collections) != 0 and (template_changed or content_changed):
+            try:
+                listings = generate_collections(
+                    self.collections,
+                    self.content_path,
+                    self.template_path,
+                    self.dest_path,
+                    self.base_path,
+                    self.manifest.listings,
+                    template_changed,
+                    {page_dest_path(file) for file in content},
+                    assets=assets,
+                    content=content,
+                    cache=self.posts,
+                )
+            except Exception as e:
+                # Same as a broken page, retried on the next change
+                print(f"Failed to generate listings: {type(e).__name__}: {e}")
+                listings = self.manifest.listings
+
+        for file, key in listings.items():
+            if template_changed or self.manifest.listings.get(file) != key:
+                changed.append(os.path.join(self.dest_path, file))
+
+        for file in self.manifest.listings.keys() - listings.keys():
+            dest_file_path = os.path.join(self.dest_path, file)
+            print(f"Removing stale '{file}'")
+            remove_file(dest_file_path, self.dest_path)
+            changed.append(dest_file_path)
+
+        for file, state in static.items():
+            old_state = self.manifest.static.get(file)
+            if old_state is not None and old_state.hash == state.hash:
+                continue
+
+            dest_file_path = os.path.join(self.dest_path, file)
+            print(f"Copying '{file}' to '{dest_file_path}'")
+            copy_file(os.path.join(self.static_path, file), dest_file_path, self.link)
+            changed.append(dest_file_path)
+
+        for file in self.manifest.static.keys() - static.keys():
+            dest_file_path = os.path.join(self.dest_path, file)
+            print(f"Removing stale '{file}'")
+            remove_file(dest_file_path, self.dest_path)
+            changed.append(dest_file_path)
+
+        self.template = template
+        self.template_state = template_state
+        self.manifest.template = template_state.hash
+        self.content = content
+        self.failed = failed
+        # A page that failed keeps the state it was last built from, so the
+        # next build retries it instead of trusting its old output
+        built = dict(content)
+        for file in failed:
+            old_state = self.manifest.content.get(file)
+            if old_state is None:
+                del built[file]
+            else:
+                built[file] = old_state
+        self.manifest.content = built
+        self.manifest.listings = listings
+        self.manifest.static = static
+        self.manifest.images = images
+        for file in self.posts.keys() - content.keys():
+            del self.posts[file]
+        if len(changed) != 0:
+            self.unsaved = True
+
+        return changed
+
+    def flush(self):
+        # Saves the manifest, and trims the body cache, if anything changed
+        # since the last flush
+        if not self.unsaved:
+            return
+
+        save_manifest(self.manifest, self.manifest_path)
+        if self.cache is not None:
+            _ = self.cache.evict(self.cache_size)
+        self.unsaved = False
+
+    def run(self, interval: float):
+        print(f"Watching for changes every {interval * 1000:.0f} ms, Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(interval)
+
+                start = time.perf_counter()
+                try:
+                    changed = self.update()
+                except OSError as e:
+                    # Most likely a file saved or removed mid-scan
+                    print(f"Rebuild failed: {type(e).__name__}: {e}")
+                    continue
+
+                if len(changed) != 0:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    print(f"Rebuilt {len(changed)} output(s) in {elapsed:.1f} ms")
+                else:
+                    self.flush()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.flush()
+            if self.cache is not None:
+                self.cache.close()
+
+
+def _hashes(states: dict[str, FileState]) -> dict[str, str]:
+    return {file: state.hash for file, state in states.items()}